@@ -1,6 +1,7 @@
 import streamlit as st
 from ui.index import home
-from main import remove_files
+from resources import warm_up_in_background
+from metrics import start_metrics_server
 
 # Set up page configuration
 st.set_page_config(
@@ -9,7 +10,22 @@ st.set_page_config(
     layout="wide",
 )
 
+
+@st.cache_resource
+def start_warm_up():
+    """Load the model and spell corrector once per server process, without blocking the first page."""
+    return warm_up_in_background(spell_corrector=True)
+
+
+@st.cache_resource
+def start_metrics():
+    """Serve the Prometheus /metrics endpoint once per server process."""
+    return start_metrics_server()
+
+
 # Run the main app
 if __name__ == "__main__":
+    start_warm_up()
+    start_metrics()
     home()
 
@@ -0,0 +1,285 @@
+"""
+Analyze a list of Amazon product and YouTube video URLs from the command line.
+
+Every URL is routed with match_url and analyzed by amazon_main/yotutbe_main
+on a JobScheduler, several at a time, in one process: the model, the
+translation and spelling caches and the result store are loaded once and
+shared. All Amazon crawls share one RateLimitedSession, so the per-host rate
+limit holds for the whole batch, and at most --max-per-site analyses of the
+same site run at once.
+
+The output folder holds:
+    progress.jsonl   one line per URL start/finish, used to resume
+    results.parquet  one row per URL: status, sentiment counts, timings
+    summary.parquet  totals per source and for the whole batch
+
+Running the same command again resumes an interrupted batch: finished URLs
+are skipped and the ones that were still running start over.
+
+Run from the repository root:
+    python batch_analysis.py urls.txt --output batch_results/nightly
+    python batch_analysis.py urls.txt --output batch_results/nightly --workers 6 --sample-margin 0.02
+"""
+import os
+import json
+import time
+import argparse
+from collections import Counter
+
+import pandas as pd
+
+from scheduler import JobScheduler, FINISHED, DONE, FAILED, CANCELLED
+from main import match_url
+from resources import warm_up
+from dedup import DEDUP_MODE, DEDUP_MODES
+from utils.utils import product_details, video_details
+from utils.job_context import JobContext
+from webscrapping.amazon_scrapping import create_session
+from webscrapping.http_client import REQUESTS_PER_SECOND, BURST
+from logging_config import setup_logging
+
+logger = setup_logging()
+
+WORKERS = 4
+MAX_PER_SITE = 2
+POLL_INTERVAL = 0.5
+PROGRESS_FILE = "progress.jsonl"
+RESULTS_FILE = "results.parquet"
+SUMMARY_FILE = "summary.parquet"
+
+# URL states besides the scheduler's DONE/FAILED/CANCELLED
+STARTED = "started"
+INVALID = "invalid"
+
+
+def read_urls(path):
+    """URLs from a text file, one per line. Blank lines, # comments and repeats are skipped."""
+    with open(path, "r", encoding="utf-8") as file:
+        lines = [line.strip() for line in file]
+    return list(dict.fromkeys(line for line in lines if line and not line.startswith("#")))
+
+
+def item_id_for(source, url):
+    """Product ID or video ID of url; raises ValueError when there is none."""
+    return product_details(url)[0] if source == "Amazon" else video_details(url)
+
+
+class BatchLog:
+    """
+    Append-only JSON-lines record of every URL's state in a batch folder.
+
+    A line is written and flushed whenever a URL starts or finishes, so an
+    interrupted batch loses at most the analyses that were running. The
+    latest entry of every URL is kept in entries.
+
+    Args:
+        folder (str): The batch output folder.
+    """
+
+    def __init__(self, folder):
+        self.path = os.path.join(folder, PROGRESS_FILE)
+        self.entries = {}
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as file:
+                for line in file:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # A line cut short by the interruption
+                    self.entries[entry["url"]] = entry
+        self._file = open(self.path, "a", encoding="utf-8")
+        if self._file.tell():
+            self._file.write("\n")  # Never continue a cut-short line
+
+    def write(self, entry):
+        self.entries[entry["url"]] = entry
+        self._file.write(json.dumps(entry) + "\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def result_row(url, source, item_id, status, counts=None, error=None, started_at=None, finished_at=None):
+    """One URL's entry in the progress log and in results.parquet."""
+    counts = counts or {}
+    rows = int(sum(counts.values()))
+    positive = int(counts.get("Positive", 0))
+    return {
+        "url": url,
+        "source": source,
+        "item_id": item_id,
+        "status": status,
+        "error": error,
+        "rows": rows,
+        "negative": int(counts.get("Negative", 0)),
+        "positive": positive,
+        "positive_share": round(positive / rows, 4) if rows else None,
+        "started_at": started_at,
+        "finished_at": finished_at,
+        "seconds": round(finished_at - started_at, 1) if started_at and finished_at else None,
+    }
+
+
+def summarize(results):
+    """URL counts by status and sentiment totals per source, plus an 'All' row."""
+    summary = []
+    groups = [(source, frame) for source, frame in results.groupby("source")] + [("All", results)]
+    for source, frame in groups:
+        done = frame[frame["status"] == DONE]
+        rows, positive = int(done["rows"].sum()), int(done["positive"].sum())
+        summary.append({
+            "source": source,
+            "urls": len(frame),
+            "done": len(done),
+            "failed": int((frame["status"] == FAILED).sum()),
+            "invalid": int((frame["status"] == INVALID).sum()),
+            "unfinished": int(frame["status"].isin([STARTED, CANCELLED]).sum()),
+            "rows": rows,
+            "negative": int(done["negative"].sum()),
+            "positive": positive,
+            "positive_share": round(positive / rows, 4) if rows else None,
+        })
+    return pd.DataFrame(summary)
+
+
+def write_outputs(folder, log):
+    """Write results.parquet and summary.parquet from the progress log."""
+    results = pd.DataFrame(list(log.entries.values()), columns=list(result_row("", None, None, None)))
+    summary = summarize(results)
+    results.to_parquet(os.path.join(folder, RESULTS_FILE), index=False)
+    summary.to_parquet(os.path.join(folder, SUMMARY_FILE), index=False)
+    return results, summary
+
+
+def plan_batch(urls, log, retry_failed=False):
+    """
+    The (url, source, item_id) still to analyze.
+
+    Finished and invalid URLs are skipped (failed ones too, unless
+    retry_failed). A URL that was running when the batch stopped, was
+    cancelled or is retried after failing keeps the items it already
+    stored: its crawl is recorded as incomplete, so the rerun reads every
+    item again and only adds the ones missing (see main.analyze_stream).
+    """
+    pending = []
+    for url in urls:
+        previous = log.entries.get(url)
+        status = previous["status"] if previous is not None else None
+        if status in (DONE, INVALID) or (status == FAILED and not retry_failed):
+            continue
+        source = match_url(url)
+        if source == "Invalid":
+            log.write(result_row(url, None, None, INVALID, error="Not an Amazon or YouTube URL"))
+            continue
+        try:
+            item_id = item_id_for(source, url)
+        except ValueError as e:
+            log.write(result_row(url, source, None, INVALID, error=str(e)))
+            continue
+        pending.append((url, source, item_id))
+    return pending
+
+
+def run_batch(urls, folder, workers=WORKERS, max_per_site=MAX_PER_SITE, retry_failed=False,
+              amazon_rate=REQUESTS_PER_SECOND, amazon_burst=BURST, **options):
+    """
+    Analyze urls with at most `workers` running at once and write the outputs to folder.
+
+    Args:
+        urls (list): Amazon product and YouTube video URLs.
+        folder (str): Output folder; an existing one is resumed.
+        workers (int): Analyses running at the same time.
+        max_per_site (int): Analyses of the same source running at the same time.
+        retry_failed (bool): Run URLs that failed in an earlier run again.
+        amazon_rate (float): Requests per second to Amazon for the whole batch.
+        amazon_burst (int): Amazon requests allowed back to back.
+        options: Passed to amazon_main/yotutbe_main (dedup, sample_margin, refresh...).
+
+    Returns:
+        tuple: (results DataFrame, summary DataFrame)
+    """
+    os.makedirs(folder, exist_ok=True)
+    log = BatchLog(folder)
+    pending = plan_batch(urls, log, retry_failed)
+    print(f"{len(pending)} of {len(urls)} URLs to analyze, output in {folder}")
+
+    scheduler = JobScheduler(max_jobs=workers)
+    amazon_session = create_session(rate=amazon_rate, burst=amazon_burst)
+    running = {}
+    per_site = Counter()
+    finished = 0
+    try:
+        while pending or running:
+            for entry in list(pending):
+                url, source, item_id = entry
+                if len(running) >= workers:
+                    break
+                if per_site[source] >= max_per_site:
+                    continue
+                pending.remove(entry)
+                extra = {"session": amazon_session} if source == "Amazon" else {}
+                job_id = scheduler.submit(source, context=JobContext(url), **options, **extra)
+                running[job_id] = (url, source, item_id, time.time())
+                per_site[source] += 1
+                log.write(result_row(url, source, item_id, STARTED, started_at=running[job_id][3]))
+
+            time.sleep(POLL_INTERVAL)
+            for job_id, (url, source, item_id, started_at) in list(running.items()):
+                status = scheduler.status(job_id)
+                if status["status"] not in FINISHED:
+                    continue
+                counts = {}
+                if status["status"] == DONE:
+                    frame = scheduler.result(job_id)
+                    counts = dict(zip(frame["Sentiment_Label"], frame["Count"]))
+                log.write(result_row(
+                    url, source, item_id, status["status"], counts, status["error"],
+                    status["started_at"] or started_at, status["finished_at"],
+                ))
+                scheduler.forget(job_id)
+                del running[job_id]
+                per_site[source] -= 1
+                finished += 1
+                print(f"[{finished}/{finished + len(running) + len(pending)}] {status['status']}: {url}")
+    except KeyboardInterrupt:
+        print("Interrupted: stopping the running analyses. Run the same command again to resume.")
+        raise
+    finally:
+        scheduler.shutdown(cancel=True)
+        amazon_session.close()
+        results, summary = write_outputs(folder, log)
+        log.close()
+    return results, summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Analyze many Amazon/YouTube URLs and write Parquet results")
+    parser.add_argument("urls", help="Text file with one URL per line")
+    parser.add_argument("--output", help="Output folder, defaults to ./batch_results/<name of the URL file>")
+    parser.add_argument("--workers", type=int, default=WORKERS, help="Analyses running at the same time")
+    parser.add_argument("--max-per-site", type=int, default=MAX_PER_SITE,
+                        help="Analyses of the same site running at the same time")
+    parser.add_argument("--amazon-rate", type=float, default=REQUESTS_PER_SECOND,
+                        help="Requests per second to Amazon, shared by the whole batch")
+    parser.add_argument("--retry-failed", action="store_true", help="Run URLs that failed before again")
+    parser.add_argument("--refresh", action="store_true", help="Ignore fresh stored results")
+    parser.add_argument("--dedup", choices=DEDUP_MODES + ["none"], default=DEDUP_MODE)
+    parser.add_argument("--sample-margin", type=float, default=None,
+                        help="Estimate each split to this margin (e.g. 0.02) instead of analyzing every item")
+    args = parser.parse_args()
+
+    folder = args.output or os.path.join("./batch_results", os.path.splitext(os.path.basename(args.urls))[0])
+    warm_up(spell_corrector=True)
+    _, summary = run_batch(
+        read_urls(args.urls),
+        folder,
+        workers=args.workers,
+        max_per_site=args.max_per_site,
+        retry_failed=args.retry_failed,
+        amazon_rate=args.amazon_rate,
+        refresh=args.refresh,
+        dedup=None if args.dedup == "none" else args.dedup,
+        sample_margin=args.sample_margin,
+    )
+    print(summary.to_string(index=False))
@@ -0,0 +1,68 @@
+"""
+Time review extraction from saved Amazon pages: the old two-parse
+BeautifulSoup path against parse-once with each backend.
+
+Run from the repository root, on saved pages or on generated ones:
+    python -m benchmarks.html_extraction_benchmark --pages-dir ./webscrapping/<product_id>
+    python -m benchmarks.html_extraction_benchmark --pages 50
+"""
+import os
+import glob
+import time
+import argparse
+import tempfile
+
+from bs4 import BeautifulSoup
+
+from webscrapping.html_extraction import parse_review_page, lxml_html
+from webscrapping.amazon_scrapping import extracting_total_reviews
+from benchmarks.sample_pages import write_sample_pages
+
+
+def two_parse_baseline(html_content):
+    """What the scraper did before: one parse for the count, another for the reviews."""
+    total_reviews = extracting_total_reviews(BeautifulSoup(html_content, "html.parser"))
+    soup = BeautifulSoup(html_content, "html.parser")
+    reviews = [span.get_text(strip=True) for span in soup.find_all("span", {"data-hook": "review-body"})]
+    return total_reviews, reviews
+
+
+def run_benchmark(pages_dir):
+    paths = sorted(glob.glob(os.path.join(pages_dir, "**", "*.html"), recursive=True))
+    pages = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as file:
+            pages.append(file.read())
+    if not pages:
+        raise SystemExit(f"No .html pages found under {pages_dir}")
+    size_mb = sum(len(page) for page in pages) / 1e6
+    print(f"Pages: {len(pages)} ({size_mb:.1f} MB)")
+
+    start = time.perf_counter()
+    baseline = [two_parse_baseline(page) for page in pages]
+    baseline_time = time.perf_counter() - start
+    print(f"{'two-parse html.parser':<24} {baseline_time:7.2f}s {len(pages) / baseline_time:8.1f} pages/s")
+
+    backends = ["html.parser", "lxml-soup", "lxml"] if lxml_html is not None else ["html.parser"]
+    for backend in backends:
+        start = time.perf_counter()
+        results = [parse_review_page(page, backend) for page in pages]
+        elapsed = time.perf_counter() - start
+        matching = sum(result == expected for result, expected in zip(results, baseline))
+        print(
+            f"{'parse-once ' + backend:<24} {elapsed:7.2f}s {len(pages) / elapsed:8.1f} pages/s "
+            f"{baseline_time / elapsed:5.1f}x  matching pages {matching}/{len(pages)}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages-dir", help="Directory of saved review pages (searched recursively)")
+    parser.add_argument("--pages", type=int, default=50, help="Synthetic pages to generate when no directory is given")
+    args = parser.parse_args()
+    if args.pages_dir:
+        run_benchmark(args.pages_dir)
+    else:
+        with tempfile.TemporaryDirectory() as folder:
+            write_sample_pages(folder, pages_per_star=max(1, args.pages // 5))
+            run_benchmark(folder)
@@ -0,0 +1,89 @@
+"""
+Measure how long the app's modules take to import and check that importing
+them loads no resources and pulls in none of the slow optional packages.
+
+Each module is imported in a fresh interpreter with -X importtime. Run from
+the repository root; the exit code is 1 when a module is over --max-seconds
+or has an import-time side effect, so it can guard against regressions:
+    python -m benchmarks.import_time_benchmark
+    python -m benchmarks.import_time_benchmark --max-seconds 1.5 --top 5
+"""
+import sys
+import json
+import argparse
+import subprocess
+
+MODULES = [
+    "resources",
+    "standardizing_data",
+    "pipeline",
+    "main",
+    "url_details",
+    "scheduler",
+    "inference_api",
+]
+
+# Packages that must only be imported when the feature needing them runs
+LAZY_PACKAGES = ["nltk", "textblob", "googletrans", "googleapiclient.discovery", "indic_transliteration"]
+
+PROBE = """
+import sys, json
+import {module}
+import resources
+print(json.dumps({{
+    "loaded": resources.registry.loaded(),
+    "lazy_imported": [name for name in {lazy!r} if name in sys.modules],
+}}))
+"""
+
+
+def parse_importtime(stderr):
+    """Returns {module: (self_us, cumulative_us)} from -X importtime output."""
+    timings = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        timings[name.strip()] = (int(self_us), int(cumulative_us))
+    return timings
+
+
+def measure(module):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE.format(module=module, lazy=LAZY_PACKAGES)],
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise SystemExit(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+    timings = parse_importtime(result.stderr)
+    probe = json.loads(result.stdout.strip().splitlines()[-1])
+    return timings, probe
+
+
+def run_benchmark(modules, max_seconds, top):
+    failed = False
+    print(f"{'module':<22}{'import s':>10}  side effects")
+    for module in modules:
+        timings, probe = measure(module)
+        seconds = timings[module][1] / 1e6
+        problems = [f"loaded {name}" for name in probe["loaded"]]
+        problems += [f"imported {name}" for name in probe["lazy_imported"]]
+        if max_seconds is not None and seconds > max_seconds:
+            problems.append(f"over {max_seconds}s")
+        failed = failed or bool(problems)
+        print(f"{module:<22}{seconds:>10.3f}  {', '.join(problems) or 'none'}")
+        if top:
+            slowest = sorted(timings.items(), key=lambda item: item[1][0], reverse=True)[:top]
+            for name, (self_us, _) in slowest:
+                print(f"    {name:<40}{self_us / 1e6:>8.3f}s self")
+    return failed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("modules", nargs="*", default=MODULES, help="Modules to measure")
+    parser.add_argument("--max-seconds", type=float, default=None, help="Fail when a module takes longer")
+    parser.add_argument("--top", type=int, default=0, help="Show the N slowest imports of each module")
+    args = parser.parse_args()
+    sys.exit(1 if run_benchmark(args.modules, args.max_seconds, args.top) else 0)
@@ -0,0 +1,76 @@
+"""
+Check that the vectorized normalization matches clean_text/process_text and time both.
+
+Run from the repository root:
+    python -m benchmarks.normalization_benchmark --repeat 3
+"""
+import argparse
+import time
+
+import pandas as pd
+
+from standardizing_data import clean_text, normalize_series, remove_stop_words_series, stop_words
+from spell_correction import DATASET_PATH
+
+# Inputs that exercise the edge cases of each pattern
+EDGE_CASES = [
+    "",
+    "   ",
+    "123 numbers 4567 only",
+    "Great product!!! 😀😀 10/10 would buy again 👍",
+    "tabs\tand\nnewlines\r\n  everywhere\x1c\x1f",
+    "ﾟ･✿ヾ╲(｡◕‿◕｡)╱✿･ﾟ unicode art",
+    "नमस्ते दोस्तों १२३ यह बहुत अच्छा है!",
+    "café naïve résumé — em dash… ellipsis",
+    "under_score snake_case stays",
+    "fullwidth ０１２ digits and ① circled",
+    "null\x00byte inside",
+]
+
+
+def stop_words_reference(text):
+    return " ".join(word for word in text.split() if word.lower() not in stop_words)
+
+
+def timed(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def run_benchmark(repeat=3):
+    texts = pd.read_csv(DATASET_PATH, usecols=["text"])["text"].dropna().astype(str)
+    texts = pd.concat([texts, pd.Series(EDGE_CASES)], ignore_index=True)
+
+    reference, reference_time = timed(lambda: texts.apply(clean_text), repeat)
+    vectorized, vectorized_time = timed(lambda: normalize_series(texts), repeat)
+    mismatches = int((reference.astype(object) != vectorized.astype(object)).sum())
+
+    reference_full, reference_full_time = timed(
+        lambda: texts.apply(clean_text).apply(stop_words_reference), repeat
+    )
+    vectorized_full, vectorized_full_time = timed(lambda: normalize_series(texts, remove_stop_words=True), repeat)
+    full_mismatches = int((reference_full.astype(object) != vectorized_full.astype(object)).sum())
+
+    stop_mismatches = int(
+        (reference.apply(stop_words_reference).astype(object)
+         != remove_stop_words_series(reference).astype(object)).sum()
+    )
+
+    print(f"Rows: {len(texts)} (best of {repeat})")
+    print(f"clean_text apply:        {reference_time:.3f}s")
+    print(f"normalize_series:        {vectorized_time:.3f}s ({reference_time / vectorized_time:.1f}x)")
+    print(f"clean + stop words:      {reference_full_time:.3f}s")
+    print(f"normalize_series(+stop): {vectorized_full_time:.3f}s ({reference_full_time / vectorized_full_time:.1f}x)")
+    print(f"Mismatches: clean={mismatches}, clean+stop={full_mismatches}, stop={stop_mismatches}")
+    return mismatches + full_mismatches + stop_mismatches
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    raise SystemExit(1 if run_benchmark(repeat=args.repeat) else 0)
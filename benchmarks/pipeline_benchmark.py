@@ -0,0 +1,255 @@
+"""
+Per-stage throughput benchmark of the analysis pipeline, fully offline.
+
+Every stage runs on the previous stage's output, in batches like the
+streaming pipeline: HTML extraction (saved or generated review pages),
+cleaning (clean_series, the vectorized clean_text), language detection,
+translation (stub backend, no network), stop-word removal and spelling
+correction (process_texts), vectorization and prediction. For each stage
+rows/sec, per-batch latency percentiles and peak traced Python memory are
+reported and written as JSON, so runs can be compared across commits.
+The extract stage counts pages rather than rows.
+
+Run from the repository root:
+    python -m benchmarks.pipeline_benchmark
+    python -m benchmarks.pipeline_benchmark --rows 5000 --pages-dir ./webscrapping/<product_id>
+    python -m benchmarks.pipeline_benchmark --compare benchmarks/results/<older>.json
+"""
+import os
+import sys
+import glob
+import json
+import time
+import random
+import platform
+import argparse
+import tempfile
+import subprocess
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+import standardizing_data
+from standardizing_data import clean_series, process_texts, transliterate
+from language_detection import detect_language, detect_languages
+from translation import set_translation_backend, get_translator, DictionaryBackend
+from spell_correction import DATASET_PATH, build_spell_corrector
+from resources import get_predictor, get_english_words, warm_up
+from webscrapping.html_extraction import parse_review_page
+from benchmarks.sample_pages import write_sample_pages
+
+RESULTS_DIR = "./benchmarks/results"
+BATCH_SIZE = 200
+PERCENTILES = [50, 90, 99]
+
+# Mixed into the dataset so detection and translation have non-English rows
+MULTILINGUAL_SAMPLES = [
+    "यह उत्पाद बहुत अच्छा है",
+    "बिल्कुल बेकार, पैसे की बर्बादी",
+    "este producto es excelente y llegó rápido",
+    "la calidad es muy mala, no lo recomiendo",
+    "ce produit est vraiment très bon",
+    "produit de mauvaise qualité, très déçu",
+    "ये फोन बहुत धीमा है",
+    "sehr gutes Produkt, schnelle Lieferung",
+]
+MULTILINGUAL_FRACTION = 0.05
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def load_texts(rows, seed=42):
+    texts = pd.read_csv(DATASET_PATH, usecols=["text"])["text"].dropna().astype(str).tolist()
+    random.seed(seed)
+    texts = (texts * (rows // len(texts) + 1))[:rows]
+    for i in random.sample(range(len(texts)), int(len(texts) * MULTILINGUAL_FRACTION)):
+        texts[i] = random.choice(MULTILINGUAL_SAMPLES)
+    return texts
+
+
+def load_pages(pages_dir):
+    pages = []
+    for path in sorted(glob.glob(os.path.join(pages_dir, "**", "*.html"), recursive=True)):
+        with open(path, "r", encoding="utf-8") as file:
+            pages.append(file.read())
+    return pages
+
+
+def split(items, batch_size):
+    return [items[start:start + batch_size] for start in range(0, len(items), batch_size)]
+
+
+def time_stage(batches, func, rows_of=len, reset=None, trace_memory=True):
+    """
+    Run func over every batch and collect timings.
+
+    The first batch is run once untimed so one-off set-up (lazy imports,
+    langdetect profiles) is not counted. Then comes a timed pass and, with
+    trace_memory, a pass under tracemalloc for the peak memory, since
+    tracing slows the code it measures. tracemalloc only sees Python
+    allocations, not memory held by C libraries such as lxml. reset() is
+    called before each pass to drop caches.
+
+    Returns:
+        tuple: (list of batch outputs, stats dict)
+    """
+    if batches:
+        func(batches[0])
+    if reset is not None:
+        reset()
+    outputs, latencies = [], []
+    started = time.perf_counter()
+    for batch in batches:
+        batch_started = time.perf_counter()
+        outputs.append(func(batch))
+        latencies.append(time.perf_counter() - batch_started)
+    seconds = time.perf_counter() - started
+
+    peak = None
+    if trace_memory:
+        if reset is not None:
+            reset()
+        tracemalloc.start()
+        for batch in batches:
+            func(batch)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    rows = sum(rows_of(batch) for batch in batches)
+    latencies_ms = np.array(latencies) * 1000
+    stats = {
+        "rows": rows,
+        "batches": len(batches),
+        "seconds": round(seconds, 4),
+        "rows_per_sec": round(rows / seconds, 1) if seconds else None,
+        "batch_latency_ms": {
+            **{f"p{p}": round(float(np.percentile(latencies_ms, p)), 3) for p in PERCENTILES},
+            "max": round(float(latencies_ms.max()), 3),
+        } if len(latencies) else {},
+        "peak_memory_mb": round(peak / 2**20, 2) if peak is not None else None,
+    }
+    return outputs, stats
+
+
+def translate_batch(batch):
+    """The translation half of translate_texts, on (text, language) pairs."""
+    results = [text for text, _ in batch]
+    groups = {}
+    for i, (text, lang) in enumerate(batch):
+        if lang is not None and lang != "en":
+            groups.setdefault(lang, []).append((i, transliterate(text, lang)))
+    for lang, items in groups.items():
+        for (i, _), text in zip(items, get_translator().translate_many([text for _, text in items], lang)):
+            results[i] = text
+    return results
+
+
+def run_benchmark(rows, pages, batch_size, trace_memory=True):
+    set_translation_backend(DictionaryBackend(), cache_path=None)
+    warm_up()
+    predictor = get_predictor()
+    english_words = get_english_words()
+    flatten = lambda outputs: [item for output in outputs for item in output]
+    stages = {}
+
+    if pages:
+        _, stages["extract"] = time_stage(
+            split(pages, 1), lambda batch: parse_review_page(batch[0]), trace_memory=trace_memory
+        )
+
+    texts = load_texts(rows)
+    cleaned, stages["clean"] = time_stage(
+        split(texts, batch_size), lambda batch: clean_series(batch).tolist(), trace_memory=trace_memory
+    )
+    cleaned = [text for text in flatten(cleaned) if text]
+
+    languages, stages["detect"] = time_stage(
+        split(cleaned, batch_size),
+        lambda batch: detect_languages(batch, english_words=english_words)[0].tolist(),
+        reset=detect_language.cache_clear,
+        trace_memory=trace_memory,
+    )
+    translated, stages["translate"] = time_stage(
+        split(list(zip(cleaned, flatten(languages))), batch_size), translate_batch, trace_memory=trace_memory
+    )
+
+    def fresh_corrector():
+        # A corrector without the persistent word cache, so every run starts cold
+        standardizing_data._spell_corrector = build_spell_corrector(vectorizer=predictor, use_cache=False)
+
+    corrected, stages["correct"] = time_stage(
+        split(flatten(translated), batch_size), process_texts, reset=fresh_corrector, trace_memory=trace_memory
+    )
+    vectors, stages["vectorize"] = time_stage(
+        split(flatten(corrected), batch_size), predictor.transform, trace_memory=trace_memory
+    )
+    _, stages["predict"] = time_stage(
+        vectors, predictor.predict, rows_of=lambda matrix: matrix.shape[0], trace_memory=trace_memory
+    )
+    return stages
+
+
+def print_stages(stages, baseline=None):
+    print(f"{'stage':<11}{'rows':>8}{'rows/s':>12}{'p50 ms':>10}{'p99 ms':>10}{'peak MB':>10}"
+          + ("  vs baseline" if baseline else ""))
+    for name, stats in stages.items():
+        latency = stats["batch_latency_ms"]
+        line = (f"{name:<11}{stats['rows']:>8}{stats['rows_per_sec']:>12,.0f}"
+                f"{latency.get('p50', 0):>10.2f}{latency.get('p99', 0):>10.2f}"
+                f"{stats['peak_memory_mb'] if stats['peak_memory_mb'] is not None else '-':>10}")
+        old = (baseline or {}).get(name)
+        if old and old.get("rows_per_sec"):
+            line += f"  {stats['rows_per_sec'] / old['rows_per_sec']:.2f}x"
+        print(line)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2000, help="Dataset rows fed to the text stages")
+    parser.add_argument("--pages-dir", help="Saved review pages (searched recursively); generated if omitted")
+    parser.add_argument("--pages", type=int, default=25, help="Pages to generate when no directory is given")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc pass")
+    parser.add_argument("--output", help=f"JSON results file, defaults to {RESULTS_DIR}/pipeline-<commit>.json")
+    parser.add_argument("--compare", help="Earlier results file to compare rows/sec against")
+    args = parser.parse_args()
+
+    if args.pages_dir:
+        pages = load_pages(args.pages_dir)
+    else:
+        with tempfile.TemporaryDirectory() as folder:
+            write_sample_pages(folder, pages_per_star=max(1, args.pages // 5))
+            pages = load_pages(folder)
+
+    stages = run_benchmark(args.rows, pages, args.batch_size, trace_memory=not args.no_memory)
+    commit = git_commit()
+    results = {
+        "benchmark": "pipeline",
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "config": {"rows": args.rows, "pages": len(pages), "batch_size": args.batch_size},
+        "stages": stages,
+    }
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r") as file:
+            baseline = json.load(file)["stages"]
+    print_stages(stages, baseline)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"pipeline-{commit or 'unknown'}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as file:
+        json.dump(results, file, indent=2)
+    print(f"Results written to {output}")
@@ -0,0 +1,61 @@
+"""
+Synthetic Amazon review pages for offline benchmarks.
+
+The pages mimic the structure the scraper reads (the rating count banner and
+review-body spans) wrapped in enough boilerplate markup to be parsed like a
+real page.
+"""
+import os
+import random
+import html
+
+import pandas as pd
+
+from spell_correction import DATASET_PATH
+
+STAR_TYPES = ["one_star", "two_star", "three_star", "four_star", "five_star"]
+
+BOILERPLATE = "".join(
+    f'<div class="a-section nav-item-{i}"><a href="/gp/item/{i}" class="a-link-normal">'
+    f'<span class="a-size-base">Navigation link {i}</span></a>'
+    f'<script>window.ue_t{i} = {{"id": {i}, "data": "{"x" * 40}"}};</script></div>'
+    for i in range(400)
+)
+
+REVIEW_TEMPLATE = (
+    '<div id="R{id}" data-hook="review" class="a-section review aok-relative">'
+    '<div class="a-row"><a class="a-profile" href="/gp/profile/{id}"><span class="a-profile-name">User {id}</span></a></div>'
+    '<i data-hook="review-star-rating" class="a-icon a-icon-star"><span class="a-icon-alt">{stars}.0 out of 5 stars</span></i>'
+    '<span data-hook="review-date" class="a-size-base a-color-secondary">Reviewed in India on 1 January 2024</span>'
+    '<span data-hook="review-body" class="a-size-base review-text review-text-content">'
+    '<span>\n  {body}\n</span></span></div>'
+)
+
+
+def sample_page(reviews, total_reviews, stars):
+    banner = (
+        '<div data-hook="cr-filter-info-review-rating-count" class="a-row a-spacing-base a-size-base">'
+        f'{total_reviews * 3:,} total ratings, {total_reviews:,} with reviews</div>'
+    )
+    body = "".join(
+        REVIEW_TEMPLATE.format(id=random.randint(10**6, 10**7), stars=stars, body=html.escape(review))
+        for review in reviews
+    )
+    return f"<html><head><title>Reviews</title></head><body>{BOILERPLATE}{banner}{body}{BOILERPLATE}</body></html>"
+
+
+def write_sample_pages(folder, pages_per_star=10, reviews_per_page=10, seed=42):
+    """Write webscrapping-style {star}/page_N.html files under folder and return their paths."""
+    random.seed(seed)
+    texts = pd.read_csv(DATASET_PATH, usecols=["text"])["text"].dropna().tolist()
+    paths = []
+    for stars, star_type in enumerate(STAR_TYPES, start=1):
+        star_folder = os.path.join(folder, star_type)
+        os.makedirs(star_folder, exist_ok=True)
+        for page_no in range(1, pages_per_star + 1):
+            reviews = random.sample(texts, reviews_per_page)
+            path = os.path.join(star_folder, f"page_{page_no}.html")
+            with open(path, "w", encoding="utf-8") as file:
+                file.write(sample_page(reviews, pages_per_star * reviews_per_page, stars))
+            paths.append(path)
+    return paths
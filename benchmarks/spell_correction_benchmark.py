@@ -0,0 +1,62 @@
+"""
+Compare the SymSpell corrector against the TextBlob path on the same input.
+
+Run from the repository root:
+    python -m benchmarks.spell_correction_benchmark --rows 500
+"""
+import argparse
+import time
+
+import pandas as pd
+
+from standardizing_data import clean_text, process_text_textblob, stop_words, VECTORIZER
+from spell_correction import build_spell_corrector, DATASET_PATH
+
+
+def remove_stop_words(text):
+    return " ".join(word for word in text.split() if word.lower() not in stop_words)
+
+
+def run_benchmark(rows=500, seed=42):
+    texts = (
+        pd.read_csv(DATASET_PATH, usecols=["text"])["text"]
+        .dropna()
+        .sample(n=rows, random_state=seed)
+        .map(clean_text)
+    )
+    texts = [text for text in texts if text]
+
+    start = time.perf_counter()
+    corrector = build_spell_corrector(vectorizer=VECTORIZER, use_cache=False)
+    setup_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    textblob_output = [process_text_textblob(text) for text in texts]
+    textblob_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    symspell_output = [corrector.correct(remove_stop_words(text)) for text in texts]
+    symspell_time = time.perf_counter() - start
+
+    same_rows = sum(a == b for a, b in zip(textblob_output, symspell_output))
+    same_words = total_words = 0
+    for a, b in zip(textblob_output, symspell_output):
+        a_words, b_words = a.split(), b.split()
+        total_words += max(len(a_words), len(b_words))
+        same_words += sum(x == y for x, y in zip(a_words, b_words))
+
+    print(f"Rows: {len(texts)}")
+    print(f"SymSpell index load/build: {setup_time:.2f}s")
+    print(f"TextBlob:  {textblob_time:.2f}s ({len(texts) / textblob_time:.1f} rows/s)")
+    print(f"SymSpell:  {symspell_time:.2f}s ({len(texts) / symspell_time:.1f} rows/s)")
+    print(f"Speedup:   {textblob_time / symspell_time:.1f}x")
+    print(f"Row agreement:  {same_rows / len(texts):.1%}")
+    print(f"Word agreement: {same_words / max(total_words, 1):.1%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    run_benchmark(rows=args.rows, seed=args.seed)
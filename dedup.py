@@ -0,0 +1,184 @@
+"""
+Group identical and near-identical texts so expensive stages run once per group.
+
+Comment sections repeat themselves ("first", "nice video", copy-pasted spam).
+group_texts() maps every row to a representative text; a stage then runs on
+TextGroups.unique only and expand() broadcasts the results back to every row,
+so row counts, and the sentiment counts built from them, stay exact.
+
+Modes:
+    exact - rows with the same (cleaned) text share one representative
+    near  - additionally, texts whose character shingles have a MinHash
+            Jaccard estimate >= NEAR_DUP_THRESHOLD share the first one seen,
+            found with LSH banding instead of comparing every pair
+    None  - no grouping, every row is its own representative
+"""
+import zlib
+
+import numpy as np
+
+import metrics
+
+DEDUP_MODES = ["exact", "near"]
+DEDUP_MODE = "exact"
+
+# Near-duplicate settings: NUM_PERM hash functions split into LSH_BANDS bands
+NEAR_DUP_THRESHOLD = 0.8
+NUM_PERM = 64
+LSH_BANDS = 16
+SHINGLE_SIZE = 4
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+# Shingles hashed at once when building signatures, bounds the temporary matrix
+_SIGNATURE_CHUNK = 20000
+
+
+class TextGroups:
+    """
+    Rows mapped to representative texts.
+
+    Attributes:
+        unique (list): One representative text per group, in order of first appearance.
+        inverse (numpy.ndarray): Group index of every row.
+        counts (numpy.ndarray): Rows in every group.
+        mode (str): The grouping mode used.
+    """
+
+    def __init__(self, unique, inverse, mode=None):
+        self.unique = unique
+        self.inverse = np.asarray(inverse, dtype=np.int64)
+        self.counts = np.bincount(self.inverse, minlength=len(unique))
+        self.mode = mode
+
+    @property
+    def rows(self):
+        return len(self.inverse)
+
+    @property
+    def reduction_ratio(self):
+        """Share of rows that did not need processing of their own."""
+        return 1 - len(self.unique) / self.rows if self.rows else 0.0
+
+    def expand(self, values):
+        """Broadcast one value per group back to one value per row."""
+        if isinstance(values, np.ndarray):
+            return values[self.inverse]
+        return [values[i] for i in self.inverse]
+
+    def apply(self, func):
+        """func(list of unique texts) -> one result per text, expanded to every row."""
+        return self.expand(func(self.unique))
+
+
+def _exact_groups(texts):
+    index = {}
+    inverse = [index.setdefault(text, len(index)) for text in texts]
+    return list(index), inverse
+
+
+def shingles(text, size=SHINGLE_SIZE):
+    """Hashes of the overlapping character n-grams of text (whitespace collapsed)."""
+    text = " ".join(text.split())
+    if len(text) <= size:
+        return np.array([zlib.crc32(text.encode("utf-8"))], dtype=np.uint64)
+    return np.fromiter(
+        (zlib.crc32(text[i:i + size].encode("utf-8")) for i in range(len(text) - size + 1)),
+        dtype=np.uint64,
+    )
+
+
+def minhash_signatures(texts, num_perm=NUM_PERM, seed=1):
+    """
+    MinHash signature of every text, shape (len(texts), num_perm).
+
+    Universal hashes (a * x + b) mod p of the shingle hashes, minimised per
+    text with np.minimum.reduceat over chunks of texts.
+    """
+    generator = np.random.RandomState(seed)
+    a = generator.randint(1, 1 << 31, size=num_perm).astype(np.uint64)
+    b = generator.randint(0, 1 << 31, size=num_perm).astype(np.uint64)
+    signatures = np.empty((len(texts), num_perm), dtype=np.uint64)
+
+    start = 0
+    while start < len(texts):
+        parts, total, end = [], 0, start
+        while end < len(texts) and (total < _SIGNATURE_CHUNK or end == start):
+            parts.append(shingles(texts[end]))
+            total += len(parts[-1])
+            end += 1
+        values = np.concatenate(parts)
+        offsets = np.cumsum([0] + [len(part) for part in parts[:-1]])
+        # a < 2**31 and the hashes < 2**32, so the product fits in uint64
+        hashed = (values[:, None] * a + b) % _MERSENNE_PRIME & _MAX_HASH
+        signatures[start:end] = np.minimum.reduceat(hashed, offsets, axis=0)
+        start = end
+    return signatures
+
+
+def near_duplicate_labels(texts, threshold=NEAR_DUP_THRESHOLD, num_perm=NUM_PERM, bands=LSH_BANDS):
+    """
+    Group label of every text: the index of the first text it is a near duplicate of.
+
+    Texts sharing an LSH band become candidates; two candidates' groups are
+    merged when the estimated Jaccard similarity of the groups'
+    representatives is at least threshold, which keeps chains of slightly
+    different texts from drifting into one group.
+    """
+    labels = np.arange(len(texts))
+    if len(texts) < 2:
+        return labels
+    signatures = minhash_signatures(texts, num_perm)
+    rows = num_perm // bands
+
+    def find(i):
+        while labels[i] != i:
+            labels[i] = labels[labels[i]]
+            i = labels[i]
+        return i
+
+    for band in range(bands):
+        buckets = {}
+        for i, key in enumerate(map(bytes, signatures[:, band * rows:(band + 1) * rows])):
+            first = buckets.setdefault(key, i)
+            if first == i:
+                continue
+            root_first, root_i = find(first), find(i)
+            if root_first == root_i:
+                continue
+            if np.mean(signatures[root_first] == signatures[root_i]) >= threshold:
+                # The earlier text stays the representative
+                labels[max(root_first, root_i)] = min(root_first, root_i)
+    return np.array([find(i) for i in range(len(texts))])
+
+
+def group_texts(texts, mode=DEDUP_MODE, threshold=NEAR_DUP_THRESHOLD):
+    """
+    Group texts for deduplicated processing.
+
+    Args:
+        texts (iterable): Texts, usually already cleaned.
+        mode (str): 'exact', 'near' or None (see the module docstring).
+        threshold (float): Minimum estimated Jaccard similarity in 'near' mode.
+
+    Returns:
+        TextGroups
+    """
+    texts = list(texts)
+    if mode is None:
+        return TextGroups(texts, np.arange(len(texts)), mode)
+    if mode not in DEDUP_MODES:
+        raise ValueError(f"Unknown dedup mode '{mode}', expected one of {DEDUP_MODES} or None")
+
+    unique, inverse = _exact_groups(texts)
+    if mode == "near" and len(unique) > 1:
+        labels = near_duplicate_labels(unique, threshold)
+        representatives, group_of = np.unique(labels, return_inverse=True)
+        unique = [unique[i] for i in representatives]
+        inverse = group_of[np.asarray(inverse, dtype=np.int64)]
+    return TextGroups(unique, inverse, mode)
+
+
+def record_dedup(groups):
+    """Count rows and groups for the job's reduction ratio (see metrics.job_summary)."""
+    metrics.inc("dedup_rows_total", groups.rows, mode=groups.mode)
+    metrics.inc("dedup_unique_total", len(groups.unique), mode=groups.mode)
@@ -0,0 +1,255 @@
+"""
+Headless HTTP service scoring text with the sentiment model, without the
+Streamlit app or any scraping.
+
+Run from the repository root:
+    python inference_api.py --host 0.0.0.0 --port 8000
+
+Endpoints:
+    POST /predict  {"texts": ["...", ...], "normalize": false, "translate": false}
+                   (a bare JSON array of texts is accepted too)
+                   -> {"labels": ["Positive", ...], "sentiments": [2, ...]}
+    GET  /health   -> {"status": "ok", ...batcher statistics}
+    GET  /metrics  -> counters and latency histograms in Prometheus text format
+"""
+import json
+import time
+import queue
+import logging
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from standardizing_data import LABEL_MAP, clean_series, translate_texts, process_texts, predict_batch
+from resources import warm_up
+import metrics
+
+logger = logging.getLogger("app_logger")
+
+# Texts classified in one vectorized call at most
+MAX_BATCH_ROWS = 4096
+# How long the first request of a batch waits for others to join it
+MAX_BATCH_WAIT = 0.005
+# Largest number of texts accepted in a single request
+MAX_REQUEST_TEXTS = 10000
+MAX_BODY_BYTES = 16 * 1024 * 1024
+# Pending connections the listening socket holds (socketserver's default is 5)
+LISTEN_BACKLOG = 256
+
+
+class MicroBatcher:
+    """
+    Merges the texts of concurrent requests into single predict_batch calls.
+
+    Request threads call predict(texts) and block until their labels are
+    ready. One worker thread takes the oldest request, then keeps taking
+    queued ones for up to max_wait seconds or until max_rows texts are
+    collected, classifies them with one vectorized call and hands each
+    request its slice of the result.
+
+    Args:
+        max_rows (int): Most texts per model call.
+        max_wait (float): Seconds to wait for more requests to batch.
+    """
+
+    def __init__(self, max_rows=MAX_BATCH_ROWS, max_wait=MAX_BATCH_WAIT):
+        self.max_rows = max_rows
+        self.max_wait = max_wait
+        self.batches = 0
+        self.requests = 0
+        self.rows = 0
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._worker.start()
+
+    def predict(self, texts):
+        """Integer labels for texts, computed together with other pending requests."""
+        if not texts:
+            return []
+        pending = {"texts": texts, "done": threading.Event(), "result": None, "error": None}
+        self._queue.put(pending)
+        pending["done"].wait()
+        if pending["error"] is not None:
+            raise pending["error"]
+        return pending["result"]
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        rows = len(batch[0]["texts"])
+        # The first request waits max_wait at most, however many others trickle in
+        deadline = time.monotonic() + self.max_wait
+        while rows < self.max_rows:
+            try:
+                pending = self._queue.get(timeout=max(0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            batch.append(pending)
+            rows += len(pending["texts"])
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            texts = [text for pending in batch for text in pending["texts"]]
+            try:
+                with metrics.stage("api_predict", rows_in=len(texts)) as span:
+                    predictions = predict_batch(texts, chunk_size=max(len(texts), 1)).tolist()
+                    span.rows_out = len(predictions)
+                error = None
+            except Exception as e:
+                logger.error(f"Batched prediction of {len(texts)} texts failed: {e}")
+                predictions, error = None, e
+            start = 0
+            for pending in batch:
+                end = start + len(pending["texts"])
+                pending["result"] = predictions[start:end] if predictions is not None else None
+                pending["error"] = error
+                pending["done"].set()
+                start = end
+            self.batches += 1
+            self.requests += len(batch)
+            self.rows += len(texts)
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "requests": self.requests,
+            "rows": self.rows,
+            "mean_batch_rows": round(self.rows / self.batches, 1) if self.batches else 0,
+        }
+
+
+def non_string_error(texts):
+    """Error message naming the first item of texts that is not a string, or None."""
+    invalid = next((i for i, text in enumerate(texts) if not isinstance(text, str)), None)
+    if invalid is None:
+        return None
+    return f"texts[{invalid}] is {type(texts[invalid]).__name__}, expected a string"
+
+
+def prepare_texts(texts, normalize=False, translate=False):
+    """
+    Optionally run the app's preprocessing before prediction: cleaning and
+    spelling correction with normalize, plus language detection and
+    translation with translate. Texts cleaned down to nothing stay empty.
+
+    Raises:
+        TypeError: If an item is not a string (a request with one gets a 400).
+    """
+    texts = list(texts)
+    error = non_string_error(texts)
+    if error is not None:
+        raise TypeError(error)
+    if not normalize:
+        return texts
+    texts = clean_series(texts)
+    if translate:
+        texts = translate_texts(texts)
+    return process_texts(texts)
+
+
+class PredictionHandler(BaseHTTPRequestHandler):
+    batcher = None  # Set by create_server
+    protocol_version = "HTTP/1.1"
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, {"status": "ok", **self.batcher.stats()})
+        elif self.path == "/metrics":
+            body = metrics.render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        else:
+            self._send_json(404, {"error": "Not found"})
+
+    def do_POST(self):
+        if self.path != "/predict":
+            self._send_json(404, {"error": "Not found"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            self._send_json(400, {"error": "Invalid Content-Length"})
+            return
+        if length > MAX_BODY_BYTES:
+            self._send_json(413, {"error": "Request body too large"})
+            return
+        try:
+            payload = json.loads(self.rfile.read(length) or b"null")
+        except ValueError:
+            self._send_json(400, {"error": "Body must be JSON"})
+            return
+
+        options = payload if isinstance(payload, dict) else {}
+        texts = options.get("texts") if isinstance(payload, dict) else payload
+        if not isinstance(texts, list):
+            self._send_json(400, {"error": "Expected a JSON array of texts or {\"texts\": [...]}"})
+            return
+        if len(texts) > MAX_REQUEST_TEXTS:
+            self._send_json(413, {"error": f"At most {MAX_REQUEST_TEXTS} texts per request"})
+            return
+        error = non_string_error(texts)
+        if error is not None:
+            self._send_json(400, {"error": error})
+            return
+
+        try:
+            prepared = prepare_texts(texts, bool(options.get("normalize")), bool(options.get("translate")))
+            predictions = self.batcher.predict(prepared)
+        except Exception as e:
+            logger.error(f"Prediction request failed: {e}")
+            self._send_json(500, {"error": "Prediction failed"})
+            return
+        self._send_json(200, {
+            "labels": [LABEL_MAP.get(prediction) for prediction in predictions],
+            "sentiments": predictions,
+        })
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} - {format % args}")
+
+
+class PredictionServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = LISTEN_BACKLOG
+
+
+def create_server(host="127.0.0.1", port=8000, batcher=None):
+    """Build the HTTP server; every connection is handled in its own thread."""
+    handler = type("BoundPredictionHandler", (PredictionHandler,), {"batcher": batcher or MicroBatcher()})
+    return PredictionServer((host, port), handler)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--max-batch-rows", type=int, default=MAX_BATCH_ROWS)
+    parser.add_argument("--max-batch-wait", type=float, default=MAX_BATCH_WAIT, help="Seconds")
+    parser.add_argument("--no-warm-up", action="store_true", help="Load the model on the first request instead")
+    args = parser.parse_args()
+    if not args.no_warm_up:
+        timings = warm_up(spell_corrector=True)
+        logger.info(f"Warm-up took {sum(timings.values()):.2f}s: {timings}")
+    server = create_server(args.host, args.port, MicroBatcher(args.max_batch_rows, args.max_batch_wait))
+    logger.info(f"Inference API listening on http://{args.host}:{args.port}")
+    print(f"Inference API listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,138 @@
+import logging
+from collections import Counter
+from functools import lru_cache
+
+import pandas as pd
+from langdetect import DetectorFactory, detect
+
+from logging_config import log_sampled
+
+logger = logging.getLogger("app_logger")
+
+# langdetect is random by default; a fixed seed makes repeated runs agree
+DetectorFactory.seed = 0
+
+DETECT_CACHE_SIZE = 100000
+ENGLISH_WORD_RATIO = 0.6
+
+# Checked in order; the first script found in a text wins
+SCRIPT_PATTERNS = {
+    "devanagari": "[\u0900-\u097F]",
+    "bengali": "[\u0980-\u09FF]",
+    "gurmukhi": "[\u0A00-\u0A7F]",
+    "gujarati": "[\u0A80-\u0AFF]",
+    "tamil": "[\u0B80-\u0BFF]",
+    "telugu": "[\u0C00-\u0C7F]",
+    "kannada": "[\u0C80-\u0CFF]",
+    "malayalam": "[\u0D00-\u0D7F]",
+    "arabic": "[\u0600-\u06FF]",
+    "cyrillic": "[\u0400-\u04FF]",
+    "cjk": "[\u3040-\u30FF\u4E00-\u9FFF\uAC00-\uD7AF]",
+}
+
+# Scripts used by a single language we care about; the rest need the detector
+SCRIPT_LANGUAGES = {
+    "bengali": "bn",
+    "gurmukhi": "pa",
+    "gujarati": "gu",
+    "tamil": "ta",
+    "telugu": "te",
+    "kannada": "kn",
+    "malayalam": "ml",
+}
+
+
+def classify_scripts(texts):
+    """
+    Label every text with its writing script in one vectorized pass per script.
+
+    Returns a Series of 'ascii', 'latin' (non-ASCII without another known
+    script) or one of the SCRIPT_PATTERNS keys.
+    """
+    texts = pd.Series(texts, dtype="object").fillna("").astype(str)
+    scripts = pd.Series("latin", index=texts.index, dtype="object")
+    scripts[texts.str.fullmatch(r"[\x00-\x7F]*")] = "ascii"
+    pending = scripts == "latin"
+    for script, pattern in SCRIPT_PATTERNS.items():
+        if not pending.any():
+            break
+        found = texts[pending].str.contains(pattern, regex=True)
+        found = found[found].index
+        scripts[found] = script
+        pending[found] = False
+    return scripts
+
+
+def english_word_ratio(text, english_words):
+    words = text.lower().split()
+    if not words:
+        return 0.0
+    return sum(word in english_words for word in words) / len(words)
+
+
+@lru_cache(maxsize=DETECT_CACHE_SIZE)
+def detect_language(text):
+    """Seeded, memoized langdetect call. Returns None if detection fails."""
+    try:
+        return detect(text)
+    except Exception as e:
+        # Emoji-only or numeric rows fail here one by one, so the line is sampled
+        log_sampled(logger, "language_detection_error", f"Error during language detection: {e}", logging.ERROR)
+        return None
+
+
+def detect_languages(texts, english_words=None, ascii_is_english=True, word_ratio=ENGLISH_WORD_RATIO):
+    """
+    Detect the language of every text, calling langdetect only when needed.
+
+    Rows take one of these paths:
+        ascii    - plain ASCII text, treated as English
+        english  - Latin text whose words are mostly known English words
+        script   - written in a script that maps to a single language
+        cached   - ambiguous, answered by the detector memo
+        detector - ambiguous, sent to langdetect
+
+    Args:
+        texts (iterable): Texts to classify.
+        english_words (set): Known English words used for the confidence check.
+        ascii_is_english (bool): Pass plain ASCII rows straight through as English.
+            When False they get the word-ratio check like other Latin text.
+        word_ratio (float): Share of known words needed to call a text English.
+
+    Returns:
+        tuple: (pandas.Series of language codes or None, Counter of rows per path)
+    """
+    texts = pd.Series(texts, dtype="object").fillna("").astype(str)
+    english_words = english_words or set()
+    scripts = classify_scripts(texts)
+    languages = pd.Series(None, index=texts.index, dtype="object")
+    paths = Counter()
+
+    if ascii_is_english:
+        fast = scripts == "ascii"
+        languages[fast] = "en"
+        paths["ascii"] = int(fast.sum())
+
+    for script, lang in SCRIPT_LANGUAGES.items():
+        mapped = scripts == script
+        languages[mapped] = lang
+        paths["script"] += int(mapped.sum())
+
+    latin = languages.isna() & scripts.isin(["ascii", "latin"])
+    if english_words and latin.any():
+        confident = texts[latin].map(lambda text: english_word_ratio(text, english_words) >= word_ratio)
+        confident = confident[confident].index
+        languages[confident] = "en"
+        paths["english"] = len(confident)
+
+    ambiguous = languages.isna()
+    before = detect_language.cache_info()
+    languages[ambiguous] = texts[ambiguous].map(detect_language)
+    after = detect_language.cache_info()
+    paths["cached"] = after.hits - before.hits
+    paths["detector"] = after.misses - before.misses
+
+    logger.info(
+        "Language detection paths: " + ", ".join(f"{path}={count}" for path, count in paths.items())
+    )
+    return languages, paths
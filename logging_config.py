@@ -0,0 +1,138 @@
+"""
+The one place the "app_logger" logger is configured.
+
+Modules only call logging.getLogger("app_logger"); setup_logging() attaches a
+single QueueHandler to it, and a QueueListener thread writes the queued
+records to the rotating log file, so a log call never waits on disk I/O.
+Calling setup_logging() again is a no-op, however many modules import it.
+
+Events that happen once per row (detected language, single predictions,
+detection failures) go through log_sampled(), which writes the first
+occurrence and then every Nth with a running count instead of every row.
+"""
+import os
+import queue
+import atexit
+import logging
+import threading
+from collections import Counter
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+LOGGER_NAME = "app_logger"
+LOG_DIR = "./logs"
+LOG_FILE = os.path.join(LOG_DIR, "app_log.log")
+MAX_BYTES = 5 * 1024 * 1024
+BACKUP_COUNT = 3
+LOG_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+# Per-row events are logged once, then every LOG_SAMPLE_EVERY occurrences
+LOG_SAMPLE_EVERY = 1000
+
+_listener = None
+_queue_handler = None
+_forked = False
+_setup_lock = threading.Lock()
+_sample_every = LOG_SAMPLE_EVERY
+_sample_counts = Counter()
+_sample_lock = threading.Lock()
+
+
+def setup_logging(level=logging.INFO, log_file=LOG_FILE, sample_every=None):
+    """
+    Attach the queue handler and start the background file writer, once per process.
+
+    Args:
+        level (int): Level of the app logger.
+        log_file (str): Rotating log file written by the listener thread.
+        sample_every (int): Overrides LOG_SAMPLE_EVERY for log_sampled (1 logs every event).
+
+    Returns:
+        logging.Logger: The app logger.
+    """
+    global _listener, _queue_handler, _sample_every
+    logger = logging.getLogger(LOGGER_NAME)
+    with _setup_lock:
+        if sample_every is not None:
+            _sample_every = max(1, sample_every)
+        if _listener is not None or _forked:
+            return logger
+
+        os.makedirs(os.path.dirname(log_file) or ".", exist_ok=True)
+        # delay: the file is opened by the first record, not at import time
+        file_handler = RotatingFileHandler(log_file, maxBytes=MAX_BYTES, backupCount=BACKUP_COUNT, delay=True)
+        file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+        log_queue = queue.SimpleQueue()
+        _queue_handler = QueueHandler(log_queue)
+        logger.addHandler(_queue_handler)
+        logger.setLevel(level)
+        _listener = QueueListener(log_queue, file_handler, respect_handler_level=True)
+        _listener.start()
+        # Flush what is still queued when the process exits
+        atexit.register(stop_logging)
+    return logger
+
+
+def _log_directly_in_child():
+    """
+    Forked workers (the process pools of normalize_dataframe) do not inherit
+    the listener thread, so they write straight to the file handler instead.
+    """
+    global _listener, _queue_handler, _forked, _setup_lock
+    _setup_lock = threading.Lock()  # May have been held by another thread at fork time
+    if _listener is None:
+        return
+    logger = logging.getLogger(LOGGER_NAME)
+    logger.removeHandler(_queue_handler)
+    for handler in _listener.handlers:
+        logger.addHandler(handler)
+    _listener = None
+    _queue_handler = None
+    _forked = True
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_log_directly_in_child)
+
+
+def stop_logging():
+    """
+    Stop the listener after it has written every queued record, and detach
+    the queue handler so nothing is queued with no thread left to read it.
+    """
+    global _listener, _queue_handler
+    with _setup_lock:
+        if _listener is not None:
+            logging.getLogger(LOGGER_NAME).removeHandler(_queue_handler)
+            _listener.stop()
+            for handler in _listener.handlers:
+                handler.close()
+            _listener = None
+            _queue_handler = None
+
+
+def log_sampled(logger, key, message, level=logging.INFO, every=None):
+    """
+    Log a per-row event only on its 1st, (every)th, (2 * every)th... occurrence.
+
+    Args:
+        logger (logging.Logger): Where the sampled line goes.
+        key (str): Events sharing a key are counted together, e.g. "detected:hi".
+        message (str): The line to log; the running count is appended.
+        every (int): Sampling interval, defaults to the configured one.
+
+    Returns:
+        int: How many times the key has occurred so far.
+    """
+    with _sample_lock:
+        _sample_counts[key] += 1
+        count = _sample_counts[key]
+    every = every or _sample_every
+    if (count == 1 or count % every == 0) and logger.isEnabledFor(level):
+        logger.log(level, f"{message} ({count} so far)" if count > 1 else message)
+    return count
+
+
+def sampled_counts():
+    """Occurrences of every sampled event key since the process started."""
+    with _sample_lock:
+        return dict(_sample_counts)
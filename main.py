@@ -1,44 +1,32 @@
 import os
 import shutil
 import re
-import pandas as pd
 import logging
-from utils.utils import read_url, video_details
-from webscrapping.youtube_scrapping import youtube_scarpping
-from webscrapping.amazon_scrapping import amazon_scrapping
-from standardizing_data import normalize_comments, normalize_reviews
-from logging.handlers import RotatingFileHandler
+from utils.utils import read_url, video_details, product_details
+from webscrapping.youtube_scrapping import youtube_scarpping, iter_comments
+from webscrapping.amazon_scrapping import amazon_scrapping, stream_reviews
+from standardizing_data import normalize_comments, normalize_reviews, LABEL_MAP
+from pipeline import run_pipeline, SentimentTally
+from result_store import get_result_store, with_item_keys, item_key, StoreSink
+from resources import get_api_key
+from dedup import DEDUP_MODE
+from sampling import sample_sentiment
+from tables import TableWriter, TABLE_FORMATS, REVIEW_COLUMNS, COMMENT_COLUMNS, table_file, read_table
+from logging_config import setup_logging
 import warnings
 warnings.filterwarnings("ignore")
 
-# Create logs directory if it doesn't exist
-log_dir = "./logs"
-os.makedirs(log_dir, exist_ok=True)
+# One shared queue handler and log file for every module (see logging_config.py)
+logger = setup_logging()
 
-# Define the log file path
-log_file = os.path.join(log_dir, "app_log.log")
 
-# Create a rotating file handler (log rotation after 5MB)
-handler = RotatingFileHandler(
-    log_file, maxBytes=5 * 1024 * 1024, backupCount=3
-)
-
-# Set log format (including timestamp, log level, and message)
-formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
-handler.setFormatter(formatter)
-
-# Set up logging with the handler
-logger = logging.getLogger("app_logger")
-logger.setLevel(logging.INFO)  # Log level can be adjusted (e.g., DEBUG, INFO)
-logger.addHandler(handler)
-
-
-def match_url(url):
+def match_url(url, job=None):
     """
     Matches a given URL to determine if it's a YouTube or Amazon URL.
     
     Args:
         url (str): The URL to validate.
+        job (JobContext): Optional job the URL belongs to, used in log lines.
 
     Returns:
         str: The type of URL ('YouTube', 'Amazon', or 'Invalid').
@@ -46,7 +34,7 @@ def match_url(url):
     youtube_pattern = r"^(https?://)?(www\.)?(youtube\.com|youtu\.be)(/.*)?$"
     amazon_pattern = r"^(https?://)?(www\.)?amazon\.(com|in|co\.[a-z]{2})(/.*)?$"
 
-    logger.info(f"Matching URL: {url}")
+    logger.info(f"Matching URL: {url}" + (f" (job {job.job_id})" if job is not None else ""))
     if re.match(youtube_pattern, url, re.IGNORECASE):
         logger.info("URL matched: YouTube")
         return "YouTube"
@@ -60,42 +48,245 @@ def match_url(url):
 
 
 
-def amazon_main():
-    url = read_url("./textfiles/url.txt")  # Read the URL from the file
-    url_type = match_url(url)  # Determine URL type
+def analyze_stream(source, item_id, fetch, text_field, output_file=None, columns=None, on_update=None, refresh=False,
+                   progress=None, cancel=None, dedup=DEDUP_MODE):
+    """
+    Serve stored results for item_id or run the streaming pipeline on new items.
+
+    Results of a complete crawl younger than the store's TTL are returned
+    without any network call unless refresh is True. Otherwise
+    fetch(store, on_error) must yield the items newer than what the store
+    already holds, or every item when store is None, and call on_error(exception)
+    for anything it had to skip; they are analyzed, merged into the stored
+    aggregates and the combined counts are returned. When output_file is
+    given the columns of the processed rows are also written to that table
+    (see tables.TableWriter).
+
+    Stopping at the newest stored item is only safe when the crawl before
+    read everything, so after a cancelled, failed or incomplete crawl the
+    store is not passed to fetch and every item is read again; items
+    already stored are still skipped, so nothing is counted twice.
+
+    progress, cancel and dedup are passed to run_pipeline. A cancelled run keeps
+    the items it already merged but is not marked as refreshed.
+    """
+    store = get_result_store()
+    if not refresh and store.is_fresh(source, item_id):
+        logger.info(f"Serving stored results for {source} {item_id}")
+        return store.counts_frame(source, item_id)
+
+    known = store.known_keys(source, item_id)
+    incremental = store.crawl_state(source, item_id)["complete"]
+    if known and not incremental:
+        logger.info(f"Last crawl of {source} {item_id} did not complete, reading every item again")
+    store.start_crawl(source, item_id)
+    skipped = []
+    items = fetch(store if incremental else None, skipped.append)
+    records = (record for record in with_item_keys(source, items) if record["item_key"] not in known)
+    sinks = [StoreSink(store, source, item_id)]
+    if output_file:
+        sinks.append(TableWriter(output_file, columns))
+    run_pipeline(
+        records,
+        text_field=text_field,
+        sink=sinks,
+        on_update=on_update,
+        tally=SentimentTally(store.counts(source, item_id)),
+        progress=progress,
+        cancel=cancel,
+        dedup=dedup,
+    )
+    if skipped:
+        logger.warning(f"Crawl of {source} {item_id} skipped {len(skipped)} pages, its counts are partial")
+    store.mark_refreshed(source, item_id, complete=not skipped)
+    return store.counts_frame(source, item_id)
+
+
+def analyze_sample(source, item_id, fetch, text_field, margin, population=None, output_file=None, columns=None,
+                   on_update=None, progress=None, cancel=None, dedup=DEDUP_MODE):
+    """
+    Estimate the sentiment split of item_id from a random sample of its items.
+
+    Fresh stored results are exact and are returned as they are. Otherwise
+    fetch(None) must yield all items; they are analyzed in randomized order
+    until every share is known to within margin (see sampling.py). The
+    scrapers yield newest first, so an early stop only covers the most
+    recent items and the frame is labelled SAMPLE_RECENT. Sampled counts are
+    not written to the result store since they cover only part of the item.
+
+    Returns:
+        pandas.DataFrame: Counts with Share, Low and High columns; attrs["sample"]
+        tells what they cover.
+    """
+    store = get_result_store()
+    if store.is_fresh(source, item_id):
+        logger.info(f"Serving stored results for {source} {item_id}")
+        return store.counts_frame(source, item_id)
+    tally = sample_sentiment(
+        fetch(None),
+        text_field,
+        margin=margin,
+        population=population,
+        labels=list(LABEL_MAP.values()),
+        sink=TableWriter(output_file, columns) if output_file else None,
+        on_update=on_update,
+        progress=progress,
+        cancel=cancel,
+        dedup=dedup,
+    )
+    return tally.to_frame()
+
+
+def output_path(job, filename):
+    """Where an output table goes: inside the job's workspace, or the current directory."""
+    return job.path(filename) if job is not None else filename
+
+
+def amazon_main(job=None, streaming=True, on_update=None, save_csv=False, refresh=False, progress=None, cancel=None,
+                dedup=DEDUP_MODE, sample_margin=None, population=None, session=None):
+    """
+    Scrape and analyze the Amazon URL of job, or the one in ./textfiles/url.txt.
+
+    With streaming=True reviews flow from the crawler straight through the
+    in-memory pipeline; on_update receives the running SentimentTally and
+    save_csv keeps a copy of the processed rows in reviews.parquet (or
+    reviews.csv when pyarrow is missing, see tables.py). Results are
+    kept in the result store, so a repeat URL is served from it and a stale
+    one only crawls reviews newer than the stored ones.
+
+    With a JobContext every file (scraped pages, CSVs, images) is kept in the
+    job's workspace, so several analyses can run at once. In streaming mode
+    progress (a PipelineProgress) counts pages fetched and rows per stage,
+    and setting the cancel event stops the crawl and the pipeline.
+
+    dedup ('exact', 'near' or None) sets how duplicate reviews are grouped
+    so each distinct text is translated, corrected and predicted only once.
+
+    With sample_margin (e.g. 0.02) reviews are analyzed in random order and
+    the run stops once every sentiment share is within that margin at 95%
+    confidence (see analyze_sample); population is the total number of
+    reviews when known. session is a shared RateLimitedSession for the
+    crawl (see webscrapping.amazon_scrapping.create_session), e.g. one per
+    batch of URLs so they share a per-host rate limit.
+    """
+    url = job.url if job is not None else read_url("./textfiles/url.txt")  # Read the URL from the file
+    url_type = match_url(url, job)  # Determine URL type
     # Folder path based on URL type
     folder_name = None
     if url_type == "Amazon":
-        PRODUCT_ID, FILENAME, FOLDER = amazon_scrapping(url)
-        with open("./textfiles/id.txt" , "w") as f:
-            f.write(PRODUCT_ID)
-        df = pd.read_csv(FILENAME)
+        if streaming:
+            PRODUCT_ID, _ = product_details(url)
+            if job is not None:
+                job.item_id = PRODUCT_ID
+            else:
+                with open("./textfiles/id.txt" , "w") as f:
+                    f.write(PRODUCT_ID)
+
+            def fetch(store, on_error=None):
+                known = store.known_keys("Amazon", PRODUCT_ID) if store is not None else set()
+                is_known = lambda star_type, review: item_key("Amazon", {"category": star_type, "review": review}) in known
+                on_page = (lambda: progress.add("pages")) if progress is not None else None
+                return stream_reviews(url, is_known=is_known if known else None, on_page=on_page, session=session,
+                                      on_error=on_error)
+
+            if sample_margin:
+                sentiment_count = analyze_sample(
+                    "Amazon", PRODUCT_ID, fetch, "review", sample_margin, population=population,
+                    output_file=output_path(job, table_file("reviews")) if save_csv else None,
+                    columns=["category", "review", "Sentiment", "Sentiment_Label"],
+                    on_update=on_update, progress=progress, cancel=cancel, dedup=dedup,
+                )
+                return "Amazon", sentiment_count
+            sentiment_count = analyze_stream(
+                "Amazon", PRODUCT_ID, fetch, "review",
+                output_file=output_path(job, table_file("reviews")) if save_csv else None,
+                columns=["category", "review", "Sentiment", "Sentiment_Label"],
+                on_update=on_update, refresh=refresh, progress=progress, cancel=cancel, dedup=dedup,
+            )
+            return "Amazon", sentiment_count
+        PRODUCT_ID, FILENAME, FOLDER = amazon_scrapping(url, job=job)
+        df = read_table(FILENAME, columns=REVIEW_COLUMNS)
         df.drop_duplicates(inplace=True)
         df.dropna(inplace=True)
         logging.info(df.head())
-        sentiment_count = normalize_reviews(df)
+        if sample_margin:
+            sentiment_count = sample_sentiment(
+                df.to_dict("records"), "review", margin=sample_margin, labels=list(LABEL_MAP.values()),
+                on_update=on_update, progress=progress, cancel=cancel, dedup=dedup,
+            ).to_frame()
+        else:
+            sentiment_count = normalize_reviews(df, output_file=output_path(job, table_file("reviews")), dedup=dedup)
         result = "Amazon", sentiment_count
         return result
     else:
         raise ValueError("Inavlid Url . Please enter a Valid Amazon url")
 
-def yotutbe_main():
-    url = read_url("./textfiles/url.txt")  # Read the URL from the file
-    url_type = match_url(url)
+def yotutbe_main(job=None, streaming=True, on_update=None, save_csv=False, refresh=False, progress=None, cancel=None,
+                 dedup=DEDUP_MODE, sample_margin=None, population=None):
+    """
+    Scrape and analyze the YouTube URL of job, or the one in ./textfiles/url.txt.
+
+    Takes the same job, streaming, dedup and sampling options as amazon_main;
+    population can be the video's comment count.
+    """
+    url = job.url if job is not None else read_url("./textfiles/url.txt")  # Read the URL from the file
+    url_type = match_url(url, job)
     if url_type == "YouTube":
-        VIDEOID,FILENAME, FOLDER = youtube_scarpping(url)
-        df = pd.read_csv(FILENAME)
+        if streaming:
+            VIDEOID = video_details(url)
+            if job is not None:
+                job.item_id = VIDEOID
+            else:
+                with open("./textfiles/id.txt" , "w") as f:
+                    f.write(VIDEOID)
+
+            def fetch(store, on_error=None):
+                on_page = (lambda: progress.add("pages")) if progress is not None else None
+                newer_than = store.last_seen("YouTube", VIDEOID) if store is not None else None
+                return iter_comments(VIDEOID, get_api_key(), newer_than=newer_than, on_page=on_page)
+
+            if sample_margin:
+                sentiment_count = analyze_sample(
+                    "YouTube", VIDEOID, fetch, "text", sample_margin, population=population,
+                    output_file=output_path(job, table_file("comments")) if save_csv else None,
+                    columns=["published_at", "text", "Sentiment", "Sentiment_Label"],
+                    on_update=on_update, progress=progress, cancel=cancel, dedup=dedup,
+                )
+                return "YouTube", sentiment_count
+            sentiment_count = analyze_stream(
+                "YouTube", VIDEOID, fetch, "text",
+                output_file=output_path(job, table_file("comments")) if save_csv else None,
+                columns=["published_at", "text", "Sentiment", "Sentiment_Label"],
+                on_update=on_update, refresh=refresh, progress=progress, cancel=cancel, dedup=dedup,
+            )
+            return "YouTube", sentiment_count
+        VIDEOID,FILENAME, FOLDER = youtube_scarpping(url, job=job)
+        df = read_table(FILENAME, columns=COMMENT_COLUMNS)
         df.drop_duplicates(inplace=True)
         df.dropna(inplace=True)
         logging.info(df.head())
-        sentiment_count = normalize_comments(df)
+        if sample_margin:
+            sentiment_count = sample_sentiment(
+                df.to_dict("records"), "text", margin=sample_margin, labels=list(LABEL_MAP.values()),
+                on_update=on_update, progress=progress, cancel=cancel, dedup=dedup,
+            ).to_frame()
+        else:
+            sentiment_count = normalize_comments(df, output_file=output_path(job, table_file("comments")), dedup=dedup)
         result = "YouTube", sentiment_count
     else:
         raise ValueError("Invalid URL. Please provide a valid YouTube URL.")
     
     return result
 
-def remove_files():
+def remove_files(job=None):
+    """
+    Delete the temporary files of an analysis: the job's workspace when a
+    JobContext is given, otherwise the shared ./textfiles, ./webscrapping and
+    ./images files.
+    """
+    if job is not None:
+        job.cleanup()
+        return
     with open("./textfiles/id.txt", "r") as file:
         fid = file.read().strip()
     FOLDER = f"./webscrapping/{fid}"
@@ -126,7 +317,7 @@ def remove_files():
                 logging.info("image file removed")
             except Exception as e:
                 logging.error(f"Error deleting file {file_img}")
-    files_to_delete = ["reviews.csv", "comments.csv"]
+    files_to_delete = [table_file(name, fmt) for name in ("reviews", "comments") for fmt in TABLE_FORMATS]
     for file in files_to_delete:
         if os.path.exists(file):
             try:
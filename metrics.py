@@ -0,0 +1,318 @@
+"""
+In-process counters, latency histograms and per-job traces.
+
+Every sample is tagged with the job ID of the analysis it belongs to (set
+with job_scope and carried into worker threads with bind), so a slow run
+can be broken down into fetches, API calls, translation and correction.
+The metrics are exposed in Prometheus text format by render_prometheus,
+start_metrics_server and inference_api's /metrics, and job_summary gives
+the per-job trace the UI shows.
+"""
+import time
+import logging
+import threading
+import contextvars
+from bisect import bisect_left
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger("app_logger")
+
+PREFIX = "sentiment_"
+METRICS_PORT = 9108
+# Upper bounds in seconds, from a cached lookup to a slow crawl
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+HELP = {
+    "stage_seconds": "Time spent in a processing stage.",
+    "stage_rows_in_total": "Rows that entered a processing stage.",
+    "stage_rows_out_total": "Rows that left a processing stage.",
+    "http_requests_total": "HTTP or API requests by target and status.",
+    "http_retries_total": "Requests retried after a throttled or failed attempt.",
+    "http_response_bytes_total": "Bytes of response bodies received.",
+    "http_request_seconds": "Latency of HTTP or API requests.",
+    "cache_hits_total": "Lookups served from a cache.",
+    "cache_misses_total": "Lookups not found in a cache.",
+    "language_detection_total": "Language detections by the path that decided them.",
+    "dedup_rows_total": "Rows that went through deduplication.",
+    "dedup_unique_total": "Distinct (or near-distinct) texts left after deduplication.",
+}
+
+_current_job = contextvars.ContextVar("job_id", default=None)
+
+
+@contextmanager
+def job_scope(job_id):
+    """Tag every metric recorded inside the block (and in threads bound there) with job_id."""
+    token = _current_job.set(job_id)
+    try:
+        yield
+    finally:
+        _current_job.reset(token)
+
+
+def current_job_id():
+    return _current_job.get()
+
+
+def bind(func):
+    """
+    Wrap func so it runs with the caller's job ID when called from another thread.
+
+    Threads and executor workers do not inherit context variables, so
+    targets handed to them are wrapped with this.
+    """
+    context = contextvars.copy_context()
+
+    def bound(*args, **kwargs):
+        return context.copy().run(func, *args, **kwargs)
+
+    return bound
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """
+    Thread-safe store of counters and histograms keyed by name and labels.
+    """
+
+    def __init__(self):
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(name, labels):
+        job_id = current_job_id()
+        if job_id is not None and "job_id" not in labels:
+            labels = {**labels, "job_id": job_id}
+        return name, tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+    def inc(self, name, value=1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            if key not in self._histograms:
+                self._histograms[key] = Histogram()
+            self._histograms[key].observe(value)
+
+    def render_prometheus(self):
+        """All metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(
+                (key, (list(h.buckets), list(h.counts), h.sum, h.count)) for key, h in self._histograms.items()
+            )
+        emitted = set()
+
+        def header(name, kind):
+            if name not in emitted:
+                emitted.add(name)
+                lines.append(f"# HELP {PREFIX}{name} {HELP.get(name, name)}")
+                lines.append(f"# TYPE {PREFIX}{name} {kind}")
+
+        for (name, labels), value in counters:
+            header(name, "counter")
+            lines.append(f"{PREFIX}{name}{_format_labels(labels)} {value}")
+        for (name, labels), (buckets, counts, total, count) in histograms:
+            header(name, "histogram")
+            cumulative = 0
+            for bound, bucket_count in zip(list(buckets) + ["+Inf"], counts):
+                cumulative += bucket_count
+                lines.append(f"{PREFIX}{name}_bucket{_format_labels(labels + (('le', str(bound)),))} {cumulative}")
+            lines.append(f"{PREFIX}{name}_sum{_format_labels(labels)} {total}")
+            lines.append(f"{PREFIX}{name}_count{_format_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def job_summary(self, job_id):
+        """
+        Trace summary of one job: per stage the calls, seconds and rows in/out,
+        per request target the requests, retries, bytes and seconds, the
+        cache hit counts and the deduplication reduction ratio.
+        """
+        stages, requests, caches, languages = {}, {}, {}, {}
+        dedup = {"rows": 0, "unique": 0}
+        with self._lock:
+            counters = [(name, dict(labels), value) for (name, labels), value in self._counters.items()
+                        if dict(labels).get("job_id") == job_id]
+            histograms = [(name, dict(labels), h.sum, h.count) for (name, labels), h in self._histograms.items()
+                          if dict(labels).get("job_id") == job_id]
+
+        for name, labels, total, count in histograms:
+            if name == "stage_seconds":
+                stage = stages.setdefault(labels["stage"], {})
+                stage["calls"] = stage.get("calls", 0) + count
+                stage["seconds"] = round(stage.get("seconds", 0) + total, 3)
+            elif name == "http_request_seconds":
+                target = requests.setdefault(labels["target"], {})
+                target["seconds"] = round(target.get("seconds", 0) + total, 3)
+        for name, labels, value in counters:
+            if name in ("stage_rows_in_total", "stage_rows_out_total"):
+                field = "rows_in" if name == "stage_rows_in_total" else "rows_out"
+                stage = stages.setdefault(labels["stage"], {})
+                stage[field] = stage.get(field, 0) + value
+            elif name in ("http_requests_total", "http_retries_total", "http_response_bytes_total"):
+                field = {"http_requests_total": "requests", "http_retries_total": "retries",
+                         "http_response_bytes_total": "bytes"}[name]
+                target = requests.setdefault(labels["target"], {})
+                target[field] = target.get(field, 0) + value
+                if name == "http_requests_total" and not labels.get("status", "").startswith("2"):
+                    target["errors"] = target.get("errors", 0) + value
+            elif name in ("cache_hits_total", "cache_misses_total"):
+                field = "hits" if name == "cache_hits_total" else "misses"
+                cache = caches.setdefault(labels["cache"], {})
+                cache[field] = cache.get(field, 0) + value
+            elif name == "language_detection_total":
+                languages[labels["path"]] = languages.get(labels["path"], 0) + value
+            elif name in ("dedup_rows_total", "dedup_unique_total"):
+                dedup["rows" if name == "dedup_rows_total" else "unique"] += value
+        if dedup["rows"]:
+            dedup["reduction_ratio"] = round(1 - dedup["unique"] / dedup["rows"], 4)
+        return {"job_id": job_id, "stages": stages, "requests": requests, "caches": caches,
+                "language_detection": languages, "dedup": dedup}
+
+    def export(self):
+        """Raw counters and histograms, e.g. to send from a worker process to merge() in the parent."""
+        with self._lock:
+            return {
+                "counters": dict(self._counters),
+                "histograms": {key: (h.buckets, list(h.counts), h.sum, h.count) for key, h in self._histograms.items()},
+            }
+
+    def merge(self, exported):
+        """Add the samples of another registry's export() to this one."""
+        with self._lock:
+            for key, value in exported["counters"].items():
+                self._counters[key] = self._counters.get(key, 0) + value
+            for key, (buckets, counts, total, count) in exported["histograms"].items():
+                if key not in self._histograms:
+                    self._histograms[key] = Histogram(buckets)
+                histogram = self._histograms[key]
+                histogram.counts = [a + b for a, b in zip(histogram.counts, counts)]
+                histogram.sum += total
+                histogram.count += count
+
+    def forget_job(self, job_id):
+        """Drop every sample tagged with job_id, e.g. when the job is discarded."""
+        with self._lock:
+            for store in (self._counters, self._histograms):
+                for key in [key for key in store if ("job_id", job_id) in key[1]]:
+                    del store[key]
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+registry = MetricsRegistry()
+inc = registry.inc
+observe = registry.observe
+render_prometheus = registry.render_prometheus
+job_summary = registry.job_summary
+
+
+class StageSpan:
+    """Handed out by stage(); set rows_out before the block ends."""
+
+    def __init__(self):
+        self.rows_out = None
+
+
+@contextmanager
+def stage(name, rows_in=None):
+    """
+    Time a processing stage and count its rows.
+
+    Usage:
+        with metrics.stage("translate", rows_in=len(texts)) as span:
+            ...
+            span.rows_out = len(results)
+    """
+    span = StageSpan()
+    started = time.perf_counter()
+    try:
+        yield span
+    finally:
+        observe("stage_seconds", time.perf_counter() - started, stage=name)
+        if rows_in is not None:
+            inc("stage_rows_in_total", rows_in, stage=name)
+        if span.rows_out is not None:
+            inc("stage_rows_out_total", span.rows_out, stage=name)
+
+
+def traced(name):
+    """Decorator timing every call of a function as stage name."""
+    def decorator(func):
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return func(*args, **kwargs)
+        wrapper.__name__ = func.__name__
+        wrapper.__doc__ = func.__doc__
+        wrapper.__wrapped__ = func
+        return wrapper
+    return decorator
+
+
+def record_request(target, status, seconds, size=None):
+    """Count one HTTP/API request to target ('amazon', 'youtube_api', ...) and its latency."""
+    inc("http_requests_total", target=target, status=status)
+    observe("http_request_seconds", seconds, target=target)
+    if size:
+        inc("http_response_bytes_total", size, target=target)
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path != "/metrics":
+            self.send_error(404)
+            return
+        body = render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(f"metrics {self.address_string()} - {format % args}")
+
+
+def start_metrics_server(host="127.0.0.1", port=METRICS_PORT):
+    """Serve /metrics from a daemon thread; returns the server, or None if the port is taken."""
+    try:
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+    except OSError as e:
+        logger.warning(f"Metrics endpoint not started on {host}:{port}: {e}")
+        return None
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    logger.info(f"Metrics available at http://{host}:{port}/metrics")
+    return server
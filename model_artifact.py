@@ -0,0 +1,233 @@
+"""
+Array-backed export of the sentiment model for fast, shared loading.
+
+The pickled CountVectorizer rebuilds its vocabulary dict on every load and
+each worker process keeps a private copy of it and of the classifier. The
+artifact stores the same model as plain .npy files:
+
+    terms.npy             sorted UTF-8 vocabulary, fixed-width bytes
+    columns.npy           feature column of each sorted term (int32)
+    feature_log_prob.npy  MultinomialNB weights, (n_classes, n_features)
+    class_log_prior.npy   MultinomialNB priors
+    classes.npy           class labels
+    meta.json             format version, tokenizer settings, source hashes
+
+They are opened with np.load(mmap_mode="r"), so loading takes milliseconds
+and every process shares the page-cache copy. Predictions are identical to
+the pickles.
+
+Export (and check against the pickles on the training dataset):
+    python model_artifact.py
+"""
+import os
+import re
+import json
+import hashlib
+import logging
+import argparse
+
+import numpy as np
+
+logger = logging.getLogger("app_logger")
+
+ARTIFACT_DIR = "./model/artifact"
+FORMAT_VERSION = 1
+ARRAY_FILES = ["terms", "columns", "feature_log_prob", "class_log_prior", "classes"]
+
+
+def file_sha1(path):
+    with open(path, "rb") as file:
+        return hashlib.sha1(file.read()).hexdigest()
+
+
+def check_supported(model, vectorizer):
+    """Raise ValueError unless the pair is a plain word CountVectorizer and a MultinomialNB-style model."""
+    params = vectorizer.get_params()
+    unsupported = {
+        "analyzer": "word", "ngram_range": (1, 1), "preprocessor": None, "tokenizer": None,
+        "stop_words": None, "strip_accents": None, "binary": False,
+    }
+    for name, expected in unsupported.items():
+        if params.get(name) != expected:
+            raise ValueError(f"Cannot export a vectorizer with {name}={params.get(name)!r}")
+    for name in ("feature_log_prob_", "class_log_prior_", "classes_"):
+        if not hasattr(model, name):
+            raise ValueError(f"Cannot export a model without {name}")
+
+
+def export_artifact(model, vectorizer, folder=ARTIFACT_DIR, sources=None):
+    """
+    Write model and vectorizer as an artifact folder.
+
+    Args:
+        model: Fitted MultinomialNB.
+        vectorizer: Fitted CountVectorizer.
+        folder (str): Destination directory.
+        sources (list): Files the artifact was built from; their hashes are
+            stored so a stale artifact can be detected.
+    """
+    check_supported(model, vectorizer)
+    os.makedirs(folder, exist_ok=True)
+    encoded = sorted((term.encode("utf-8"), column) for term, column in vectorizer.vocabulary_.items())
+    width = max(len(term) for term, _ in encoded)
+    arrays = {
+        "terms": np.array([term for term, _ in encoded], dtype=f"S{width}"),
+        "columns": np.array([column for _, column in encoded], dtype=np.int32),
+        "feature_log_prob": np.ascontiguousarray(model.feature_log_prob_, dtype=np.float64),
+        "class_log_prior": np.ascontiguousarray(model.class_log_prior_, dtype=np.float64),
+        "classes": np.asarray(model.classes_),
+    }
+    for name in ARRAY_FILES:
+        np.save(os.path.join(folder, f"{name}.npy"), arrays[name], allow_pickle=False)
+    meta = {
+        "format_version": FORMAT_VERSION,
+        "token_pattern": vectorizer.token_pattern,
+        "lowercase": vectorizer.lowercase,
+        "n_features": int(model.feature_log_prob_.shape[1]),
+        "sources": {path: file_sha1(path) for path in sources or []},
+    }
+    with open(os.path.join(folder, "meta.json"), "w") as file:
+        json.dump(meta, file, indent=2)
+    logger.info(f"Exported model artifact with {len(encoded)} terms to {folder}")
+    return folder
+
+
+class SentimentArtifact:
+    """
+    Vectorizer and classifier read from an artifact folder.
+
+    transform() produces the same sparse count matrix as
+    CountVectorizer.transform and predict() the same labels as
+    MultinomialNB.predict, so it can stand in for the pickled pair.
+
+    Args:
+        folder (str): Artifact directory written by export_artifact.
+        mmap (bool): Memory-map the arrays instead of reading them.
+    """
+
+    def __init__(self, folder=ARTIFACT_DIR, mmap=True):
+        self.folder = folder
+        with open(os.path.join(folder, "meta.json"), "r") as file:
+            self.meta = json.load(file)
+        if self.meta["format_version"] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported artifact format {self.meta['format_version']} in {folder}")
+        mode = "r" if mmap else None
+        for name in ARRAY_FILES:
+            setattr(self, name, np.load(os.path.join(folder, f"{name}.npy"), mmap_mode=mode, allow_pickle=False))
+        self.width = self.terms.dtype.itemsize
+        self.n_features = self.meta["n_features"]
+        self._token_pattern = re.compile(self.meta["token_pattern"])
+        self._vocabulary = None
+
+    @property
+    def vocabulary_(self):
+        """Term -> column dict like CountVectorizer's, built only when asked for."""
+        if self._vocabulary is None:
+            self._vocabulary = {term.decode("utf-8"): int(column) for term, column in zip(self.terms, self.columns)}
+        return self._vocabulary
+
+    def transform(self, texts):
+        from scipy.sparse import csr_matrix
+
+        tokens = []
+        indptr = [0]
+        for text in texts:
+            if not isinstance(text, str):
+                raise ValueError("Only str documents can be vectorized")
+            tokens.extend(self._token_pattern.findall(text.lower() if self.meta["lowercase"] else text))
+            indptr.append(len(tokens))
+
+        encoded = [token.encode("utf-8") for token in tokens]
+        # Longer tokens would be truncated to a false match by the fixed width
+        fits = np.fromiter((len(token) <= self.width for token in encoded), dtype=bool, count=len(encoded))
+        keys = np.array(encoded, dtype=self.terms.dtype)
+        positions = np.minimum(np.searchsorted(self.terms, keys), len(self.terms) - 1)
+        found = fits & (self.terms[positions] == keys)
+
+        rows = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))[found]
+        cols = self.columns[positions[found]]
+        matrix = csr_matrix(
+            (np.ones(len(cols), dtype=np.int64), (rows, cols)), shape=(len(indptr) - 1, self.n_features)
+        )
+        matrix.sum_duplicates()
+        matrix.sort_indices()
+        return matrix
+
+    def predict(self, matrix):
+        joint_log_likelihood = matrix @ self.feature_log_prob.T + self.class_log_prior
+        return self.classes[np.argmax(joint_log_likelihood, axis=1)]
+
+    def predict_texts(self, texts):
+        return self.predict(self.transform(texts))
+
+
+class PicklePredictor:
+    """The pickled vectorizer and model behind the same interface as SentimentArtifact."""
+
+    def __init__(self, model, vectorizer):
+        self.model = model
+        self.vectorizer = vectorizer
+
+    @property
+    def vocabulary_(self):
+        return self.vectorizer.vocabulary_
+
+    def transform(self, texts):
+        return self.vectorizer.transform(texts)
+
+    def predict(self, matrix):
+        return self.model.predict(matrix)
+
+    def predict_texts(self, texts):
+        return self.predict(self.transform(texts))
+
+
+def is_fresh(folder=ARTIFACT_DIR):
+    """True if folder holds an artifact built from the current source files."""
+    meta_path = os.path.join(folder, "meta.json")
+    if not os.path.exists(meta_path):
+        return False
+    try:
+        with open(meta_path, "r") as file:
+            meta = json.load(file)
+        return meta.get("format_version") == FORMAT_VERSION and all(
+            os.path.exists(path) and file_sha1(path) == digest for path, digest in meta["sources"].items()
+        )
+    except Exception as e:
+        logger.warning(f"Unreadable model artifact in {folder}: {e}")
+        return False
+
+
+def verify_artifact(artifact, model, vectorizer, texts, chunk_size=5000):
+    """Number of texts whose artifact prediction differs from the pickled model's."""
+    mismatches = 0
+    for start in range(0, len(texts), chunk_size):
+        chunk = texts[start:start + chunk_size]
+        expected = model.predict(vectorizer.transform(chunk))
+        mismatches += int((artifact.predict_texts(chunk) != expected).sum())
+        if (artifact.transform(chunk) != vectorizer.transform(chunk)).nnz:
+            raise AssertionError(f"Vectorized rows {start}-{start + len(chunk) - 1} differ from the pickled vectorizer")
+    return mismatches
+
+
+if __name__ == "__main__":
+    import pandas as pd
+    from resources import MODEL_PATH, VECTORIZER_PATH, get_model, get_vectorizer
+
+    parser = argparse.ArgumentParser(description="Export the pickled sentiment model as an mmap-able artifact")
+    parser.add_argument("--folder", default=ARTIFACT_DIR)
+    parser.add_argument("--check-dataset", default="./model/cleaned_dataset.csv",
+                        help="CSV whose texts are used to compare predictions ('' to skip)")
+    parser.add_argument("--text-column", default="text")
+    args = parser.parse_args()
+
+    model, vectorizer = get_model(), get_vectorizer()
+    export_artifact(model, vectorizer, args.folder, sources=[MODEL_PATH, VECTORIZER_PATH])
+    print(f"Exported artifact to {args.folder}")
+    if args.check_dataset:
+        dataset = pd.read_csv(args.check_dataset)
+        texts = dataset[args.text_column].dropna().astype(str).tolist()
+        mismatches = verify_artifact(SentimentArtifact(args.folder), model, vectorizer, texts)
+        print(f"Checked {len(texts)} texts from {args.check_dataset}: {mismatches} mismatched predictions")
+        if mismatches:
+            raise SystemExit(1)
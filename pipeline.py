@@ -0,0 +1,347 @@
+import os
+import csv
+import queue
+import hashlib
+import logging
+import threading
+from functools import partial
+from collections import Counter, OrderedDict
+
+import pandas as pd
+
+from standardizing_data import (
+    LABEL_MAP,
+    clean_series,
+    translate_texts,
+    process_texts,
+    predict_batch,
+    get_spell_corrector,
+)
+import metrics
+from dedup import DEDUP_MODE, group_texts, record_dedup
+
+logger = logging.getLogger("app_logger")
+
+BATCH_SIZE = 200
+QUEUE_SIZE = 4
+# Keys of the most recent records batched() remembers to drop exact
+# duplicates; older repeats are left to the dedup stage and the store
+SEEN_KEYS = 50000
+
+# Marks the end of the stream on every queue
+_DONE = object()
+
+
+class PipelineCancelled(RuntimeError):
+    """Raised by run_pipeline when its cancel event was set before the stream ended."""
+
+
+class CsvSink:
+    """
+    Optional sink that appends processed records to a CSV file as they arrive.
+    """
+
+    def __init__(self, path, fieldnames):
+        self.path = path
+        self.fieldnames = fieldnames
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self._file = open(path, "w", newline="", encoding="utf-8")
+        self._writer = csv.DictWriter(self._file, fieldnames=fieldnames, extrasaction="ignore")
+        self._writer.writeheader()
+
+    def write(self, records):
+        self._writer.writerows(records)
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class SentimentTally:
+    """
+    Running sentiment counts that can be read while the pipeline is still going.
+
+    rows counts the labeled rows, the same ones as counts; rows whose
+    prediction failed (label None) are kept apart in unlabeled.
+    """
+
+    def __init__(self, counts=None):
+        self.counts = Counter(counts or {})
+        self.rows = 0
+        self.unlabeled = 0
+        self._lock = threading.Lock()
+
+    def update(self, labels):
+        labeled = [label for label in labels if label is not None]
+        with self._lock:
+            self.rows += len(labeled)
+            self.unlabeled += len(labels) - len(labeled)
+            self.counts.update(labeled)
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.counts)
+
+    def to_frame(self):
+        """Counts in the same shape normalize_reviews/normalize_comments return."""
+        counts = self.snapshot()
+        return pd.DataFrame(
+            {"Sentiment_Label": list(counts), "Count": list(counts.values())}
+        ).sort_values("Count", ascending=False, ignore_index=True)
+
+
+class PipelineProgress:
+    """
+    Thread-safe per-stage counters: pages and rows fetched, then rows that
+    have left each stage ('clean', 'translate', 'correct', 'predict').
+    """
+
+    def __init__(self):
+        self.counts = Counter()
+        self._lock = threading.Lock()
+
+    def add(self, stage, count=1):
+        with self._lock:
+            self.counts[stage] += count
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.counts)
+
+
+def _watched(records, progress, cancel, stop=None):
+    # Counts records read from the source and stops reading once cancelled or stopped
+    for record in records:
+        if cancel is not None and cancel.is_set():
+            return
+        if stop is not None and stop.is_set():
+            return
+        if progress is not None:
+            progress.add("fetched")
+        yield record
+
+
+def record_key(record):
+    """The record's item_key, or a hash of all its fields for records without one."""
+    key = record.get("item_key")
+    if key is None:
+        raw = repr(sorted(record.items()))
+        key = hashlib.sha1(raw.encode("utf-8")).hexdigest()
+    return key
+
+
+def batched(records, text_field, batch_size=BATCH_SIZE, max_seen=SEEN_KEYS):
+    """
+    Group records into lists of batch_size, dropping exact duplicates and
+    records without text like the CSV path's drop_duplicates/dropna.
+
+    Only the keys of the last max_seen records are remembered, so memory
+    stays bounded on long streams.
+    """
+    seen = OrderedDict()
+    batch = []
+    for record in records:
+        text = record.get(text_field)
+        if not isinstance(text, str) or not text:
+            continue
+        key = record_key(record)
+        if key in seen:
+            seen.move_to_end(key)
+            continue
+        seen[key] = None
+        if len(seen) > max_seen:
+            seen.popitem(last=False)
+        batch.append(dict(record))
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def clean_stage(batch, text_field):
+    cleaned = clean_series([record[text_field] for record in batch])
+    for record, text in zip(batch, cleaned):
+        record[text_field] = text
+    return [record for record in batch if record[text_field] != '']
+
+
+def dedup_stage(batch, text_field, mode=DEDUP_MODE):
+    """
+    Measure the duplicates in a batch; in 'near' mode also give near
+    duplicates their representative's text, so the following stages, which
+    run once per distinct text, treat them as one.
+    """
+    groups = group_texts([record[text_field] for record in batch], mode=mode)
+    record_dedup(groups)
+    if mode == "near":
+        for record, text in zip(batch, groups.expand(groups.unique)):
+            record[text_field] = text
+    return batch
+
+
+def translate_stage(batch, text_field):
+    translated = group_texts([record[text_field] for record in batch]).apply(translate_texts)
+    for record, text in zip(batch, translated):
+        record[text_field] = text
+    return batch
+
+
+def correct_stage(batch, text_field):
+    corrected = group_texts([record[text_field] for record in batch]).apply(process_texts)
+    for record, text in zip(batch, corrected):
+        record[text_field] = text
+    return batch
+
+
+def predict_stage(batch, text_field):
+    predictions = group_texts([record[text_field] for record in batch]).apply(predict_batch)
+    for record, prediction in zip(batch, predictions):
+        record["Sentiment"] = int(prediction)
+        record["Sentiment_Label"] = LABEL_MAP.get(int(prediction))
+    return batch
+
+
+def build_stages(dedup=DEDUP_MODE):
+    """The (name, func) stages of run_pipeline, with a dedup stage after cleaning unless dedup is None."""
+    stages = [("clean", clean_stage)]
+    if dedup is not None:
+        stages.append(("dedup", partial(dedup_stage, mode=dedup)))
+    return stages + [
+        ("translate", translate_stage),
+        ("correct", correct_stage),
+        ("predict", predict_stage),
+    ]
+
+
+STAGES = build_stages()
+
+
+def _run_stage(name, func, text_field, in_queue, out_queue, errors, progress=None, cancel=None, stop=None):
+    failed = False
+    while True:
+        batch = in_queue.get()
+        if batch is _DONE:
+            out_queue.put(_DONE)
+            return
+        if failed or any(event is not None and event.is_set() for event in (cancel, stop)):
+            continue  # Keep draining so upstream threads never block on a full queue
+        try:
+            with metrics.stage(name, rows_in=len(batch)) as span:
+                batch = func(batch, text_field)
+                span.rows_out = len(batch)
+        except Exception as e:
+            logger.error(f"Pipeline stage '{name}' failed: {e}", exc_info=True)
+            errors.append(e)
+            failed = True
+            continue
+        if progress is not None:
+            progress.add(name, len(batch))
+        if batch:
+            out_queue.put(batch)
+
+
+def _produce(records, text_field, batch_size, out_queue, errors, progress=None, cancel=None, stop=None):
+    try:
+        for batch in batched(_watched(records, progress, cancel, stop), text_field, batch_size):
+            if errors:
+                break
+            out_queue.put(batch)
+    except Exception as e:
+        logger.error(f"Pipeline source failed: {e}", exc_info=True)
+        errors.append(e)
+    finally:
+        # Let a scraper generator release its session and worker threads now
+        close = getattr(records, "close", None)
+        if close is not None:
+            close()
+        out_queue.put(_DONE)
+
+
+def run_pipeline(records, text_field, batch_size=BATCH_SIZE, queue_size=QUEUE_SIZE, sink=None, on_update=None,
+                 tally=None, progress=None, cancel=None, dedup=DEDUP_MODE, stop=None):
+    """
+    Stream records through clean, dedup, detect/translate, correct and predict stages.
+
+    Each stage runs in its own thread and hands batches to the next one over
+    a bounded queue, so scraping, translation and prediction overlap and
+    only a few batches are held in memory at any time.
+
+    Args:
+        records (iterable): Dicts with the text under text_field, e.g. a scraper generator.
+        text_field (str): Key holding the text to analyze ('review' or 'text').
+        batch_size (int): Records per batch handed between stages.
+        queue_size (int): Batches buffered between two stages.
+        sink: Optional object with write(records) and close(), e.g. CsvSink or tables.TableWriter,
+            or a list of them.
+        on_update (callable): Called with the SentimentTally after every batch.
+        tally (SentimentTally): Counts to add to, e.g. seeded from stored results.
+        progress (PipelineProgress): Receives per-stage row counts.
+        cancel (threading.Event): When set, the source stops being read and
+            batches still in flight are dropped.
+        dedup (str): 'exact', 'near' or None, see dedup.py. Translation,
+            correction and prediction run once per distinct text of a batch
+            in every mode; 'near' also merges near-duplicate texts.
+        stop (threading.Event): When set, the source stops being read and
+            batches still in flight are dropped like with cancel, but the run
+            ends normally with the rows counted so far. Used by
+            sampling.sample_sentiment to end a run early.
+
+    Returns:
+        SentimentTally: The final sentiment counts.
+
+    Raises:
+        PipelineCancelled: If cancel was set. Batches that reached the sink
+            before that have been written.
+    """
+    errors = []
+    sinks = list(sink) if isinstance(sink, (list, tuple)) else [sink] if sink is not None else []
+    stages = build_stages(dedup)
+    queues = [queue.Queue(maxsize=queue_size) for _ in range(len(stages) + 1)]
+    threads = [threading.Thread(
+        target=metrics.bind(_produce),
+        args=(records, text_field, batch_size, queues[0], errors, progress, cancel, stop),
+        daemon=True,
+    )]
+    for i, (name, func) in enumerate(stages):
+        threads.append(threading.Thread(
+            target=metrics.bind(_run_stage),
+            args=(name, func, text_field, queues[i], queues[i + 1], errors, progress, cancel, stop),
+            daemon=True,
+        ))
+    for thread in threads:
+        thread.start()
+
+    tally = tally if tally is not None else SentimentTally()
+    try:
+        while True:
+            batch = queues[-1].get()
+            if batch is _DONE:
+                break
+            if errors or (cancel is not None and cancel.is_set()):
+                continue
+            try:
+                tally.update([record["Sentiment_Label"] for record in batch])
+                for item in sinks:
+                    item.write(batch)
+                if on_update is not None:
+                    on_update(tally)
+            except Exception as e:
+                logger.error(f"Pipeline sink failed: {e}", exc_info=True)
+                errors.append(e)
+    finally:
+        for thread in threads:
+            thread.join()
+        for item in sinks:
+            item.close()
+        get_spell_corrector().cache.save()
+
+    if errors:
+        raise RuntimeError(f"An error occurred: {errors[0]}")
+    if cancel is not None and cancel.is_set():
+        logger.info(f"Streaming pipeline cancelled after {tally.rows} rows")
+        raise PipelineCancelled("Pipeline cancelled")
+    logger.info(f"Streaming pipeline finished: {tally.rows} rows, counts {tally.snapshot()}")
+    return tally
@@ -0,0 +1,177 @@
+import json
+import time
+import logging
+import threading
+
+logger = logging.getLogger("app_logger")
+
+MODEL_PATH = "./model/sentiment_analysis.pkl"
+VECTORIZER_PATH = "./model/countvectorizer.pkl"
+# NLTK's English stop-word list, shipped with the repo so nothing is downloaded
+STOPWORDS_PATH = "./model/stopwords_english.txt"
+COOKIES_PATH = "./json/cookies.json"
+CREDENTIALS_PATH = "./json/credentials.json"
+
+
+class ResourceRegistry:
+    """
+    Named resources built on first use instead of at import time.
+
+    Each resource is a factory registered under a name; get(name) runs the
+    factory once (thread-safe) and returns the cached value afterwards. How
+    long every load took is kept in load_times so slow resources show up.
+    """
+
+    def __init__(self):
+        self._factories = {}
+        self._values = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+        self.load_times = {}
+
+    def register(self, name, factory):
+        with self._lock:
+            self._factories[name] = factory
+            self._locks[name] = threading.Lock()
+            self._values.pop(name, None)
+
+    def get(self, name):
+        try:
+            return self._values[name]
+        except KeyError:
+            pass
+        if name not in self._factories:
+            raise KeyError(f"Unknown resource: {name}")
+        with self._locks[name]:
+            if name not in self._values:
+                started = time.perf_counter()
+                self._values[name] = self._factories[name]()
+                self.load_times[name] = time.perf_counter() - started
+                logger.info(f"Loaded resource '{name}' in {self.load_times[name]:.2f}s")
+        return self._values[name]
+
+    def is_loaded(self, name):
+        return name in self._values
+
+    def loaded(self):
+        return sorted(self._values)
+
+    def names(self):
+        return sorted(self._factories)
+
+    def reset(self, name=None):
+        """Forget one or all loaded values so the next get() rebuilds them."""
+        with self._lock:
+            if name is None:
+                self._values.clear()
+            else:
+                self._values.pop(name, None)
+
+
+def _load_joblib(path):
+    from joblib import load
+    return load(path)
+
+
+def load_predictor():
+    """
+    The array-backed model artifact when one built from the current pickles
+    exists (see model_artifact.py), otherwise the pickled model and vectorizer.
+    """
+    import model_artifact
+    if model_artifact.is_fresh():
+        return model_artifact.SentimentArtifact()
+    logger.info("No up-to-date model artifact, using the pickled model")
+    return model_artifact.PicklePredictor(get_model(), get_vectorizer())
+
+
+def load_stop_words(path=STOPWORDS_PATH):
+    with open(path, "r", encoding="utf-8") as file:
+        return frozenset(line.strip() for line in file if line.strip())
+
+
+def load_cookies(path=COOKIES_PATH):
+    with open(path, "r") as file:
+        cookie_dic = json.load(file)
+    return {cookie["name"]: cookie["value"] for cookie in cookie_dic}
+
+
+def load_api_key(path=CREDENTIALS_PATH):
+    with open(path, "r") as file:
+        return json.load(file)["api_key"]
+
+
+registry = ResourceRegistry()
+registry.register("model", lambda: _load_joblib(MODEL_PATH))
+registry.register("vectorizer", lambda: _load_joblib(VECTORIZER_PATH))
+registry.register("predictor", load_predictor)
+registry.register("stop_words", load_stop_words)
+# Words that mark a Latin-script text as English without calling langdetect
+registry.register("english_words", lambda: get_stop_words() | set(get_predictor().vocabulary_))
+registry.register("cookies", load_cookies)
+registry.register("api_key", load_api_key)
+
+# What warm_up() loads by default: everything prediction needs
+WARM_UP_RESOURCES = ["predictor", "stop_words", "english_words"]
+
+
+def get_model():
+    return registry.get("model")
+
+
+def get_vectorizer():
+    return registry.get("vectorizer")
+
+
+def get_predictor():
+    """Vectorizer and classifier with transform(texts) and predict(matrix)."""
+    return registry.get("predictor")
+
+
+def get_stop_words():
+    return registry.get("stop_words")
+
+
+def get_english_words():
+    return registry.get("english_words")
+
+
+def get_cookies():
+    """Amazon session cookies from ./json/cookies.json."""
+    return registry.get("cookies")
+
+
+def get_api_key():
+    """YouTube Data API key from ./json/credentials.json."""
+    return registry.get("api_key")
+
+
+def warm_up(names=None, spell_corrector=False):
+    """
+    Load resources ahead of the first request, e.g. when a server or worker starts.
+
+    Args:
+        names (list): Resources to load, defaults to WARM_UP_RESOURCES.
+        spell_corrector (bool): Also build the SymSpell corrector.
+
+    Returns:
+        dict: Seconds each requested resource took to load (0 if it already was).
+    """
+    timings = {}
+    for name in names or WARM_UP_RESOURCES:
+        started = time.perf_counter()
+        registry.get(name)
+        timings[name] = time.perf_counter() - started
+    if spell_corrector:
+        from standardizing_data import get_spell_corrector
+        started = time.perf_counter()
+        get_spell_corrector()
+        timings["spell_corrector"] = time.perf_counter() - started
+    return timings
+
+
+def warm_up_in_background(names=None, spell_corrector=False):
+    """Run warm_up in a daemon thread so startup is not blocked by it."""
+    thread = threading.Thread(target=warm_up, args=(names, spell_corrector), name="warm-up", daemon=True)
+    thread.start()
+    return thread
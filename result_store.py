@@ -0,0 +1,401 @@
+import os
+import time
+import hashlib
+import logging
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+logger = logging.getLogger("app_logger")
+
+CACHE_DIR = "./cache"
+RESULT_STORE_FILE = os.path.join(CACHE_DIR, "results.sqlite3")
+# Results younger than this are served without touching the network
+RESULT_TTL = 6 * 60 * 60
+
+# Fields that identify an item besides its text, per source
+KEY_FIELDS = {"Amazon": "category", "YouTube": "published_at"}
+TEXT_FIELDS = {"Amazon": "review", "YouTube": "text"}
+
+# Time buckets the sentiment series is kept in, for sources with a timestamp
+GRANULARITIES = ["hour", "day", "week"]
+# pandas frequency of each granularity, to fill buckets without items with zeros
+BUCKET_FREQUENCIES = {"hour": "h", "day": "D", "week": "W-MON"}
+TIME_FIELDS = {"YouTube": "published_at"}
+
+
+def bucket_start(timestamp, granularity):
+    """
+    Start of the hour/day/week (weeks start on Monday) an ISO timestamp falls in,
+    as an ISO string in UTC so buckets sort and compare as text.
+    """
+    moment = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+    if moment.utcoffset() is not None:
+        moment = (moment - moment.utcoffset()).replace(tzinfo=None)
+    if granularity == "hour":
+        moment = moment.replace(minute=0, second=0, microsecond=0)
+    elif granularity == "day":
+        moment = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    elif granularity == "week":
+        moment = (moment - timedelta(days=moment.weekday())).replace(hour=0, minute=0, second=0, microsecond=0)
+    else:
+        raise ValueError(f"Unknown granularity '{granularity}', expected one of {GRANULARITIES}")
+    return moment.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def detect_trend(series, recent=1, baseline=7):
+    """
+    Compare the last `recent` buckets of a time series with the `baseline` before them.
+
+    Args:
+        series (pandas.DataFrame): As returned by ResultStore.time_series.
+        recent (int): Buckets that make up the current period.
+        baseline (int): Buckets before it used as the reference.
+
+    Returns:
+        dict: volume_ratio (items per bucket, recent / baseline) and
+        positive_share_change (in share points), or None with too little history.
+    """
+    if len(series) < recent + 1:
+        return None
+    current = series.iloc[-recent:]
+    reference = series.iloc[-(recent + baseline):-recent]
+    reference_volume = reference["Total"].mean()
+
+    def share(frame):
+        total = frame["Total"].sum()
+        return frame["Positive"].sum() / total if total and "Positive" in frame else 0.0
+
+    return {
+        "volume_ratio": round(float(current["Total"].mean() / reference_volume), 2) if reference_volume else None,
+        "positive_share_change": round(float(share(current) - share(reference)), 4),
+    }
+
+
+def item_key(source, record):
+    """Stable hash identifying a scraped review/comment from its raw fields."""
+    raw = f"{record.get(KEY_FIELDS[source], '')}|{record.get(TEXT_FIELDS[source], '')}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def with_item_keys(source, records):
+    """Tag each raw record with its item_key before the pipeline rewrites the text."""
+    for record in records:
+        record = dict(record)
+        record["item_key"] = item_key(source, record)
+        yield record
+
+
+class ResultStore:
+    """
+    SQLite store of per-item predictions and aggregate sentiment counts,
+    keyed by source ('Amazon'/'YouTube') and product or video ID.
+
+    Args:
+        path (str): Database file.
+        ttl (float): Seconds a stored result is considered fresh.
+    """
+
+    def __init__(self, path=RESULT_STORE_FILE, ttl=RESULT_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self._lock:
+            self._conn.executescript(
+                """
+                PRAGMA journal_mode=WAL;
+                CREATE TABLE IF NOT EXISTS items (
+                    source TEXT NOT NULL,
+                    item_id TEXT NOT NULL,
+                    item_key TEXT NOT NULL,
+                    key_field TEXT,
+                    text TEXT,
+                    sentiment_label TEXT,
+                    PRIMARY KEY (source, item_id, item_key)
+                );
+                CREATE TABLE IF NOT EXISTS aggregates (
+                    source TEXT NOT NULL,
+                    item_id TEXT NOT NULL,
+                    sentiment_label TEXT NOT NULL,
+                    count INTEGER NOT NULL,
+                    PRIMARY KEY (source, item_id, sentiment_label)
+                );
+                CREATE TABLE IF NOT EXISTS series (
+                    source TEXT NOT NULL,
+                    item_id TEXT NOT NULL,
+                    granularity TEXT NOT NULL,
+                    bucket TEXT NOT NULL,
+                    sentiment_label TEXT NOT NULL,
+                    count INTEGER NOT NULL,
+                    PRIMARY KEY (source, item_id, granularity, bucket, sentiment_label)
+                );
+                CREATE TABLE IF NOT EXISTS runs (
+                    source TEXT NOT NULL,
+                    item_id TEXT NOT NULL,
+                    updated_at REAL NOT NULL,
+                    last_seen TEXT,
+                    complete INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (source, item_id)
+                );
+                """
+            )
+            # Stores created before crawls were tracked; their items count as a partial crawl
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(runs)")}
+            if "complete" not in columns:
+                self._conn.execute("ALTER TABLE runs ADD COLUMN complete INTEGER NOT NULL DEFAULT 0")
+            self._conn.commit()
+
+    def _run(self, source, item_id):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT updated_at, last_seen, complete FROM runs WHERE source = ? AND item_id = ?",
+                (source, item_id),
+            ).fetchone()
+
+    def is_fresh(self, source, item_id):
+        """Whether the last crawl of item_id completed less than ttl seconds ago."""
+        run = self._run(source, item_id)
+        return run is not None and bool(run[2]) and time.time() - run[0] < self.ttl
+
+    def last_seen(self, source, item_id):
+        """Newest published_at merged so far (YouTube), or None."""
+        run = self._run(source, item_id)
+        return run[1] if run else None
+
+    def crawl_state(self, source, item_id):
+        """
+        How far the stored items of item_id go.
+
+        Returns:
+            dict: complete (whether the last crawl read every item, so the
+            stored items are all there is up to its end) and last_seen
+            (newest published_at stored, YouTube).
+        """
+        run = self._run(source, item_id)
+        if run is None:
+            return {"complete": False, "last_seen": None}
+        return {"complete": bool(run[2]), "last_seen": run[1]}
+
+    def start_crawl(self, source, item_id):
+        """
+        Record that a crawl of item_id began. Until mark_refreshed records it
+        as complete, the stored items are a partial crawl: a cancelled, failed
+        or killed run leaves them that way, so the next crawl reads every item
+        again instead of stopping at the newest stored one.
+        """
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO runs (source, item_id, updated_at, complete) VALUES (?, ?, 0, 0) "
+                "ON CONFLICT (source, item_id) DO UPDATE SET complete = 0",
+                (source, item_id),
+            )
+            self._conn.commit()
+
+    def known_keys(self, source, item_id):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT item_key FROM items WHERE source = ? AND item_id = ?", (source, item_id)
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def counts(self, source, item_id):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT sentiment_label, count FROM aggregates WHERE source = ? AND item_id = ?",
+                (source, item_id),
+            ).fetchall()
+        return dict(rows)
+
+    def counts_frame(self, source, item_id):
+        """Stored counts in the shape normalize_reviews/normalize_comments return."""
+        counts = self.counts(source, item_id)
+        return pd.DataFrame(
+            {"Sentiment_Label": list(counts), "Count": list(counts.values())}
+        ).sort_values("Count", ascending=False, ignore_index=True)
+
+    def items(self, source, item_id):
+        with self._lock:
+            return pd.read_sql_query(
+                "SELECT item_key, key_field, text, sentiment_label FROM items WHERE source = ? AND item_id = ?",
+                self._conn,
+                params=(source, item_id),
+            )
+
+    def time_series(self, source, item_id, granularity="day", since=None):
+        """
+        Sentiment counts per time bucket, oldest first.
+
+        Reads only the pre-aggregated buckets, so it stays cheap however many
+        items are stored. Items merged before the series existed are
+        bucketed once on first request.
+
+        Args:
+            granularity (str): 'hour', 'day' or 'week'.
+            since (str): Only buckets starting at or after this ISO timestamp.
+
+        Returns:
+            pandas.DataFrame: A 'Bucket' column (UTC datetime) with every bucket
+            from the first to the last, one count column per sentiment label
+            and 'Total'.
+        """
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"Unknown granularity '{granularity}', expected one of {GRANULARITIES}")
+        query = (
+            "SELECT bucket, sentiment_label, count FROM series "
+            "WHERE source = ? AND item_id = ? AND granularity = ? AND bucket >= ?"
+        )
+        params = (source, item_id, granularity, bucket_start(since, granularity) if since else "")
+        with self._lock:
+            bucketed = self._conn.execute(
+                "SELECT 1 FROM series WHERE source = ? AND item_id = ? LIMIT 1", (source, item_id)
+            ).fetchone()
+        if not bucketed and source in TIME_FIELDS:
+            self.rebuild_time_series(source, item_id)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+
+        frame = pd.DataFrame(rows, columns=["Bucket", "Sentiment_Label", "Count"])
+        frame = frame.pivot_table(index="Bucket", columns="Sentiment_Label", values="Count", aggfunc="sum", fill_value=0)
+        frame.columns.name = None
+        frame.index = pd.to_datetime(frame.index, utc=True)
+        if len(frame):
+            buckets = pd.date_range(frame.index.min(), frame.index.max(), freq=BUCKET_FREQUENCIES[granularity])
+            frame = frame.reindex(buckets, fill_value=0)
+        frame["Total"] = frame.sum(axis=1)
+        return frame.rename_axis("Bucket").reset_index()
+
+    def rebuild_time_series(self, source, item_id):
+        """
+        Recompute the buckets of one item from its stored items.
+
+        Returns:
+            int: Items bucketed.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key_field, sentiment_label FROM items "
+                "WHERE source = ? AND item_id = ? AND key_field IS NOT NULL AND sentiment_label IS NOT NULL",
+                (source, item_id),
+            ).fetchall()
+            self._conn.execute("DELETE FROM series WHERE source = ? AND item_id = ?", (source, item_id))
+            self._add_to_series(source, item_id, rows)
+            self._conn.commit()
+        return len(rows)
+
+    def _add_to_series(self, source, item_id, timed_labels):
+        # Caller holds the lock; only the buckets the new items fall in are touched
+        deltas = {}
+        for timestamp, label in timed_labels:
+            try:
+                for granularity in GRANULARITIES:
+                    key = (granularity, bucket_start(timestamp, granularity), label)
+                    deltas[key] = deltas.get(key, 0) + 1
+            except ValueError:
+                logger.warning(f"Unparseable timestamp '{timestamp}' for {source} {item_id}, not bucketed")
+        self._conn.executemany(
+            "INSERT INTO series VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (source, item_id, granularity, bucket, sentiment_label) DO UPDATE SET count = count + excluded.count",
+            [(source, item_id, granularity, bucket, label, count) for (granularity, bucket, label), count in deltas.items()],
+        )
+
+    def merge(self, source, item_id, records):
+        """
+        Add processed records and fold their labels into the aggregate counts
+        and, for timestamped sources, the time series buckets.
+
+        Records already stored (same item_key) are skipped, so re-fetching an
+        overlapping page never double counts.
+
+        Returns:
+            int: Number of new items stored.
+        """
+        key_field, text_field = KEY_FIELDS[source], TEXT_FIELDS[source]
+        time_field = TIME_FIELDS.get(source)
+        added = {}
+        timed_labels = []
+        last_seen = None
+        with self._lock:
+            for record in records:
+                cursor = self._conn.execute(
+                    "INSERT OR IGNORE INTO items VALUES (?, ?, ?, ?, ?, ?)",
+                    (source, item_id, record["item_key"], record.get(key_field),
+                     record.get(text_field), record.get("Sentiment_Label")),
+                )
+                if cursor.rowcount and record.get("Sentiment_Label") is not None:
+                    label = record["Sentiment_Label"]
+                    added[label] = added.get(label, 0) + 1
+                    if time_field and record.get(time_field):
+                        timed_labels.append((record[time_field], label))
+                if source == "YouTube" and record.get("published_at"):
+                    last_seen = max(last_seen or "", record["published_at"])
+            self._conn.executemany(
+                "INSERT INTO aggregates VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (source, item_id, sentiment_label) DO UPDATE SET count = count + excluded.count",
+                [(source, item_id, label, count) for label, count in added.items()],
+            )
+            self._add_to_series(source, item_id, timed_labels)
+            if last_seen:
+                self._conn.execute(
+                    "INSERT INTO runs (source, item_id, updated_at, last_seen) VALUES (?, ?, 0, ?) "
+                    "ON CONFLICT (source, item_id) DO UPDATE SET "
+                    "last_seen = MAX(COALESCE(last_seen, ''), excluded.last_seen)",
+                    (source, item_id, last_seen),
+                )
+            self._conn.commit()
+        return sum(added.values())
+
+    def mark_refreshed(self, source, item_id, complete=True):
+        """
+        Record a finished crawl of item_id. With complete=False (some pages
+        could not be fetched) the stored counts are not served as fresh and
+        the next crawl reads every item again.
+        """
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO runs (source, item_id, updated_at, complete) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (source, item_id) DO UPDATE SET updated_at = excluded.updated_at, complete = excluded.complete",
+                (source, item_id, time.time(), int(complete)),
+            )
+            self._conn.commit()
+
+    def delete(self, source, item_id):
+        with self._lock:
+            for table in ("items", "aggregates", "series", "runs"):
+                self._conn.execute(f"DELETE FROM {table} WHERE source = ? AND item_id = ?", (source, item_id))
+            self._conn.commit()
+
+
+class StoreSink:
+    """
+    Pipeline sink that merges processed records into a ResultStore.
+    """
+
+    def __init__(self, store, source, item_id):
+        self.store = store
+        self.source = source
+        self.item_id = item_id
+        self.added = 0
+
+    def write(self, records):
+        self.added += self.store.merge(self.source, self.item_id, records)
+
+    def close(self):
+        logger.info(f"Stored {self.added} new {self.source} items for {self.item_id}")
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_result_store():
+    """Return the shared ResultStore, opening it on first use."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ResultStore()
+        return _store
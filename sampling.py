@@ -0,0 +1,202 @@
+"""
+Progressive sampling: estimate the sentiment split without analyzing every row.
+
+Records are analyzed in a randomized order and after every batch the
+running sentiment shares get Wilson score confidence intervals. Once the
+widest interval is within the target margin of error the source stops being
+read, so a 100k-comment video needs a few thousand rows for a +/-2 point
+answer at 95% confidence.
+
+Rows from a list (a scraped CSV) are visited in a random permutation. Rows
+from a scraper arrive newest first or one star bucket at a time, so they
+pass through a shuffle buffer; that mixes neighbouring pages but cannot
+undo the order of the source, so an early stop on a stream only estimates
+the split of the most recent items. The tally's sample tells the cases
+apart (SAMPLE_RANDOM, SAMPLE_RECENT, SAMPLE_ALL).
+"""
+import random
+import logging
+import threading
+from statistics import NormalDist
+
+from pipeline import SentimentTally, run_pipeline
+from dedup import DEDUP_MODE
+
+logger = logging.getLogger("app_logger")
+
+# Stop once every sentiment share is known to within this many points (as a fraction)
+TARGET_MARGIN = 0.02
+CONFIDENCE = 0.95
+# Never stop before this many rows, the normal approximation needs a few hundred
+MIN_SAMPLE_ROWS = 400
+# Records held back to randomize the order of a streaming source
+SHUFFLE_BUFFER = 2000
+
+# What a SampledTally's rows stand for
+SAMPLE_RANDOM = "random"  # a random sample of every item (a list)
+SAMPLE_RECENT = "recent"  # the items read before an early stop on a newest-first stream
+SAMPLE_ALL = "all"  # every item, the stream ended before the margin was reached
+
+
+def shuffled(records, buffer_size=SHUFFLE_BUFFER, seed=None):
+    """
+    Yield records in a randomized order.
+
+    A list or tuple is visited in a full random permutation of its indices.
+    Any other iterable goes through a buffer of buffer_size records from
+    which a random one is yielded each time a new record comes in.
+    """
+    rng = random.Random(seed)
+    if isinstance(records, (list, tuple)):
+        order = list(range(len(records)))
+        rng.shuffle(order)
+        for i in order:
+            yield records[i]
+        return
+
+    buffer = []
+    try:
+        for record in records:
+            if len(buffer) < buffer_size:
+                buffer.append(record)
+                continue
+            i = rng.randrange(buffer_size)
+            yield buffer[i]
+            buffer[i] = record
+        rng.shuffle(buffer)
+        yield from buffer
+    finally:
+        # Closing the sampler early must also stop the scraper behind it
+        close = getattr(records, "close", None)
+        if close is not None:
+            close()
+
+
+def proportion_interval(count, n, confidence=CONFIDENCE, population=None):
+    """
+    Wilson score interval of the proportion count / n.
+
+    With population (the total number of rows) the finite population
+    correction is applied, so the interval closes as the sample nears it.
+
+    Returns:
+        tuple: (low, high), both 0..1
+    """
+    if n <= 0:
+        return 0.0, 1.0
+    share = count / n
+    if population is not None and n >= population:
+        return share, share
+    effective_n = n
+    if population is not None and population > 1:
+        effective_n = n * (population - 1) / (population - n)
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    denominator = 1 + z ** 2 / effective_n
+    center = (share + z ** 2 / (2 * effective_n)) / denominator
+    spread = z * ((share * (1 - share) + z ** 2 / (4 * effective_n)) / effective_n) ** 0.5 / denominator
+    return max(0.0, center - spread), min(1.0, center + spread)
+
+
+class SampledTally(SentimentTally):
+    """
+    SentimentTally that also reports the sentiment shares with confidence intervals.
+
+    Args:
+        labels (list): Labels to report even while not seen yet, e.g. ["Negative", "Positive"].
+        confidence (float): Confidence level of the intervals.
+        population (int): Total rows of the item, if known.
+        sample (str): What the rows stand for, SAMPLE_RANDOM, SAMPLE_RECENT or SAMPLE_ALL.
+    """
+
+    def __init__(self, labels=None, confidence=CONFIDENCE, population=None, sample=SAMPLE_RANDOM):
+        super().__init__({label: 0 for label in labels or []})
+        self.confidence = confidence
+        self.population = population
+        self.sample = sample
+
+    def estimate(self):
+        """{label: {"count", "share", "low", "high"}} of the rows analyzed so far."""
+        counts = self.snapshot()
+        n = sum(counts.values())
+        estimate = {}
+        for label, count in counts.items():
+            low, high = proportion_interval(count, n, self.confidence, self.population)
+            estimate[label] = {"count": count, "share": count / n if n else 0.0, "low": low, "high": high}
+        return estimate
+
+    def margin(self):
+        """Half-width of the widest interval, 1.0 before any row is counted."""
+        estimate = self.estimate()
+        if not estimate or not sum(item["count"] for item in estimate.values()):
+            return 1.0
+        return max((item["high"] - item["low"]) / 2 for item in estimate.values())
+
+    def to_frame(self):
+        """
+        Counts like SentimentTally.to_frame, plus Share, Low and High columns.
+        frame.attrs["sample"] holds the tally's sample.
+        """
+        frame = super().to_frame()
+        estimate = self.estimate()
+        for column, key in (("Share", "share"), ("Low", "low"), ("High", "high")):
+            frame[column] = [round(estimate[label][key], 4) for label in frame["Sentiment_Label"]]
+        frame.attrs["sample"] = self.sample
+        return frame
+
+
+def sample_sentiment(records, text_field, margin=TARGET_MARGIN, confidence=CONFIDENCE, min_rows=MIN_SAMPLE_ROWS,
+                     population=None, labels=None, buffer_size=SHUFFLE_BUFFER, seed=None, sink=None,
+                     on_update=None, progress=None, cancel=None, dedup=DEDUP_MODE):
+    """
+    Run the streaming pipeline on records in random order until the estimate is precise enough.
+
+    Args:
+        records (iterable): Dicts with the text under text_field; a list is
+            permuted, a generator (e.g. a scraper) goes through a shuffle buffer.
+        text_field (str): Key holding the text to analyze.
+        margin (float): Target half-width of every confidence interval, e.g. 0.02.
+        confidence (float): Confidence level of the intervals.
+        min_rows (int): Rows analyzed before an early stop is considered.
+        population (int): Total rows of the item, enables the finite population
+            correction; defaults to len(records) for a list.
+        labels (list): Labels reported even with no rows yet.
+        sink, on_update, progress, cancel, dedup: As in run_pipeline. on_update
+            receives the SampledTally.
+
+    Returns:
+        SampledTally: Counts of the rows analyzed and their estimate. Its
+        sample is SAMPLE_RECENT while a stream is read and after an early
+        stop, SAMPLE_ALL once the stream ended.
+    """
+    is_list = isinstance(records, (list, tuple))
+    if population is None and is_list:
+        population = len(records)
+    tally = SampledTally(labels, confidence=confidence, population=population,
+                         sample=SAMPLE_RANDOM if is_list else SAMPLE_RECENT)
+    stop = threading.Event()
+
+    def update(current):
+        if not stop.is_set() and current.rows >= min_rows and current.margin() <= margin:
+            logger.info(f"Sampling reached +/-{margin:.1%} after {current.rows} rows, stopping")
+            stop.set()
+        if on_update is not None:
+            on_update(current)
+
+    run_pipeline(
+        shuffled(records, buffer_size, seed),
+        text_field,
+        sink=sink,
+        on_update=update,
+        tally=tally,
+        progress=progress,
+        cancel=cancel,
+        dedup=dedup,
+        stop=stop,
+    )
+    if not is_list and (not stop.is_set() or (population and tally.rows >= population)):
+        tally.sample = SAMPLE_ALL
+    logger.info(
+        f"Sampled {tally.rows} rows{f' of {population}' if population else ''}, "
+        f"margin +/-{tally.margin():.1%} at {confidence:.0%} confidence"
+    )
+    return tally
@@ -0,0 +1,231 @@
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+from main import amazon_main, yotutbe_main
+from pipeline import PipelineProgress, PipelineCancelled
+from utils.job_context import JobContext
+
+logger = logging.getLogger("app_logger")
+
+# Analyses allowed to run at the same time; further jobs wait in the queue
+MAX_JOBS = 2
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED = {DONE, FAILED, CANCELLED}
+
+RUNNERS = {"Amazon": amazon_main, "YouTube": yotutbe_main}
+
+
+class AnalysisJob:
+    """
+    State of one submitted analysis, shared between its worker and the pollers.
+
+    Args:
+        source (str): 'Amazon' or 'YouTube'.
+        context (JobContext): The job's ID, URL and workspace.
+        options (dict): Keyword arguments for amazon_main/yotutbe_main.
+    """
+
+    def __init__(self, source, context, options):
+        self.source = source
+        self.context = context
+        self.options = options
+        self.status = PENDING
+        self.progress = PipelineProgress()
+        self.cancel_event = threading.Event()
+        self.tally = None  # Latest SentimentTally, updated after every batch
+        self.result = None
+        self.error = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.forget_when_finished = False  # Set by JobScheduler.forget_when_finished
+
+    @property
+    def job_id(self):
+        return self.context.job_id
+
+    def snapshot(self):
+        """Plain dict of the job's state, safe to read while it runs."""
+        return {
+            "job_id": self.job_id,
+            "source": self.source,
+            "url": self.context.url,
+            "status": self.status,
+            "progress": self.progress.snapshot(),
+            "counts": self.tally.snapshot() if self.tally is not None else {},
+            "error": str(self.error) if self.error is not None else None,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobScheduler:
+    """
+    Runs analyses on a bounded worker pool so callers never block on a crawl.
+
+    submit() returns a job ID straight away; status() reports per-stage
+    progress (pages fetched, rows fetched/cleaned/translated/corrected/
+    predicted) and the running sentiment counts, result() returns the final
+    counts and cancel() stops a pending or running job.
+
+    Args:
+        max_jobs (int): Number of analyses that may run in parallel.
+    """
+
+    def __init__(self, max_jobs=MAX_JOBS):
+        self.max_jobs = max_jobs
+        self._executor = ThreadPoolExecutor(max_workers=max_jobs, thread_name_prefix="analysis")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, source, url=None, context=None, **options):
+        """
+        Queue an analysis of url (or of context.url) and return its job ID.
+
+        options are passed to amazon_main/yotutbe_main, e.g. refresh=True.
+        """
+        if source not in RUNNERS:
+            raise ValueError(f"Unknown source: {source}")
+        existing = self.get(context.job_id) if context is not None else None
+        if existing is not None and existing.status not in FINISHED:
+            return existing.job_id  # Already queued or running
+        context = context or JobContext(url)
+        job = AnalysisJob(source, context, options)
+        with self._lock:
+            self._jobs[job.job_id] = job
+        self._executor.submit(self._run, job)
+        logger.info(f"Job {job.job_id}: queued {source} analysis of {context.url}")
+        return job.job_id
+
+    def _run(self, job):
+        try:
+            self._analyze(job)
+        finally:
+            with self._lock:
+                forget = job.forget_when_finished
+            if forget:
+                self.forget(job.job_id)
+
+    def _analyze(self, job):
+        if job.cancel_event.is_set():
+            job.status = CANCELLED
+            job.finished_at = time.time()
+            return
+        job.status = RUNNING
+        job.started_at = time.time()
+
+        def on_update(tally):
+            job.tally = tally
+
+        try:
+            # Everything the run records is tagged with its job ID
+            with metrics.job_scope(job.job_id):
+                _, job.result = RUNNERS[job.source](
+                    job.context,
+                    on_update=on_update,
+                    progress=job.progress,
+                    cancel=job.cancel_event,
+                    **job.options,
+                )
+            job.status = DONE
+        except PipelineCancelled:
+            job.status = CANCELLED
+        except Exception as e:
+            logger.error(f"Job {job.job_id} failed: {e}", exc_info=True)
+            job.error = e
+            job.status = FAILED
+        finally:
+            job.finished_at = time.time()
+            logger.info(f"Job {job.job_id}: {job.status} after {job.finished_at - job.started_at:.1f}s")
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def status(self, job_id):
+        """Snapshot dict of the job, or None for an unknown ID."""
+        job = self.get(job_id)
+        return job.snapshot() if job is not None else None
+
+    def result(self, job_id):
+        """Final sentiment counts DataFrame, or None until the job is done."""
+        job = self.get(job_id)
+        return job.result if job is not None and job.status == DONE else None
+
+    def cancel(self, job_id):
+        """
+        Ask a job to stop. A pending job never starts; a running one stops
+        fetching and drops the batches in flight.
+
+        Returns:
+            bool: False if the job is unknown or already finished.
+        """
+        job = self.get(job_id)
+        if job is None or job.status in FINISHED:
+            return False
+        job.cancel_event.set()
+        logger.info(f"Job {job_id}: cancellation requested")
+        return True
+
+    def jobs(self):
+        with self._lock:
+            return [job.snapshot() for job in self._jobs.values()]
+
+    def forget(self, job_id):
+        """Drop a finished job from the scheduler, its metrics and its workspace."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status not in FINISHED:
+                return False
+            del self._jobs[job_id]
+        metrics.registry.forget_job(job_id)
+        job.context.cleanup()
+        return True
+
+    def forget_when_finished(self, job_id):
+        """
+        forget() the job now if it has finished, otherwise as soon as its
+        worker is done with it, so its workspace is never deleted while the
+        run still writes to it. Call cancel() first to end it early.
+
+        Returns:
+            bool: False if the job is unknown.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return False
+            # _run sets the final status before it checks the flag under this lock
+            finished = job.status in FINISHED
+            job.forget_when_finished = not finished
+        if finished:
+            self.forget(job_id)
+        return True
+
+    def shutdown(self, cancel=True):
+        if cancel:
+            for job_id in list(self._jobs):
+                self.cancel(job_id)
+        self._executor.shutdown(wait=True)
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    """Return the process-wide JobScheduler shared by every Streamlit session."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = JobScheduler()
+        return _scheduler
@@ -0,0 +1,357 @@
+import os
+import re
+import json
+import pickle
+import importlib.util
+import logging
+import threading
+from collections import Counter, OrderedDict
+
+import pandas as pd
+
+logger = logging.getLogger("app_logger")
+
+DATASET_PATH = "./model/cleaned_dataset.csv"
+CACHE_DIR = "./cache"
+WORD_CACHE_FILE = os.path.join(CACHE_DIR, "spell_cache.json")
+INDEX_FILE = os.path.join(CACHE_DIR, "symspell_index.pkl")
+
+MAX_EDIT_DISTANCE = 2
+MIN_WORD_COUNT = 2
+# Dataset and vocabulary words outside TextBlob's dictionary are only taken as
+# correct spellings (slang such as 'im', 'lol') from this many occurrences on;
+# rarer ones ('lov', 'gud') are typos to be corrected
+MIN_KNOWN_COUNT = 20
+WORD_CACHE_SIZE = 50000
+
+WORD_PATTERN = re.compile(r"[a-z]+")
+
+
+class WordCache:
+    """
+    LRU memo of word -> corrected word, persisted as JSON between runs.
+
+    With track_new set (only in process-pool workers, see
+    standardizing_data._run_in_worker) every put is also kept for
+    take_new(), so the parent can merge what the worker learned.
+    """
+
+    # Set per process; the parent saves its own cache and never takes new entries
+    track_new = False
+
+    def __init__(self, path=WORD_CACHE_FILE, max_size=WORD_CACHE_SIZE):
+        self.path = path
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._new = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.load()
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                # Stored oldest first so the LRU order survives the round trip
+                for word, corrected in json.load(file):
+                    self._entries[word] = corrected
+            logger.info(f"Loaded {len(self._entries)} cached spell corrections from {self.path}")
+        except Exception as e:
+            logger.error(f"Error loading spell cache {self.path}: {e}")
+            self._entries.clear()
+
+    def save(self):
+        if not self.path or not self._dirty:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with self._lock:
+            items = list(self._entries.items())
+            self._dirty = False
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(items, file)
+        os.replace(tmp_path, self.path)
+        logger.info(f"Saved {len(items)} spell corrections to {self.path}")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._new.clear()
+            self._dirty = True
+
+    def take_new(self):
+        """
+        Corrections put since the last call while track_new is set, to hand
+        from a worker process to update() in the parent that saves the cache.
+        """
+        with self._lock:
+            new, self._new = self._new, {}
+            return new
+
+    def update(self, entries):
+        """Put every word -> corrected pair of entries."""
+        for word, corrected in entries.items():
+            self.put(word, corrected)
+
+    def get(self, word):
+        with self._lock:
+            corrected = self._entries.get(word)
+            if corrected is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(word)
+            self.hits += 1
+            return corrected
+
+    def put(self, word, corrected):
+        with self._lock:
+            self._entries[word] = corrected
+            self._entries.move_to_end(word)
+            if self.track_new:
+                self._new[word] = corrected
+            self._dirty = True
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def _deletes(word, max_distance):
+    """All strings reachable from word by removing up to max_distance characters."""
+    results = set()
+    frontier = {word}
+    for _ in range(max_distance):
+        next_frontier = set()
+        for item in frontier:
+            if len(item) <= 1:
+                continue
+            for i in range(len(item)):
+                candidate = item[:i] + item[i + 1:]
+                if candidate not in results:
+                    next_frontier.add(candidate)
+        results |= next_frontier
+        frontier = next_frontier
+    return results
+
+
+def edit_distance(a, b, max_distance):
+    """
+    Optimal string alignment distance between a and b.
+
+    Returns max_distance + 1 as soon as the distance is known to exceed max_distance.
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    previous_previous = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if (
+                previous_previous is not None
+                and i > 1 and j > 1
+                and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]
+            ):
+                current[j] = min(current[j], previous_previous[j - 2] + 1)
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous_previous, previous = previous, current
+    return previous[-1]
+
+
+class SymSpellIndex:
+    """
+    Symmetric-delete spelling index.
+
+    Every trusted word is stored under each of its deletes up to
+    max_distance, so a lookup only has to generate the deletes of the
+    misspelled word instead of every possible edit.
+
+    Args:
+        word_counts (dict): Word frequencies used to rank candidates.
+        max_distance (int): Largest edit distance corrected.
+        trusted (set): Words taken as correct spellings and the only
+            candidates a word is corrected to; defaults to every word.
+    """
+
+    def __init__(self, word_counts, max_distance=MAX_EDIT_DISTANCE, trusted=None):
+        self.max_distance = max_distance
+        self.word_counts = dict(word_counts)
+        self.trusted = set(self.word_counts) if trusted is None else set(trusted) & set(self.word_counts)
+        self.deletes = {}
+        for word in self.trusted:
+            for key in _deletes(word, max_distance) | {word}:
+                self.deletes.setdefault(key, []).append(word)
+
+    def __contains__(self, word):
+        return word in self.trusted
+
+    def lookup(self, word):
+        """Return the closest, most frequent trusted word, or None."""
+        if word in self.trusted:
+            return word
+        best, best_distance, best_count = None, self.max_distance + 1, 0
+        for key in _deletes(word, self.max_distance) | {word}:
+            for candidate in self.deletes.get(key, ()):
+                distance = edit_distance(word, candidate, self.max_distance)
+                count = self.word_counts[candidate]
+                if distance < best_distance or (distance == best_distance and count > best_count):
+                    best, best_distance, best_count = candidate, distance, count
+        return best
+
+    def save(self, path=INDEX_FILE):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as file:
+            pickle.dump(self, file, protocol=pickle.HIGHEST_PROTOCOL)
+        logger.info(f"Saved SymSpell index with {len(self.word_counts)} words to {path}")
+
+    @staticmethod
+    def load(path=INDEX_FILE):
+        with open(path, "rb") as file:
+            return pickle.load(file)
+
+
+def textblob_spelling_path():
+    """Path of the word frequency list bundled with TextBlob, or None if unavailable."""
+    # Locate the package without importing it, importing textblob pulls in nltk
+    spec = importlib.util.find_spec("textblob")
+    if spec is None or not spec.submodule_search_locations:
+        return None
+    path = os.path.join(spec.submodule_search_locations[0], "en", "en-spelling.txt")
+    return path if os.path.exists(path) else None
+
+
+def load_spelling_counts():
+    """Word frequencies of TextBlob's bundled spelling list, empty if it is not installed."""
+    counts = Counter()
+    spelling_path = textblob_spelling_path()
+    if spelling_path:
+        with open(spelling_path, "r", encoding="utf-8") as file:
+            for line in file:
+                if line.startswith(";;;"):
+                    continue
+                parts = line.split()
+                if len(parts) == 2 and WORD_PATTERN.fullmatch(parts[0]):
+                    counts[parts[0]] += int(parts[1])
+    return counts
+
+
+def load_word_counts(dataset_path=DATASET_PATH, vectorizer=None, min_count=MIN_WORD_COUNT, spelling_counts=None):
+    """
+    Build word frequencies from the training dataset, TextBlob's bundled
+    spelling list and the model vocabulary.
+
+    Dataset words seen fewer than min_count times are dropped since one-off
+    tokens in tweets are mostly typos themselves.
+    """
+    counts = Counter()
+    if dataset_path and os.path.exists(dataset_path):
+        texts = pd.read_csv(dataset_path, usecols=["text"])["text"].dropna()
+        for text in texts:
+            counts.update(WORD_PATTERN.findall(text.lower()))
+        counts = Counter({word: count for word, count in counts.items() if count >= min_count})
+    counts.update(load_spelling_counts() if spelling_counts is None else spelling_counts)
+    if vectorizer is not None:
+        for word in vectorizer.vocabulary_:
+            if WORD_PATTERN.fullmatch(word):
+                counts[word] += 1
+    return counts
+
+
+def trusted_words(word_counts, spelling_counts, min_known_count=MIN_KNOWN_COUNT):
+    """TextBlob's dictionary words plus every other word seen at least min_known_count times."""
+    return set(spelling_counts) | {word for word, count in word_counts.items() if count >= min_known_count}
+
+
+def load_index(dataset_path=DATASET_PATH, vectorizer=None, index_path=INDEX_FILE, min_known_count=MIN_KNOWN_COUNT):
+    """
+    Load the precomputed index, rebuilding it when the dataset is newer or
+    it was built with another min_known_count (see trusted_words).
+    """
+    if index_path and os.path.exists(index_path):
+        sources = [dataset_path, textblob_spelling_path()]
+        source_mtime = max(
+            (os.path.getmtime(path) for path in sources if path and os.path.exists(path)),
+            default=0,
+        )
+        if os.path.getmtime(index_path) >= source_mtime:
+            try:
+                index = SymSpellIndex.load(index_path)
+                if getattr(index, "min_known_count", None) == min_known_count:
+                    return index
+                logger.info(f"SymSpell index {index_path} was built for other trusted words, rebuilding")
+            except Exception as e:
+                logger.error(f"Error loading SymSpell index {index_path}, rebuilding: {e}")
+    spelling_counts = load_spelling_counts()
+    word_counts = load_word_counts(dataset_path, vectorizer, spelling_counts=spelling_counts)
+    index = SymSpellIndex(word_counts, trusted=trusted_words(word_counts, spelling_counts, min_known_count))
+    index.min_known_count = min_known_count
+    if index_path:
+        index.save(index_path)
+    return index
+
+
+class SpellCorrector:
+    """
+    Word-level spell corrector backed by a SymSpell index and an LRU cache.
+
+    Args:
+        index (SymSpellIndex): The spelling index.
+        cache (WordCache): Memo of previous corrections, or None to disable.
+
+    Words the index trusts are left untouched, everything else is corrected.
+    """
+
+    def __init__(self, index, cache=None):
+        self.index = index
+        self.cache = cache
+
+    def correct_word(self, word):
+        lower = word.lower()
+        if not lower.isalpha() or len(lower) <= 2:
+            return word
+        if lower in self.index:
+            return word
+
+        corrected = self.cache.get(lower) if self.cache is not None else None
+        if corrected is None:
+            corrected = self.index.lookup(lower) or lower
+            if self.cache is not None:
+                self.cache.put(lower, corrected)
+
+        if corrected == lower:
+            return word
+        return corrected.capitalize() if word[0].isupper() else corrected
+
+    def correct(self, text):
+        return " ".join(self.correct_word(word) for word in text.split())
+
+
+def build_spell_corrector(vectorizer=None, dataset_path=DATASET_PATH, use_cache=True,
+                          min_known_count=MIN_KNOWN_COUNT):
+    """
+    Create a SpellCorrector from the local dataset and, optionally, the model vocabulary.
+
+    Words outside TextBlob's dictionary, vocabulary words included, are only
+    left alone when seen at least min_known_count times; rare vocabulary
+    entries are mostly typos the model saw in training ('lov') and are
+    corrected like any other word.
+    """
+    index = load_index(dataset_path, vectorizer, min_known_count=min_known_count)
+    cache = None
+    if use_cache:
+        cache = WordCache()
+        if (
+            cache.path and os.path.exists(cache.path) and os.path.exists(INDEX_FILE)
+            and os.path.getmtime(cache.path) < os.path.getmtime(INDEX_FILE)
+        ):
+            logger.info("Spell cache is older than the SymSpell index, starting it over")
+            cache.clear()
+    logger.info(f"Spell corrector ready with {len(index.word_counts)} dictionary words")
+    return SpellCorrector(index, cache=cache)
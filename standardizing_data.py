@@ -1,51 +1,63 @@
 import os
+import numpy as np
 import pandas as pd
-import nltk
-from nltk.corpus import stopwords
-from googletrans import Translator
-from textblob import TextBlob
-from indic_transliteration import sanscript
-from indic_transliteration.sanscript import transliterate
-from joblib import load
-import logging
-from logging.handlers import RotatingFileHandler
 import warnings
-from concurrent.futures import ThreadPoolExecutor
-from langdetect import detect
-from deep_translator import GoogleTranslator
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from itertools import repeat
+from functools import partial
+from spell_correction import build_spell_corrector, WordCache
+from translation import get_translator
+from language_detection import detect_language, detect_languages
+from resources import (
+    get_model, get_vectorizer, get_predictor, get_stop_words, get_english_words,
+)
 import re
+import metrics
+from dedup import DEDUP_MODE, group_texts, record_dedup
+from logging_config import setup_logging, log_sampled
+from tables import table_file, write_table, read_table
 
 warnings.filterwarnings("ignore")
 
-# Constants for sentiment analysis model and vectorizer
-MODEL_PATH = "./model/sentiment_analysis.pkl"
-VECTORIZER_PATH = "./model/countvectorizer.pkl"
+# The model, vectorizer and stop words live in the resources registry and are
+# loaded on first use (see resources.warm_up to load them ahead of time)
 LABEL_MAP = {0: "Negative", 2: "Positive"}
+PREDICT_CHUNK_SIZE = 5000
+INDIC_LANGUAGES = ["hi", "mr", "bn", "gu", "ta", "te", "kn", "ml", "pa"]
 
-# Initialize Google Translator and AI4Bharat transliterator
-translator = Translator()
-# transliterator = XlitEngine("hi")
+# Defaults for the parallel mode of normalize_dataframe
+NORMALIZE_CHUNK_SIZE = 500
+CPU_WORKERS = os.cpu_count()
+IO_WORKERS = 8
 
-# Set up logging with rotation
-log_dir = "./logs"
-os.makedirs(log_dir, exist_ok=True)
-log_file = os.path.join(log_dir, "app_log.log")
+# One shared queue handler and log file for every module (see logging_config.py)
+logger = setup_logging()
 
-handler = RotatingFileHandler(log_file, maxBytes=5 * 1024 * 1024, backupCount=3)
-formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
-handler.setFormatter(formatter)
+# Old module-level names, now resolved lazily through the registry
+LAZY_RESOURCES = {
+    "MODEL": get_model,
+    "VECTORIZER": get_vectorizer,
+    "stop_words": get_stop_words,
+    "ENGLISH_WORDS": get_english_words,
+}
 
-logger = logging.getLogger("app_logger")
-logger.setLevel(logging.INFO)
-logger.addHandler(handler)
 
-# Load sentiment analysis model and vectorizer
-MODEL = load(MODEL_PATH)
-VECTORIZER = load(VECTORIZER_PATH)
+def __getattr__(name):
+    if name in LAZY_RESOURCES:
+        return LAZY_RESOURCES[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-# Download stopwords
-nltk.download('stopwords', quiet=True)
-stop_words = set(stopwords.words('english'))
+
+# Spell corrector is built on first use since the index takes a moment to load
+_spell_corrector = None
+
+
+def get_spell_corrector():
+    """Return the shared SymSpell corrector, building it on first call."""
+    global _spell_corrector
+    if _spell_corrector is None:
+        _spell_corrector = build_spell_corrector(vectorizer=get_predictor())
+    return _spell_corrector
 
 
 def clean_text(text):
@@ -66,23 +78,95 @@ def clean_text(text):
     return text
 
 
+EMOJI_RANGES = (
+    u"\U0001F600-\U0001F64F"
+    u"\U0001F300-\U0001F5FF"
+    u"\U0001F680-\U0001F6FF"
+    u"\U0001F1E0-\U0001F1FF"
+    u"\U00002500-\U00002BEF"
+    u"\U00002702-\U000027B0"
+    u"\U000024C2-\U0001F251"
+)
+# Joins a whole column into one string so the strip pattern runs once per column
+ROW_SEPARATOR = "\x00"
+# Everything clean_text deletes (digits, emojis, special symbols) as a single pattern
+STRIP_PATTERN = re.compile(r"(?:[\d" + EMOJI_RANGES + r"]|[^\w\s])+")
+JOINED_STRIP_PATTERN = re.compile(r"(?:[\d" + EMOJI_RANGES + r"]|[^\w\s" + ROW_SEPARATOR + r"])+")
+
+
+def _strip_values(values):
+    joined = ROW_SEPARATOR.join(values)
+    if joined.count(ROW_SEPARATOR) == len(values) - 1:
+        return JOINED_STRIP_PATTERN.sub('', joined).split(ROW_SEPARATOR)
+    # Some text already contains the separator, fall back to one call per row
+    return [STRIP_PATTERN.sub('', value) for value in values]
+
+
+def normalize_series(texts, remove_stop_words=False):
+    """
+    Vectorized clean_text for a whole column, optionally removing stop words too.
+
+    Digits, emojis and symbols are stripped by one precompiled pattern over the
+    joined column, then whitespace collapsing and stop-word removal share a
+    single split/join per row.
+
+    Args:
+        texts (pandas.Series or list): Texts to normalize.
+        remove_stop_words (bool): Also drop stop words like process_text does.
+
+    Returns:
+        pandas.Series: Normalized texts with the same index as the input.
+    """
+    texts = pd.Series(texts, dtype="object")
+    values = texts.tolist()
+    if not values:
+        return texts.copy()
+    stripped = _strip_values(values)
+    if remove_stop_words:
+        stop_words = get_stop_words()
+        normalized = [
+            " ".join(word for word in text.split() if word.lower() not in stop_words)
+            for text in stripped
+        ]
+    else:
+        normalized = [" ".join(text.split()) for text in stripped]
+    return pd.Series(normalized, index=texts.index, dtype="object")
+
+
+def clean_series(texts):
+    """Vectorized clean_text for a whole column."""
+    return normalize_series(texts)
+
+
+def remove_stop_words_series(texts):
+    """Remove stop words from a whole column, the first half of process_text."""
+    texts = pd.Series(texts, dtype="object")
+    stop_words = get_stop_words()
+    return pd.Series(
+        [" ".join(word for word in text.split() if word.lower() not in stop_words) for text in texts],
+        index=texts.index,
+        dtype="object",
+    )
+
+
+def transliterate(text, lang):
+    """Transliterate Indic-script text to ITRANS, leaving other languages unchanged."""
+    if lang in INDIC_LANGUAGES:
+        from indic_transliteration import sanscript
+        return sanscript.transliterate(text, sanscript.DEVANAGARI, sanscript.ITRANS)
+    return text  # No transliteration for unsupported languages
+
+
 def transliterate_and_translate(text):
     """Transliterate text using Indic Transliterate and translate it to English."""
     try:
         # Detect the language of the input text using langdetect
-        detected_lang = detect(text)
-        logger.info(f"Detected Language: {detected_lang}")
+        detected_lang = detect_language(text)
+        log_sampled(logger, f"detected_language:{detected_lang}", f"Detected Language: {detected_lang}")
         
-        if detected_lang != "en":
-            # Transliterate the text if it's in Hindi or similar languages
-            if detected_lang in ["hi", "mr", "bn", "gu", "ta", "te", "kn", "ml", "pa"]:
-                transliterated = transliterate(text, sanscript.DEVANAGARI, sanscript.ITRANS)
-            else:
-                transliterated = text  # No transliteration for unsupported languages
-
-            # Translate the transliterated text to English
-            translated_text = GoogleTranslator(source=detected_lang, target="en").translate(transliterated)
-            return translated_text
+        if detected_lang is not None and detected_lang != "en":
+            # Translate the transliterated text to English through the shared cache
+            return get_translator().translate(transliterate(text, detected_lang), detected_lang)
         
         # If the text is already in English, return it as is
         return text
@@ -91,8 +175,67 @@ def transliterate_and_translate(text):
         logger.error(f"Error during transliteration/translation: {e}", exc_info=True)
         return text  # Fallback to the original text
 
+
+def translate_texts(texts):
+    """
+    Batched version of transliterate_and_translate.
+
+    Languages are detected with the script/word-list fast path, and
+    non-English texts are grouped by language so each group goes through the
+    translation cache and the translator in as few calls as possible.
+    Texts that fail detection or translation are returned unchanged.
+    """
+    results = list(texts)
+    languages, paths = detect_languages(results, english_words=get_english_words())
+    for path, count in paths.items():
+        if count:
+            metrics.inc("language_detection_total", count, path=path)
+    groups = {}
+    for i, (text, detected_lang) in enumerate(zip(results, languages)):
+        if detected_lang is not None and detected_lang != "en":
+            groups.setdefault(detected_lang, []).append((i, transliterate(text, detected_lang)))
+
+    for lang, items in groups.items():
+        try:
+            translated = get_translator().translate_many([text for _, text in items], lang)
+        except Exception as e:
+            logger.error(f"Error translating {len(items)} '{lang}' texts: {e}", exc_info=True)
+            continue
+        for (i, _), text in zip(items, translated):
+            results[i] = text
+
+    logger.info(
+        f"Translated {sum(len(items) for items in groups.values())} of {len(results)} texts "
+        f"from {len(groups)} languages"
+    )
+    return results
+
+
 def process_text(text):
     """Remove stop words and correct spelling."""
+    stop_words = get_stop_words()
+    filtered_words = [word for word in text.split() if word.lower() not in stop_words]
+    filtered_text = " ".join(filtered_words)
+    return get_spell_corrector().correct(filtered_text)
+
+
+def process_texts(texts):
+    """Column version of process_text: remove stop words, then correct spelling."""
+    corrector = get_spell_corrector()
+    cache = corrector.cache
+    hits, misses = (cache.hits, cache.misses) if cache is not None else (0, 0)
+    corrected = [corrector.correct(text) for text in remove_stop_words_series(texts)]
+    if cache is not None:
+        # The word cache keeps its own totals; only the difference belongs to this call
+        metrics.inc("cache_hits_total", cache.hits - hits, cache="spell")
+        metrics.inc("cache_misses_total", cache.misses - misses, cache="spell")
+    return corrected
+
+
+def process_text_textblob(text):
+    """Remove stop words and correct spelling with TextBlob (slow reference path)."""
+    from textblob import TextBlob  # Pulls in nltk, so only imported when used
+    stop_words = get_stop_words()
     filtered_words = [word for word in text.split() if word.lower() not in stop_words]
     filtered_text = " ".join(filtered_words)
     blob = TextBlob(filtered_text)
@@ -100,33 +243,134 @@ def process_text(text):
     return corrected_text
 
 
-# def batch_process(data, func, batch_size=100):
-#     """Process data in batches for efficiency."""
-#     results = []
-#     for i in range(0, len(data), batch_size):
-#         batch = data[i:i + batch_size]
-#         with ThreadPoolExecutor() as executor:
-#             batch_results = list(executor.map(func, batch))
-#         results.extend(batch_results)
-#     return results
+def _apply_chunk(func, chunk):
+    return [func(item) for item in chunk]
+
+
+def _run_in_worker(func, job_id, chunk):
+    """
+    Process-pool entry point: run func on chunk under the caller's job ID.
+
+    A worker's spell-cache entries and metrics would die with it, so the
+    corrections learned and the samples recorded for this chunk are
+    returned with the result for _merge_worker_state in the parent.
+    """
+    metrics.registry.reset()  # Forked workers start with a copy of the parent's samples
+    WordCache.track_new = True
+    cache = _spell_corrector.cache if _spell_corrector is not None else None
+    if cache is not None:
+        cache.take_new()
+    with metrics.job_scope(job_id):
+        result = func(chunk)
+    if cache is None and _spell_corrector is not None:
+        cache = _spell_corrector.cache  # Built inside the worker
+    return result, cache.take_new() if cache is not None else {}, metrics.registry.export()
+
+
+def _merge_worker_state(new_corrections, exported_metrics):
+    metrics.registry.merge(exported_metrics)
+    if new_corrections:
+        get_spell_corrector().cache.update(new_corrections)
+
+
+def batch_process(data, func, batch_size=NORMALIZE_CHUNK_SIZE, executor="thread", workers=None, per_chunk=False):
+    """
+    Process data in chunks on a thread or process pool.
+
+    Args:
+        data (iterable): Items to process.
+        func (callable): Applied to every item, or to every chunk when per_chunk is True.
+        batch_size (int): Items per chunk handed to a worker.
+        executor (str): 'process' for CPU-bound work, 'thread' for I/O-bound work.
+        workers (int): Pool size, defaults to the executor's own default.
+        per_chunk (bool): func takes a list and returns a list of the same length.
+
+    On a process pool, the spell corrections and metrics recorded by the
+    workers are merged back into this process (see _run_in_worker).
+
+    Returns:
+        list: Results in the same order as data.
+    """
+    data = list(data)
+    chunks = [data[i:i + batch_size] for i in range(0, len(data), batch_size)]
+    pool_class = ProcessPoolExecutor if executor == "process" else ThreadPoolExecutor
+    if not per_chunk:
+        func = partial(_apply_chunk, func)
+    with pool_class(max_workers=workers) as pool:
+        if executor != "process":
+            # Threads do not inherit the caller's job ID for the metrics
+            results = list(pool.map(metrics.bind(func), chunks))
+        else:
+            results = []
+            for result, new_corrections, exported_metrics in pool.map(
+                _run_in_worker, repeat(func), repeat(metrics.current_job_id()), chunks
+            ):
+                _merge_worker_state(new_corrections, exported_metrics)
+                results.append(result)
+        return [item for chunk in results for item in chunk]
 
 
-def normalize_dataframe(dataframe, text_column, output_file):
-    """Normalize a dataframe including text cleaning, transliteration, and translation."""
+def normalize_dataframe(dataframe, text_column, output_file, parallel=False,
+                        chunk_size=NORMALIZE_CHUNK_SIZE, cpu_workers=CPU_WORKERS, io_workers=IO_WORKERS,
+                        dedup=DEDUP_MODE):
+    """
+    Normalize a dataframe including text cleaning, transliteration, and translation.
+
+    After cleaning, rows are grouped by text (see dedup.py: 'exact', 'near'
+    or None) and translation and spell correction run once per group; every
+    row then gets its group's result, so no row is dropped.
+
+    With parallel=True the frame is split into chunks of chunk_size rows:
+    cleaning and spell correction run on a process pool of cpu_workers and
+    translation on a thread pool of io_workers. Rows come back in the same
+    order as the serial path.
+
+    The normalized rows are written to output_file, a .parquet or .csv
+    table (see tables.py).
+    """
     try:
         logger.info(f"Starting normalization for {text_column}")
-        dataframe = dataframe.sample(frac=1, random_state=42).reset_index(drop=True)
+        # No full-frame shuffle: row order does not change the counts, and a
+        # random-order estimate is what sampling.sample_sentiment is for
+        dataframe = dataframe.reset_index(drop=True)
+        if parallel:
+            # Build the corrector before forking so workers inherit it instead of loading it each
+            get_spell_corrector()
         print("Cleaning the text")
-        dataframe[text_column] = dataframe[text_column].apply(clean_text)
-        # dataframe[text_column] = batch_process(dataframe[text_column], transliterate_and_translate)
-        # dataframe[text_column] = batch_process(dataframe[text_column], process_text)
-        dataframe = dataframe[dataframe[text_column] != '']
+        with metrics.stage("clean", rows_in=len(dataframe)) as span:
+            if parallel:
+                dataframe[text_column] = batch_process(
+                    dataframe[text_column], clean_series, chunk_size, "process", cpu_workers, per_chunk=True
+                )
+            else:
+                dataframe[text_column] = clean_series(dataframe[text_column])
+            dataframe = dataframe[dataframe[text_column] != '']
+            span.rows_out = len(dataframe)
+        with metrics.stage("dedup", rows_in=len(dataframe)) as span:
+            groups = group_texts(dataframe[text_column].tolist(), mode=dedup)
+            record_dedup(groups)
+            texts = groups.unique
+            span.rows_out = len(texts)
+        logger.info(
+            f"{len(texts)} distinct texts in {groups.rows} rows ({groups.reduction_ratio:.1%} fewer to process)"
+        )
         print("Transliterating and translating the text")
-        dataframe[text_column] = dataframe[text_column].apply(transliterate_and_translate)
-        # logging.info("Cleaning the text")
-        dataframe[text_column] = dataframe[text_column].apply(process_text)
+        with metrics.stage("translate", rows_in=len(texts)) as span:
+            if parallel:
+                texts = batch_process(texts, translate_texts, chunk_size, "thread", io_workers, per_chunk=True)
+            else:
+                texts = translate_texts(texts)
+            span.rows_out = len(texts)
+        with metrics.stage("correct", rows_in=len(texts)) as span:
+            if parallel:
+                texts = batch_process(texts, process_texts, chunk_size, "process", cpu_workers, per_chunk=True)
+            else:
+                texts = process_texts(texts)
+            span.rows_out = len(texts)
+        dataframe[text_column] = groups.expand(texts)
+        get_spell_corrector().cache.save()
         dataframe.dropna(subset=[text_column], inplace=True)
-        dataframe.to_csv(output_file, index=False)
+        write_table(dataframe, output_file)
         logger.info(f"Processing completed! File saved as '{output_file}'.")
     except Exception as e:
         logger.error(f"An error occurred during normalization: {e}")
@@ -136,34 +380,78 @@ def normalize_dataframe(dataframe, text_column, output_file):
 def predict_input_text(input_text):
     """Predict sentiment for input text."""
     try:
-        input_vector = VECTORIZER.transform([input_text])
-        prediction = MODEL.predict(input_vector)
-        logger.info(f"Predicted sentiment: {LABEL_MAP.get(prediction[0], 'Unknown')}")
+        predictor = get_predictor()
+        prediction = predictor.predict(predictor.transform([input_text]))
+        label = LABEL_MAP.get(prediction[0], 'Unknown')
+        log_sampled(logger, f"predicted_sentiment:{label}", f"Predicted sentiment: {label}")
         return prediction[0]
     except Exception as e:
         logger.error(f"Error during sentiment prediction: {e}")
         return -1  # Fallback for errors
 
 
-def normalize_reviews(dataframe):
-    """Normalize reviews and predict sentiments."""
-    normalize_dataframe(dataframe, text_column='review', output_file='reviews.csv')
-    df = pd.read_csv("reviews.csv")
+def predict_batch(texts, chunk_size=PREDICT_CHUNK_SIZE):
+    """
+    Predict sentiment for many texts at once.
+
+    Texts are vectorized and classified a chunk at a time as a single sparse
+    matrix. Rows that are not strings, or that break the vectorizer, get the
+    same -1 fallback as predict_input_text without dropping the rest of the chunk.
+
+    Args:
+        texts (iterable): The texts to classify.
+        chunk_size (int): Number of rows vectorized per call.
+
+    Returns:
+        numpy.ndarray: One integer label per input text.
+    """
+    texts = list(texts)
+    predictions = np.full(len(texts), -1, dtype=int)
+
+    for start in range(0, len(texts), chunk_size):
+        chunk = texts[start:start + chunk_size]
+        valid = [i for i, text in enumerate(chunk) if isinstance(text, str)]
+        if valid:
+            try:
+                predictor = get_predictor()
+                vectors = predictor.transform([chunk[i] for i in valid])
+                predictions[[start + i for i in valid]] = predictor.predict(vectors)
+            except Exception as e:
+                logger.error(f"Batch prediction failed, retrying rows one by one: {e}")
+                for i in valid:
+                    predictions[start + i] = predict_input_text(chunk[i])
+
+        chunk_predictions = predictions[start:start + len(chunk)]
+        summary = ", ".join(
+            f"{LABEL_MAP.get(label, 'Unknown')}: {count}"
+            for label, count in zip(*np.unique(chunk_predictions, return_counts=True))
+        )
+        logger.info(f"Predicted sentiment for rows {start}-{start + len(chunk) - 1}: {summary}")
+
+    return predictions
+
+
+def normalize_reviews(dataframe, output_file=table_file('reviews'), **options):
+    """Normalize reviews and predict sentiments. Options are passed to normalize_dataframe."""
+    normalize_dataframe(dataframe, text_column='review', output_file=output_file, **options)
+    df = read_table(output_file, columns=['review'])
     df.dropna(inplace=True)
-    # df['Sentiment'] = batch_process(df['review'], predict_input_text)
-    df['Sentiment'] = df['review'].apply(predict_input_text)
+    with metrics.stage("predict", rows_in=len(df)) as span:
+        df['Sentiment'] = group_texts(df['review']).apply(predict_batch)
+        span.rows_out = int((df['Sentiment'] != -1).sum())
     df['Sentiment_Label'] = df['Sentiment'].map(LABEL_MAP)
     sentiment_counts = df['Sentiment_Label'].value_counts()
     return sentiment_counts.reset_index(name="Count").rename(columns={"index": "Sentiment"})
 
 
-def normalize_comments(dataframe):
-    """Normalize YouTube comments and predict sentiments."""
-    normalize_dataframe(dataframe, text_column='text', output_file='comments.csv')
-    df = pd.read_csv("comments.csv")
+def normalize_comments(dataframe, output_file=table_file('comments'), **options):
+    """Normalize YouTube comments and predict sentiments. Options are passed to normalize_dataframe."""
+    normalize_dataframe(dataframe, text_column='text', output_file=output_file, **options)
+    df = read_table(output_file, columns=['text'])
     df.dropna(inplace=True)
-    # df['Sentiment'] = batch_process(df['text'], predict_input_text)
-    df['Sentiment'] = df['text'].apply(predict_input_text)
+    with metrics.stage("predict", rows_in=len(df)) as span:
+        df['Sentiment'] = group_texts(df['text']).apply(predict_batch)
+        span.rows_out = int((df['Sentiment'] != -1).sum())
     df['Sentiment_Label'] = df['Sentiment'].map(LABEL_MAP)
     sentiment_counts = df['Sentiment_Label'].value_counts()
     return sentiment_counts.reset_index(name="Count").rename(columns={"index": "Sentiment"})
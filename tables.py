@@ -0,0 +1,253 @@
+"""
+Typed intermediate tables: Parquet when pyarrow is installed, CSV otherwise.
+
+Scraped reviews and comments used to be appended to CSV files one page at a
+time, and every later step parsed them again and guessed the types anew.
+A TableWriter buffers records and writes them as Parquet row groups with
+fixed column types (dictionary-encoded categories and labels, UTC
+timestamps, int8 predictions); read_table loads only the columns asked for.
+
+The format follows the file extension, so .csv paths keep working. A
+Parquet writer saves every flushed row group as a complete part file in a
+"<path>.partial" directory and merges the parts into the final file on
+close(), so a file with the final name is always complete and a writer
+killed before close() leaves parts that the next append=True writer picks
+up, like the rows of an interrupted CSV append.
+"""
+import os
+import csv
+import shutil
+import logging
+import threading
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is optional, CSV is the fallback
+    pa = pq = None
+
+logger = logging.getLogger("app_logger")
+
+TABLE_FORMATS = ["parquet", "csv"]
+TABLE_FORMAT = "parquet" if pa is not None else "csv"
+# Rows buffered before a Parquet row group is written
+ROW_GROUP_SIZE = 10000
+COMPRESSION = "zstd"
+PARTIAL_SUFFIX = ".partial"
+PART_NAME = "part-{:05d}.parquet"
+
+REVIEW_COLUMNS = ["category", "review"]
+COMMENT_COLUMNS = ["published_at", "text"]
+# Column kinds; columns not listed are strings
+COLUMN_TYPES = {
+    "category": "category",
+    "published_at": "timestamp",
+    "Sentiment": "int8",
+    "Sentiment_Label": "category",
+}
+
+
+def table_file(name, fmt=TABLE_FORMAT):
+    """File name of table name in fmt, e.g. table_file("reviews") -> "reviews.parquet"."""
+    return f"{name}.{fmt}"
+
+
+def table_format(path):
+    """'parquet' for a .parquet path, 'csv' for anything else."""
+    return "parquet" if path.endswith(".parquet") else "csv"
+
+
+def partial_dir(path):
+    """Directory holding the row groups a Parquet TableWriter flushed but has not merged yet."""
+    return path + PARTIAL_SUFFIX
+
+
+def table_exists(path):
+    """Whether path holds a table, or the flushed rows of an interrupted TableWriter to append to."""
+    return os.path.exists(path) or (table_format(path) == "parquet" and os.path.isdir(partial_dir(path)))
+
+
+def arrow_schema(columns):
+    """pyarrow schema of columns according to COLUMN_TYPES."""
+    types = {
+        "category": pa.dictionary(pa.int32(), pa.string()),
+        "timestamp": pa.timestamp("us", tz="UTC"),
+        "int8": pa.int8(),
+        "string": pa.string(),
+    }
+    return pa.schema([(column, types[COLUMN_TYPES.get(column, "string")]) for column in columns])
+
+
+def typed_frame(dataframe):
+    """Cast the columns of dataframe to their COLUMN_TYPES kinds, in place, and return it."""
+    for column in dataframe.columns:
+        kind = COLUMN_TYPES.get(column, "string")
+        if kind == "category":
+            dataframe[column] = dataframe[column].astype("category")
+        elif kind == "timestamp":
+            dataframe[column] = pd.to_datetime(dataframe[column], utc=True, errors="coerce")
+        elif kind == "int8":
+            dataframe[column] = dataframe[column].astype("int8")
+    return dataframe
+
+
+class TableWriter:
+    """
+    Appends records to a Parquet or CSV table, a row group at a time.
+
+    flush() makes every record written so far durable: CSV rows are flushed
+    to the file, Parquet rows are saved as a part file. Call it before
+    recording progress elsewhere (e.g. a scrape checkpoint).
+
+    Args:
+        path (str): Output file; the extension picks the format.
+        columns (list): Columns written; other keys of the records are ignored.
+        append (bool): Keep the rows of an existing table at path, and the
+            parts flushed by an interrupted writer.
+        row_group_size (int): Rows buffered before they are written.
+
+    Attributes:
+        rows (int): Rows written by this writer, not counting appended-to ones.
+    """
+
+    def __init__(self, path, columns, append=False, row_group_size=ROW_GROUP_SIZE):
+        self.path = path
+        self.columns = list(columns)
+        self.format = table_format(path)
+        self.row_group_size = row_group_size
+        self.rows = 0
+        self._buffer = []
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+        if self.format == "csv":
+            appending = append and os.path.exists(path)
+            self._file = open(path, "a" if appending else "w", newline="", encoding="utf-8")
+            self._writer = csv.DictWriter(self._file, fieldnames=self.columns, extrasaction="ignore")
+            if not appending:
+                self._writer.writeheader()
+            return
+
+        if pq is None:
+            raise ImportError(f"pyarrow is required to write {path}, or use a .csv path")
+        self.schema = arrow_schema(self.columns)
+        self._append = append
+        self._parts = partial_dir(path)
+        if not append and os.path.isdir(self._parts):
+            shutil.rmtree(self._parts)
+        os.makedirs(self._parts, exist_ok=True)
+        self._part_count = len(self._part_files())
+        if append and self._part_count:
+            logger.info(f"Resuming {path} from {self._part_count} flushed row groups")
+
+    def _part_files(self):
+        return sorted(
+            os.path.join(self._parts, name) for name in os.listdir(self._parts) if name.endswith(".parquet")
+        )
+
+    def _sources(self):
+        """Files merged on close(), oldest rows first."""
+        existing = [self.path] if self._append and os.path.exists(self.path) else []
+        return existing + self._part_files()
+
+    def write(self, records):
+        """
+        Add records (dicts). CSV rows go straight to the file; Parquet rows are
+        buffered and written as a row group once row_group_size are waiting.
+        """
+        with self._lock:
+            if self.format == "csv":
+                records = list(records)
+                self._writer.writerows(records)
+                self.rows += len(records)
+                return
+            self._buffer.extend(records)
+            if len(self._buffer) >= self.row_group_size:
+                self._flush()
+
+    def _flush(self):
+        if self.format == "csv":
+            self._file.flush()
+            return
+        if not self._buffer:
+            return
+        frame = typed_frame(pd.DataFrame(self._buffer, columns=self.columns))
+        part = os.path.join(self._parts, PART_NAME.format(self._part_count))
+        table = pa.Table.from_pandas(frame, schema=self.schema, preserve_index=False)
+        # Written aside and renamed, so a part file is never half written
+        pq.write_table(table, part + ".tmp", compression=COMPRESSION)
+        os.replace(part + ".tmp", part)
+        self._part_count += 1
+        self.rows += len(self._buffer)
+        self._buffer = []
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def _merge(self):
+        """Write the existing table and the parts into path, in row groups of up to row_group_size."""
+        tmp_path = self.path + ".tmp"
+        with pq.ParquetWriter(tmp_path, self.schema, compression=COMPRESSION) as writer:
+            pending, pending_rows = [], 0
+            for source in self._sources():
+                with pq.ParquetFile(source) as parquet_file:
+                    for i in range(parquet_file.num_row_groups):
+                        table = parquet_file.read_row_group(i, columns=self.columns).cast(self.schema)
+                        pending.append(table)
+                        pending_rows += table.num_rows
+                        if pending_rows >= self.row_group_size:
+                            writer.write_table(pa.concat_tables(pending), row_group_size=self.row_group_size)
+                            pending, pending_rows = [], 0
+            if pending:
+                writer.write_table(pa.concat_tables(pending), row_group_size=self.row_group_size)
+        os.replace(tmp_path, self.path)
+        shutil.rmtree(self._parts)
+
+    def close(self):
+        with self._lock:
+            self._flush()
+            if self.format == "csv":
+                self._file.close()
+            else:
+                self._merge()
+        logger.info(f"Saved {self.rows} rows to {self.path}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def write_table(dataframe, path):
+    """Write a whole DataFrame to a Parquet or CSV table."""
+    if table_format(path) == "csv":
+        dataframe.to_csv(path, index=False)
+        return
+    if pq is None:
+        raise ImportError(f"pyarrow is required to write {path}, or use a .csv path")
+    columns = list(dataframe.columns)
+    table = pa.Table.from_pandas(typed_frame(dataframe.copy()), schema=arrow_schema(columns), preserve_index=False)
+    pq.write_table(table, path + ".tmp", row_group_size=ROW_GROUP_SIZE, compression=COMPRESSION)
+    os.replace(path + ".tmp", path)
+
+
+def read_table(path, columns=None):
+    """
+    Load a table written by TableWriter or write_table.
+
+    Args:
+        path (str): A .parquet or .csv file.
+        columns (list): Only read these columns; Parquet skips the others on disk.
+
+    Returns:
+        pandas.DataFrame: With the COLUMN_TYPES dtypes, whatever the format.
+    """
+    if table_format(path) == "csv":
+        return typed_frame(pd.read_csv(path, usecols=columns))
+    if pq is None:
+        raise ImportError(f"pyarrow is required to read {path}")
+    return pq.read_table(path, columns=columns).to_pandas()
@@ -0,0 +1,45 @@
+import pytest
+
+from batch_analysis import BatchLog, plan_batch, result_row, STARTED
+from result_store import ResultStore, item_key
+from scheduler import DONE, FAILED, CANCELLED
+
+URLS = {
+    status: f"https://www.youtube.com/watch?v={video_id}"
+    for status, video_id in [(DONE, "doneVideo01"), (FAILED, "failVideo01"), (CANCELLED, "cancVideo01"),
+                             (STARTED, "starVideo01"), (None, "newsVideo01")]
+}
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ResultStore(str(tmp_path / "results.sqlite3"))
+
+
+@pytest.fixture
+def log(tmp_path, store):
+    log = BatchLog(str(tmp_path))
+    for status, url in URLS.items():
+        video_id = url[-11:]
+        record = {"published_at": "2024-01-01T10:00:00Z", "text": "partial", "Sentiment_Label": "Positive"}
+        store.merge("YouTube", video_id, [dict(record, item_key=item_key("YouTube", record))])
+        if status is not None:
+            log.write(result_row(url, "YouTube", video_id, status))
+    yield log
+    log.close()
+
+
+def stored(store):
+    return {url[-11:] for url in URLS.values() if store.counts("YouTube", url[-11:])}
+
+
+def test_plan_skips_finished_and_failed_urls(store, log):
+    pending = plan_batch(list(URLS.values()), log)
+    assert [url for url, _, _ in pending] == [URLS[CANCELLED], URLS[STARTED], URLS[None]]
+
+
+def test_retried_urls_keep_the_shared_stored_results(store, log):
+    pending = plan_batch(list(URLS.values()), log, retry_failed=True)
+    assert [url for url, _, _ in pending] == [URLS[FAILED], URLS[CANCELLED], URLS[STARTED], URLS[None]]
+    # The store is shared with the app and other batches; an incomplete crawl is redone, not deleted
+    assert stored(store) == {url[-11:] for url in URLS.values()}
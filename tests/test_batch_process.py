@@ -0,0 +1,40 @@
+import pytest
+
+import metrics
+import standardizing_data
+from standardizing_data import batch_process, process_texts
+from spell_correction import SpellCorrector, SymSpellIndex, WordCache
+
+
+@pytest.fixture
+def corrector(tmp_path, monkeypatch):
+    corrector = SpellCorrector(
+        SymSpellIndex({"love": 100, "phone": 50, "great": 80}),
+        cache=WordCache(path=str(tmp_path / "spell_cache.json")),
+    )
+    monkeypatch.setattr(standardizing_data, "_spell_corrector", corrector)
+    monkeypatch.setattr(standardizing_data, "get_stop_words", lambda: {"this"})
+    return corrector
+
+
+@pytest.mark.parametrize("executor", ["process", "thread"])
+def test_matches_serial_processing(corrector, executor):
+    texts = ["lov this phon", "grate phone", "lov", "great"]
+    result = batch_process(texts, process_texts, batch_size=1, executor=executor, workers=2, per_chunk=True)
+    assert result == process_texts(texts) == ["love phone", "great phone", "love", "great"]
+
+
+def test_process_workers_report_their_spell_cache_and_metrics(corrector):
+    texts = ["lov phon", "grate", "lov"]
+    with metrics.job_scope("batch-process-test"):
+        batch_process(texts, process_texts, batch_size=1, executor="process", workers=2, per_chunk=True)
+    try:
+        # Corrections made in the workers reach the cache the parent saves
+        assert {word: corrector.cache.get(word) for word in ("lov", "phon", "grate")} == {
+            "lov": "love", "phon": "phone", "grate": "great",
+        }
+        assert corrector.cache.take_new() == {}
+        spell = metrics.job_summary("batch-process-test")["caches"]["spell"]
+        assert spell.get("hits", 0) + spell.get("misses", 0) == 4
+    finally:
+        metrics.registry.forget_job("batch-process-test")
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from dedup import group_texts
+
+TEXTS = [
+    "nice video",
+    "first",
+    "nice video",
+    "this product stopped working after two weeks, very disappointed",
+    "first",
+    "this product stopped working after two weeks, very disappointed!",
+    "great sound quality for the price",
+]
+
+
+def test_exact_groups_keep_first_appearance_order():
+    groups = group_texts(TEXTS, "exact")
+    assert groups.unique == [TEXTS[0], TEXTS[1], TEXTS[3], TEXTS[5], TEXTS[6]]
+    assert list(groups.inverse) == [0, 1, 0, 2, 1, 3, 4]
+    assert list(groups.counts) == [2, 2, 1, 1, 1]
+    assert groups.reduction_ratio == pytest.approx(2 / 7)
+
+
+def test_expand_restores_one_value_per_row():
+    groups = group_texts(TEXTS, "exact")
+    labels = groups.apply(lambda unique: [len(text) for text in unique])
+    assert labels == [len(text) for text in TEXTS]
+    assert list(groups.expand(np.arange(len(groups.unique)))) == list(groups.inverse)
+
+
+def test_near_mode_merges_near_duplicates_only():
+    groups = group_texts(TEXTS, "near")
+    assert groups.unique == [TEXTS[0], TEXTS[1], TEXTS[3], TEXTS[6]]
+    assert groups.expand(groups.unique) == [
+        TEXTS[0], TEXTS[1], TEXTS[0], TEXTS[3], TEXTS[1], TEXTS[3], TEXTS[6],
+    ]
+
+
+def test_no_grouping_and_empty_input():
+    groups = group_texts(TEXTS, None)
+    assert groups.unique == TEXTS and groups.reduction_ratio == 0
+    empty = group_texts([], "near")
+    assert empty.unique == [] and empty.rows == 0 and empty.expand([]) == []
+
+
+def test_unknown_mode():
+    with pytest.raises(ValueError):
+        group_texts(TEXTS, "fuzzy")
@@ -0,0 +1,89 @@
+import os
+import re
+
+import pytest
+
+import webscrapping.amazon_scrapping as amazon_scrapping
+from benchmarks.sample_pages import sample_page
+from tables import read_table, table_file
+from webscrapping.html_archive import HtmlArchive, archive_path, iter_archive
+
+PRODUCT_URL = "https://www.amazon.in/Some-Phone/dp/B0TESTTEST"
+REVIEWS_PER_STAR = 15
+
+
+def page_reviews(star_type, page_no):
+    first = (page_no - 1) * 10
+    return [f"{star_type} review {i}" for i in range(first, min(first + 10, REVIEWS_PER_STAR))]
+
+
+class FakeSession:
+    """Serves two pages of sample reviews per star bucket."""
+
+    def get(self, url):
+        star_type = re.search(r"filterByStar=(\w+)", url).group(1)
+        page_no = int(re.search(r"pageNumber=(\d+)", url).group(1))
+        return sample_page(page_reviews(star_type, page_no), REVIEWS_PER_STAR, 5)
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def scrape(tmp_path, monkeypatch):
+    folder = str(tmp_path / "B0TESTTEST")
+    os.makedirs(folder)
+    table_path = os.path.join(folder, table_file("reviews_B0TESTTEST"))
+    monkeypatch.setattr(amazon_scrapping, "setup_amazon", lambda product_id, job=None: (folder, table_path))
+    monkeypatch.setattr(amazon_scrapping, "create_session", lambda **politeness: FakeSession())
+    return folder, table_path
+
+
+def rows(table_path):
+    return sorted(map(tuple, read_table(table_path)[["category", "review"]].values.tolist()))
+
+
+def test_archived_pages_give_the_reviews_extracted_at_fetch_time(scrape, tmp_path):
+    folder, table_path = scrape
+    amazon_scrapping.amazon_scrapping(PRODUCT_URL, archive_html=True)
+    expected = sorted(
+        (star_type, review)
+        for star_type in amazon_scrapping.STAR_MAP.values()
+        for page_no in (1, 2)
+        for review in page_reviews(star_type, page_no)
+    )
+    assert rows(table_path) == expected
+    assert len(list(iter_archive(archive_path(folder)))) == 10
+    assert not [name for name in os.listdir(folder) if name.endswith(".html")]
+
+    reextracted = str(tmp_path / table_file("reextracted"))
+    amazon_scrapping.reextract_reviews(folder, reextracted)
+    assert rows(reextracted) == expected
+
+
+def test_pages_are_not_archived_by_default(scrape):
+    folder, table_path = scrape
+    amazon_scrapping.amazon_scrapping(PRODUCT_URL)
+    assert not os.path.exists(archive_path(folder))
+    assert len(rows(table_path)) == REVIEWS_PER_STAR * len(amazon_scrapping.STAR_MAP)
+
+
+def test_truncated_archive_yields_the_complete_pages(tmp_path):
+    path = str(tmp_path / "pages.jsonl.gz")
+    with HtmlArchive(path) as archive:
+        for page_no in range(1, 4):
+            archive.add("one_star", page_no, "x" * 5000 + str(page_no))
+    with HtmlArchive(path) as archive:
+        archive.add("two_star", 1, "appended")
+    assert [(star, page) for star, page, _ in iter_archive(path)] == [
+        ("one_star", 1), ("one_star", 2), ("one_star", 3), ("two_star", 1),
+    ]
+    assert [page for _, page, _ in iter_archive(path, "two_star")] == [1]
+
+    with open(path, "rb") as file:
+        data = file.read()
+    with open(path, "wb") as file:
+        file.write(data[:len(data) // 2])
+    pages = list(iter_archive(path))
+    assert 0 < len(pages) < 4
+    assert all(html == "x" * 5000 + str(page_no) for _, page_no, html in pages)
@@ -0,0 +1,45 @@
+import pytest
+from bs4 import BeautifulSoup
+
+from benchmarks.sample_pages import sample_page
+from webscrapping.amazon_scrapping import extracting_total_reviews, extract_reviews_from_html
+from webscrapping.html_extraction import parse_review_page
+
+PAGES = {
+    "sample": sample_page(["Great phone, love it", "Battery & camera <are> bad", "  spaced   out  "], 1234, 4),
+    "nested": (
+        '<div data-hook="cr-filter-info-review-rating-count"> <span>1,500 total ratings,</span> 321 with reviews </div>'
+        '<span data-hook="review-body"><span>First</span> <br/> <span>line &eacute;</span></span>'
+        '<span data-hook="review-body"></span>'
+        '<div data-hook="review-body">a div, not a review</div>'
+    ),
+    "no_banner": '<html><body><span data-hook="review-body"><span>Only review</span></span></body></html>',
+    "no_reviews": '<div data-hook="cr-filter-info-review-rating-count">10 total ratings, 0 with reviews</div>',
+    "unrelated": "<html><body><p>Sorry, something went wrong</p></body></html>",
+}
+
+
+def two_parses(html_content):
+    """The scraper before parse-once: one parse for the count, another for the reviews."""
+    total_reviews = extracting_total_reviews(BeautifulSoup(html_content, "html.parser"))
+    soup = BeautifulSoup(html_content, "html.parser")
+    reviews = [span.get_text(strip=True) for span in soup.find_all("span", {"data-hook": "review-body"})]
+    return total_reviews, reviews
+
+
+@pytest.mark.parametrize("backend", ["lxml", "lxml-soup", "html.parser"])
+@pytest.mark.parametrize("page", PAGES)
+def test_parse_once_matches_two_parses(backend, page):
+    assert parse_review_page(PAGES[page], backend=backend) == two_parses(PAGES[page])
+
+
+def test_sample_page_is_read():
+    total_reviews, reviews = parse_review_page(PAGES["sample"])
+    assert total_reviews == 1234
+    assert reviews == ["Great phone, love it", "Battery & camera <are> bad", "spaced   out"]
+    assert extract_reviews_from_html(PAGES["sample"]) == reviews
+
+
+@pytest.mark.parametrize("html_content", ["", "   ", None])
+def test_empty_page(html_content):
+    assert parse_review_page(html_content) == (-1, [])
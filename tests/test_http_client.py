@@ -0,0 +1,121 @@
+import threading
+
+import pytest
+import requests
+
+from webscrapping import http_client
+from webscrapping.http_client import TokenBucket, RateLimitedSession
+
+
+class FakeClock:
+    """Stands in for the time module; sleep() advances the clock instead of waiting."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    perf_counter = monotonic
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(http_client, "time", clock)
+    return clock
+
+
+def test_burst_then_one_token_per_interval(clock):
+    bucket = TokenBucket(rate=2, capacity=3)
+    for _ in range(3):
+        bucket.acquire()
+    assert clock.sleeps == []
+    started = clock.now
+    for _ in range(4):
+        bucket.acquire()
+    assert clock.now - started == pytest.approx(2.0)
+
+
+def test_idle_time_refills_up_to_capacity(clock):
+    bucket = TokenBucket(rate=1, capacity=2)
+    bucket.acquire()
+    bucket.acquire()
+    clock.now += 60
+    bucket.acquire()
+    bucket.acquire()
+    assert clock.sleeps == []
+    bucket.acquire()
+    assert sum(clock.sleeps) == pytest.approx(1.0)
+
+
+def test_threads_share_the_rate():
+    bucket = TokenBucket(rate=50, capacity=1)
+    bucket.acquire()
+    started = http_client.time.monotonic()
+    threads = [threading.Thread(target=bucket.acquire) for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # 10 more tokens at 50 per second cannot take less than 0.2s, whichever thread gets them
+    assert http_client.time.monotonic() - started >= 0.19
+
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.text = f"status {status_code}"
+        self.content = self.text.encode("utf-8")
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(self.text, response=self)
+
+
+class FakeSession:
+    def __init__(self, statuses):
+        self.statuses = list(statuses)
+        self.urls = []
+
+    def get(self, url, headers=None, timeout=None):
+        self.urls.append(url)
+        return self.statuses.pop(0)
+
+
+def test_session_retries_throttled_responses(clock):
+    session = RateLimitedSession(rate=100, burst=10, max_retries=2)
+    session.session = FakeSession([FakeResponse(429, {"Retry-After": "7"}), FakeResponse(503), FakeResponse(200)])
+    assert session.get("https://example.com/page") == "status 200"
+    assert len(session.session.urls) == 3
+    assert clock.sleeps[0] == 7
+
+
+def test_retry_after_is_capped(clock):
+    session = RateLimitedSession(rate=100, burst=10, max_retries=1)
+    session.session = FakeSession([FakeResponse(429, {"Retry-After": "86400"}), FakeResponse(200)])
+    assert session.get("https://example.com/page") == "status 200"
+    assert clock.sleeps[0] == http_client.BACKOFF_MAX
+
+
+def test_session_gives_up_after_max_retries(clock):
+    session = RateLimitedSession(rate=100, burst=10, max_retries=1)
+    session.session = FakeSession([FakeResponse(429), FakeResponse(429)])
+    with pytest.raises(requests.HTTPError):
+        session.get("https://example.com/page")
+
+
+def test_each_host_has_its_own_bucket(clock):
+    session = RateLimitedSession(rate=1, burst=1)
+    session.session = FakeSession([FakeResponse(200)] * 3)
+    session.get("https://a.example.com/")
+    session.get("https://b.example.com/")
+    assert clock.sleeps == []
+    session.get("https://a.example.com/")
+    assert sum(clock.sleeps) == pytest.approx(1.0)
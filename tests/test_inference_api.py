@@ -0,0 +1,133 @@
+import json
+import time
+import http.client
+import threading
+import urllib.error
+import urllib.request
+
+import numpy as np
+import pytest
+
+import inference_api
+from inference_api import MicroBatcher, create_server, prepare_texts
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    """Texts of every predict_batch call; 'good' texts are Positive, the rest Negative."""
+    calls = []
+
+    def predict_batch(texts, chunk_size=None):
+        calls.append(list(texts))
+        return np.array([2 if "good" in text else 0 for text in texts])
+
+    monkeypatch.setattr(inference_api, "predict_batch", predict_batch)
+    return calls
+
+
+def test_single_request_is_flushed_after_max_wait(calls):
+    batcher = MicroBatcher(max_rows=100, max_wait=0.01)
+    assert batcher.predict(["good", "bad"]) == [2, 0]
+    assert calls == [["good", "bad"]]
+    assert batcher.predict([]) == []
+    assert batcher.stats()["batches"] == 1
+
+
+def test_concurrent_requests_share_a_batch(calls):
+    batcher = MicroBatcher(max_rows=100, max_wait=0.5)
+    results = {}
+
+    def request(i):
+        results[i] = batcher.predict(["good"] * i + ["bad"])
+
+    threads = [threading.Thread(target=request, args=(i,)) for i in range(1, 4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # Each request gets back its own slice of the batched call
+    assert results == {1: [2, 0], 2: [2, 2, 0], 3: [2, 2, 2, 0]}
+    assert len(calls) == 1 and len(calls[0]) == 9
+
+
+def test_batch_is_flushed_once_max_rows_are_collected(calls):
+    batcher = MicroBatcher(max_rows=2, max_wait=5)
+    started = time.monotonic()
+    assert batcher.predict(["good", "bad"]) == [2, 0]
+    assert time.monotonic() - started < 1
+
+
+def test_trickle_of_requests_does_not_hold_the_batch_open(calls):
+    batcher = MicroBatcher(max_rows=10000, max_wait=0.3)
+    stop = threading.Event()
+
+    def trickle():
+        while not stop.is_set():
+            threading.Thread(target=batcher.predict, args=(["bad"],), daemon=True).start()
+            time.sleep(0.05)
+
+    threading.Thread(target=trickle, daemon=True).start()
+    time.sleep(0.1)
+    first = threading.Thread(target=batcher.predict, args=(["good"],), daemon=True)
+    first.start()
+    # A new request every 50ms used to restart the 300ms wait, until max_rows piled up
+    first.join(timeout=1.0)
+    stop.set()
+    assert not first.is_alive()
+
+
+def test_prediction_error_reaches_every_request(monkeypatch):
+    def predict_batch(texts, chunk_size=None):
+        raise RuntimeError("model missing")
+
+    monkeypatch.setattr(inference_api, "predict_batch", predict_batch)
+    with pytest.raises(RuntimeError):
+        MicroBatcher(max_wait=0.01).predict(["good"])
+
+
+def test_prepare_texts_rejects_non_strings():
+    assert prepare_texts(["good", ""]) == ["good", ""]
+    with pytest.raises(TypeError):
+        prepare_texts(["good", None])
+
+
+@pytest.fixture
+def url(calls):
+    server = create_server(port=0, batcher=MicroBatcher(max_wait=0.01))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/predict"
+    server.shutdown()
+    server.server_close()
+
+
+def post(url, payload):
+    request = urllib.request.Request(url, data=json.dumps(payload).encode("utf-8"), method="POST")
+    try:
+        with urllib.request.urlopen(request, timeout=5) as response:
+            return response.status, json.load(response)
+    except urllib.error.HTTPError as e:
+        return e.code, json.load(e)
+
+
+def test_predict_endpoint(url):
+    assert post(url, {"texts": ["good", "bad"]}) == (200, {"labels": ["Positive", "Negative"], "sentiments": [2, 0]})
+
+
+@pytest.mark.parametrize("item", [None, 3, ["nested"]])
+def test_non_string_text_is_a_bad_request(url, calls, item):
+    status, body = post(url, ["good", item])
+    assert status == 400
+    assert "texts[1]" in body["error"]
+    assert calls == []
+
+
+@pytest.mark.parametrize("length", ["abc", "-1"])
+def test_invalid_content_length_is_a_bad_request(url, length):
+    connection = http.client.HTTPConnection(url.split("//")[1].split("/")[0], timeout=5)
+    connection.putrequest("POST", "/predict")
+    connection.putheader("Content-Length", length)
+    connection.endheaders()
+    response = connection.getresponse()
+    assert response.status == 400
+    assert json.load(response) == {"error": "Invalid Content-Length"}
+    connection.close()
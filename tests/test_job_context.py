@@ -0,0 +1,48 @@
+import os
+
+import pytest
+
+from main import remove_files, output_path
+from utils.job_context import JobContext
+from utils.utils import setup_amazon, setup_youtube
+
+URL = "https://www.youtube.com/watch?v=abcdefghijk"
+
+
+@pytest.fixture(autouse=True)
+def shared_files(tmp_path, monkeypatch):
+    """Run in an empty directory, so any write to the shared ./textfiles fails loudly."""
+    monkeypatch.chdir(tmp_path)
+
+
+def test_jobs_on_the_same_url_do_not_share_files(tmp_path):
+    first, second = JobContext(URL, base_dir=str(tmp_path)), JobContext(URL, base_dir=str(tmp_path))
+    assert first.job_id != second.job_id
+    paths = [setup_youtube("abcdefghijk", job) for job in (first, second)]
+    assert paths[0] != paths[1]
+    for job, (folder, table_path) in zip((first, second), paths):
+        assert job.item_id == "abcdefghijk"
+        assert folder.startswith(job.workspace) and table_path.startswith(job.workspace)
+        assert os.path.isdir(folder)
+    assert output_path(first, "sentiment.csv") != output_path(second, "sentiment.csv")
+    assert not os.path.exists("textfiles")
+
+
+def test_remove_files_only_deletes_its_own_workspace(tmp_path):
+    first, second = JobContext(URL, base_dir=str(tmp_path)), JobContext(URL, base_dir=str(tmp_path))
+    folder, _ = setup_amazon("B0TESTTEST", first)
+    with open(os.path.join(folder, "page.html"), "w") as file:
+        file.write("<html></html>")
+    setup_amazon("B0TESTTEST", second)
+    remove_files(first)
+    assert not os.path.exists(first.workspace)
+    assert os.path.isdir(second.scrape_folder("B0TESTTEST"))
+    # Removing it twice is harmless
+    remove_files(first)
+
+
+def test_path_creates_its_folder(tmp_path):
+    job = JobContext(URL, job_id="fixedjobid01", base_dir=str(tmp_path))
+    path = job.path("images", "wordcloud.png")
+    assert path == os.path.join(str(tmp_path), "fixedjobid01", "images", "wordcloud.png")
+    assert os.path.isdir(os.path.dirname(path))
@@ -0,0 +1,47 @@
+import pytest
+from langdetect import detect
+
+from language_detection import classify_scripts, detect_language, detect_languages
+
+ENGLISH_WORDS = {"this", "phone", "is", "really", "great", "and", "the", "camera", "good", "love", "very", "much", "product"}
+TEXTS = [
+    "this phone is really great and the camera is good",
+    "I love this product very much",
+    "இது ஒரு நல்ல தொலைபேசி",
+    "ਇਹ ਬਹੁਤ ਵਧੀਆ ਫੋਨ ਹੈ",
+    "ఈ ఫోన్ చాలా బాగుంది",
+    "यह फोन बहुत अच्छा है",
+    "este teléfono es muy bueno",
+    "это очень хороший телефон",
+]
+
+
+@pytest.fixture(autouse=True)
+def empty_memo():
+    detect_language.cache_clear()
+
+
+def test_scripts_are_classified():
+    assert list(classify_scripts(TEXTS + [None])) == [
+        "ascii", "ascii", "tamil", "gurmukhi", "telugu", "devanagari", "latin", "cyrillic", "ascii",
+    ]
+
+
+@pytest.mark.parametrize("english_words", [None, ENGLISH_WORDS])
+def test_fast_paths_agree_with_the_full_detector(english_words):
+    languages, paths = detect_languages(TEXTS, english_words=english_words, ascii_is_english=english_words is None)
+    assert list(languages) == [detect(text) for text in TEXTS]
+    assert paths["script"] == 3
+    assert paths["ascii"] + paths["english"] == 2
+    # Only the Devanagari, Spanish and Cyrillic rows needed langdetect
+    assert paths["detector"] == 3
+
+
+def test_repeated_ambiguous_rows_hit_the_memo():
+    _, paths = detect_languages(["यह फोन बहुत अच्छा है"] * 3 + ["este teléfono es muy bueno"])
+    assert (paths["detector"], paths["cached"]) == (2, 2)
+
+
+def test_undetectable_rows_get_no_language():
+    languages, _ = detect_languages(["😀😀", "12345"], ascii_is_english=False)
+    assert list(languages) == [None, None]
@@ -0,0 +1,57 @@
+import logging
+from logging.handlers import QueueHandler
+
+import pytest
+
+import logging_config
+from logging_config import LOGGER_NAME, log_sampled, setup_logging, stop_logging
+
+
+@pytest.fixture
+def log_file(tmp_path):
+    """Logging set up afresh into a temporary file, restored to the default one afterwards."""
+    stop_logging()
+    path = tmp_path / "app_log.log"
+    yield path
+    stop_logging()
+    setup_logging()
+
+
+def queue_handlers():
+    return [handler for handler in logging.getLogger(LOGGER_NAME).handlers if isinstance(handler, QueueHandler)]
+
+
+def test_records_reach_the_file_through_the_listener(log_file):
+    logger = setup_logging(log_file=str(log_file))
+    assert setup_logging(log_file=str(log_file)) is logger
+    assert len(queue_handlers()) == 1
+    for i in range(100):
+        logger.info(f"record {i}")
+    logger.debug("below the level")
+    stop_logging()
+    lines = log_file.read_text().splitlines()
+    assert [line.split(" - ")[-1] for line in lines] == [f"record {i}" for i in range(100)]
+    assert " - INFO - " in lines[0]
+
+
+def test_stop_joins_the_listener_and_detaches_the_queue(log_file):
+    setup_logging(log_file=str(log_file))
+    thread = logging_config._listener._thread
+    assert thread.is_alive()
+    stop_logging()
+    assert not thread.is_alive()
+    assert queue_handlers() == []
+    # Stopping twice is harmless and a new set-up starts a single listener again
+    stop_logging()
+    setup_logging(log_file=str(log_file))
+    assert len(queue_handlers()) == 1
+
+
+def test_sampled_events_are_logged_once_then_every_nth(log_file):
+    logger = setup_logging(log_file=str(log_file))
+    counts = [log_sampled(logger, "test_sampled_event", "sampled event", every=3) for _ in range(7)]
+    stop_logging()
+    assert counts == list(range(1, 8))
+    assert [line.split(" - ")[-1] for line in log_file.read_text().splitlines()] == [
+        "sampled event", "sampled event (3 so far)", "sampled event (6 so far)",
+    ]
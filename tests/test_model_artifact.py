@@ -0,0 +1,107 @@
+import os
+
+import joblib
+import numpy as np
+import pytest
+from sklearn.feature_extraction.text import CountVectorizer
+from sklearn.naive_bayes import MultinomialNB
+
+import resources
+import model_artifact
+from model_artifact import SentimentArtifact, PicklePredictor, export_artifact, is_fresh, verify_artifact
+
+TRAIN = [
+    ("great phone, love the camera", 2),
+    ("terrible battery, waste of money", 0),
+    ("love it, works great", 2),
+    ("broke after a week, terrible", 0),
+    ("café quality sound, très bien", 2),
+    ("worst purchase ever", 0),
+]
+TEXTS = [
+    "love the camera",
+    "terrible terrible battery",
+    "",
+    "no known words here",
+    "CAFÉ très bien",
+    "greatgreatgreatgreatgreatgreat love",
+    "worst, broke, waste",
+]
+
+
+@pytest.fixture
+def pickles():
+    vectorizer = CountVectorizer()
+    matrix = vectorizer.fit_transform([text for text, _ in TRAIN])
+    model = MultinomialNB().fit(matrix, [label for _, label in TRAIN])
+    return model, vectorizer
+
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_artifact_matches_the_pickles(tmp_path, pickles, mmap):
+    model, vectorizer = pickles
+    artifact = SentimentArtifact(export_artifact(model, vectorizer, str(tmp_path)), mmap=mmap)
+    assert (artifact.transform(TEXTS) != vectorizer.transform(TEXTS)).nnz == 0
+    assert list(artifact.predict_texts(TEXTS)) == list(model.predict(vectorizer.transform(TEXTS)))
+    assert artifact.vocabulary_ == vectorizer.vocabulary_
+    assert verify_artifact(artifact, model, vectorizer, TEXTS, chunk_size=3) == 0
+    assert list(artifact.predict_texts(TEXTS)) == list(PicklePredictor(model, vectorizer).predict_texts(TEXTS))
+
+
+def test_artifact_rejects_non_string_documents(tmp_path, pickles):
+    artifact = SentimentArtifact(export_artifact(*pickles, str(tmp_path)))
+    with pytest.raises(ValueError):
+        artifact.transform(["fine", None])
+
+
+def test_unsupported_vectorizer_is_not_exported(tmp_path, pickles):
+    model, _ = pickles
+    vectorizer = CountVectorizer(ngram_range=(1, 2)).fit([text for text, _ in TRAIN])
+    with pytest.raises(ValueError):
+        export_artifact(model, vectorizer, str(tmp_path))
+
+
+def test_artifact_is_stale_once_a_source_changes(tmp_path, pickles):
+    source = tmp_path / "model.pkl"
+    source.write_bytes(b"v1")
+    folder = export_artifact(*pickles, str(tmp_path / "artifact"), sources=[str(source)])
+    assert is_fresh(folder)
+    source.write_bytes(b"v2")
+    assert not is_fresh(folder)
+    assert not is_fresh(str(tmp_path / "missing"))
+
+
+@pytest.fixture
+def model_dir(tmp_path, monkeypatch, pickles):
+    """A working directory holding the pickles where resources expects them."""
+    for name in ("model", "vectorizer", "predictor"):
+        resources.registry.reset(name)
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("model")
+    model, vectorizer = pickles
+    joblib.dump(model, resources.MODEL_PATH)
+    joblib.dump(vectorizer, resources.VECTORIZER_PATH)
+    yield pickles
+    for name in ("model", "vectorizer", "predictor"):
+        resources.registry.reset(name)
+
+
+def test_load_predictor_prefers_a_fresh_artifact(model_dir):
+    model, vectorizer = model_dir
+    assert isinstance(resources.load_predictor(), PicklePredictor)
+    export_artifact(model, vectorizer, model_artifact.ARTIFACT_DIR,
+                    sources=[resources.MODEL_PATH, resources.VECTORIZER_PATH])
+    predictor = resources.load_predictor()
+    assert isinstance(predictor, SentimentArtifact)
+    assert list(predictor.predict_texts(TEXTS)) == list(model.predict(vectorizer.transform(TEXTS)))
+
+
+def test_load_predictor_falls_back_to_the_pickles_when_stale(model_dir):
+    model, vectorizer = model_dir
+    export_artifact(model, vectorizer, model_artifact.ARTIFACT_DIR,
+                    sources=[resources.MODEL_PATH, resources.VECTORIZER_PATH])
+    retrained = MultinomialNB(alpha=0.5).fit(vectorizer.transform([text for text, _ in TRAIN]), [0, 0, 2, 2, 0, 2])
+    joblib.dump(retrained, resources.MODEL_PATH)
+    predictor = resources.load_predictor()
+    assert isinstance(predictor, PicklePredictor)
+    assert np.array_equal(predictor.predict_texts(TEXTS), retrained.predict(vectorizer.transform(TEXTS)))
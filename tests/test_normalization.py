@@ -0,0 +1,39 @@
+import pandas as pd
+import pytest
+
+import standardizing_data
+from standardizing_data import clean_text, normalize_series, remove_stop_words_series
+
+TEXTS = [
+    "Great phone!!! 10/10 would buy again 😀",
+    "  lots   of\tspaces\nand lines  ",
+    "ünïcödé café — très bien…",
+    "₹999 only, ★★★★☆",
+    "",
+    "12345",
+    "🚀🔥👍",
+    "it's the best, isn't it?",
+]
+
+
+@pytest.fixture(autouse=True)
+def stop_words(monkeypatch):
+    monkeypatch.setattr(standardizing_data, "get_stop_words", lambda: {"the", "it", "and", "of"})
+
+
+@pytest.mark.parametrize("texts", [TEXTS, TEXTS + ["a\x00separator inside"]], ids=["joined", "row_by_row"])
+def test_matches_clean_text(texts):
+    index = pd.RangeIndex(10, 10 + len(texts))
+    normalized = normalize_series(pd.Series(texts, index=index))
+    assert list(normalized) == [clean_text(text) for text in texts]
+    assert normalized.index.equals(index)
+
+
+def test_stop_words_are_removed_in_the_same_pass():
+    expected = remove_stop_words_series([clean_text(text) for text in TEXTS])
+    assert list(normalize_series(TEXTS, remove_stop_words=True)) == list(expected)
+    assert normalize_series(["The best of it"], remove_stop_words=True)[0] == "best"
+
+
+def test_empty_column():
+    assert normalize_series([]).empty
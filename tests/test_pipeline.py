@@ -0,0 +1,28 @@
+from pipeline import batched, record_key
+
+
+def test_batched_drops_duplicates_and_empty_texts():
+    records = [
+        {"text": "good", "item_key": "a"},
+        {"text": "good", "item_key": "a"},
+        {"text": "", "item_key": "b"},
+        {"text": None, "item_key": "c"},
+        {"text": "bad", "author": "x"},
+        {"text": "bad", "author": "x"},
+        {"text": "bad", "author": "y"},
+    ]
+    batches = list(batched(records, "text", batch_size=2))
+    assert [len(batch) for batch in batches] == [2, 1]
+    assert [record.get("item_key") or record["author"] for batch in batches for record in batch] == ["a", "x", "y"]
+
+
+def test_record_key_prefers_the_item_key():
+    assert record_key({"text": "good", "item_key": "a"}) == "a"
+    assert record_key({"text": "good", "author": "x"}) == record_key({"author": "x", "text": "good"})
+
+
+def test_batched_only_remembers_recent_keys():
+    records = [{"text": "t", "item_key": key} for key in ["a", "b", "c", "a", "c"]]
+    batches = list(batched(records, "text", max_seen=2))
+    # 'a' has left the window by the time it repeats, 'c' has not
+    assert [record["item_key"] for record in batches[0]] == ["a", "b", "c", "a"]
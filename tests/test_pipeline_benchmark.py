@@ -0,0 +1,33 @@
+from benchmarks.pipeline_benchmark import PERCENTILES, print_stages, split, time_stage
+
+
+def test_split_keeps_every_item_in_order():
+    assert split(list(range(7)), 3) == [[0, 1, 2], [3, 4, 5], [6]]
+    assert split([], 3) == []
+
+
+def test_time_stage_reports_rows_latency_and_memory():
+    calls = []
+
+    def func(batch):
+        calls.append(list(batch))
+        return [item * 2 for item in batch]
+
+    outputs, stats = time_stage(split(list(range(10)), 4), func, reset=lambda: calls.append("reset"))
+    assert outputs == [[0, 2, 4, 6], [8, 10, 12, 14], [16, 18]]
+    # One warm-up call, then a timed and a traced pass each after a reset
+    assert calls.count("reset") == 2 and len(calls) == 1 + 2 * (1 + 3)
+    assert (stats["rows"], stats["batches"]) == (10, 3)
+    assert set(stats["batch_latency_ms"]) == {f"p{p}" for p in PERCENTILES} | {"max"}
+    assert stats["peak_memory_mb"] is not None
+
+
+def test_time_stage_counts_rows_with_rows_of():
+    _, stats = time_stage([[1, 2], [3]], sum, rows_of=lambda batch: 10, trace_memory=False)
+    assert stats["rows"] == 20 and stats["peak_memory_mb"] is None
+
+
+def test_print_stages_compares_against_a_baseline(capsys):
+    stats = {"rows": 10, "rows_per_sec": 200.0, "batch_latency_ms": {"p50": 1.0, "p99": 2.0}, "peak_memory_mb": None}
+    print_stages({"clean": stats}, baseline={"clean": dict(stats, rows_per_sec=100.0)})
+    assert capsys.readouterr().out.splitlines()[-1].endswith("2.00x")
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+from sklearn.feature_extraction.text import CountVectorizer
+from sklearn.naive_bayes import MultinomialNB
+
+import standardizing_data
+from model_artifact import PicklePredictor
+from standardizing_data import predict_batch, predict_input_text
+
+TRAIN = [
+    ("great phone, love the camera", 2),
+    ("terrible battery, waste of money", 0),
+    ("love it, works great", 2),
+    ("broke after a week, terrible", 0),
+]
+TEXTS = ["love the camera", "terrible battery", "", "no known words", "works great", "waste, broke", "great"]
+
+
+class BrokenRows(PicklePredictor):
+    """Fails to vectorize any batch holding the text 'boom'."""
+
+    def transform(self, texts):
+        if "boom" in texts:
+            raise ValueError("boom")
+        return super().transform(texts)
+
+
+@pytest.fixture
+def predictor(monkeypatch):
+    vectorizer = CountVectorizer()
+    model = MultinomialNB().fit(vectorizer.fit_transform([text for text, _ in TRAIN]), [label for _, label in TRAIN])
+    predictor = BrokenRows(model, vectorizer)
+    monkeypatch.setattr(standardizing_data, "get_predictor", lambda: predictor)
+    return predictor
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 100])
+def test_chunks_match_predicting_row_by_row(predictor, chunk_size):
+    expected = [predict_input_text(text) for text in TEXTS]
+    predictions = predict_batch(TEXTS, chunk_size=chunk_size)
+    assert isinstance(predictions, np.ndarray) and len(predictions) == len(TEXTS)
+    assert list(predictions) == expected
+    assert set(expected) == {0, 2}
+
+
+def test_bad_rows_fall_back_without_dropping_the_chunk(predictor):
+    texts = ["love the camera", None, "boom", "terrible battery", 3.5]
+    predictions = predict_batch(texts, chunk_size=10)
+    assert list(predictions) == [predict_input_text("love the camera"), -1, -1, predict_input_text("terrible battery"), -1]
+
+
+def test_no_texts(predictor):
+    assert len(predict_batch([])) == 0
@@ -0,0 +1,179 @@
+import sqlite3
+
+import pytest
+
+import main
+from pipeline import PipelineCancelled
+from result_store import ResultStore, bucket_start, detect_trend, item_key
+
+
+def comment(published_at, text, label="Positive"):
+    record = {"published_at": published_at, "text": text, "Sentiment_Label": label}
+    record["item_key"] = item_key("YouTube", record)
+    return record
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ResultStore(str(tmp_path / "results.sqlite3"))
+
+
+def test_merge_skips_stored_items(store):
+    first = [comment("2024-01-01T10:00:00Z", "great"), comment("2024-01-01T11:00:00Z", "bad", "Negative")]
+    assert store.merge("YouTube", "vid", first) == 2
+    assert store.merge("YouTube", "vid", first + [comment("2024-01-02T09:00:00Z", "fine")]) == 1
+    assert store.counts("YouTube", "vid") == {"Positive": 2, "Negative": 1}
+    assert len(store.known_keys("YouTube", "vid")) == 3
+
+
+def test_merge_tracks_newest_comment(store):
+    store.merge("YouTube", "vid", [comment("2024-01-02T09:00:00Z", "a"), comment("2024-01-01T10:00:00Z", "b")])
+    store.merge("YouTube", "vid", [comment("2024-01-03T09:00:00Z", "c")])
+    state = store.crawl_state("YouTube", "vid")
+    assert state["last_seen"] == "2024-01-03T09:00:00Z"
+
+
+def test_is_fresh_needs_a_complete_recent_crawl(tmp_path):
+    store = ResultStore(str(tmp_path / "results.sqlite3"), ttl=60)
+    assert not store.is_fresh("Amazon", "B1")
+    store.start_crawl("Amazon", "B1")
+    assert not store.is_fresh("Amazon", "B1")
+    store.mark_refreshed("Amazon", "B1", complete=False)
+    assert not store.is_fresh("Amazon", "B1")
+    store.mark_refreshed("Amazon", "B1")
+    assert store.is_fresh("Amazon", "B1")
+    assert not ResultStore(store.path, ttl=0).is_fresh("Amazon", "B1")
+
+
+def test_time_series_fills_empty_buckets(store):
+    store.merge("YouTube", "vid", [
+        comment("2024-01-01T10:00:00Z", "a"),
+        comment("2024-01-01T12:00:00Z", "b", "Negative"),
+        comment("2024-01-03T08:00:00Z", "c"),
+    ])
+    series = store.time_series("YouTube", "vid", "day")
+    assert list(series["Bucket"].dt.day) == [1, 2, 3]
+    assert list(series["Total"]) == [2, 0, 1]
+    assert list(series["Positive"]) == [1, 0, 1]
+    assert len(store.time_series("YouTube", "vid", "day", since="2024-01-02T00:00:00Z")) == 1
+
+
+@pytest.mark.parametrize("timestamp, granularity, expected", [
+    ("2024-01-03T10:59:59Z", "hour", "2024-01-03T10:00:00Z"),
+    ("2024-01-03T10:59:59Z", "day", "2024-01-03T00:00:00Z"),
+    # 2024-01-03 is a Wednesday, its week starts on Monday the 1st
+    ("2024-01-03T10:59:59Z", "week", "2024-01-01T00:00:00Z"),
+    ("2024-01-01T00:00:00Z", "week", "2024-01-01T00:00:00Z"),
+    ("2023-12-31T23:59:59Z", "week", "2023-12-25T00:00:00Z"),
+    # Offsets are moved to UTC before bucketing
+    ("2024-01-01T02:30:00+05:30", "day", "2023-12-31T00:00:00Z"),
+    ("2024-01-01T02:30:00+05:30", "hour", "2023-12-31T21:00:00Z"),
+    ("2024-01-01T10:15:00", "hour", "2024-01-01T10:00:00Z"),
+])
+def test_bucket_start(timestamp, granularity, expected):
+    assert bucket_start(timestamp, granularity) == expected
+
+
+@pytest.mark.parametrize("timestamp, granularity", [("2024-01-01T10:00:00Z", "month"), ("yesterday", "day")])
+def test_bucket_start_rejects_bad_input(timestamp, granularity):
+    with pytest.raises(ValueError):
+        bucket_start(timestamp, granularity)
+
+
+def test_incremental_buckets_match_a_rebuild(store):
+    comments = [comment(f"2024-01-{day:02d}T{hour:02d}:00:00Z", f"c{day}-{hour}", label)
+                for day in range(1, 15) for hour, label in ((9, "Positive"), (21, "Negative"))]
+    for start in range(0, len(comments), 5):
+        store.merge("YouTube", "vid", comments[start:start + 5])
+    store.merge("YouTube", "vid", [comment("not a date", "unbucketed")])
+    incremental = {granularity: store.time_series("YouTube", "vid", granularity) for granularity in ("hour", "day", "week")}
+    assert store.rebuild_time_series("YouTube", "vid") == len(comments) + 1
+    for granularity, series in incremental.items():
+        assert store.time_series("YouTube", "vid", granularity).equals(series)
+        assert series["Total"].sum() == len(comments)
+    assert list(incremental["week"]["Total"]) == [14, 14]
+
+
+def test_detect_trend(store):
+    store.merge("YouTube", "vid", [comment(f"2024-01-{day:02d}T10:00:00Z", f"c{day}") for day in range(1, 8)])
+    store.merge("YouTube", "vid", [comment(f"2024-01-08T1{i}:00:00Z", f"n{i}", "Negative") for i in range(3)])
+    series = store.time_series("YouTube", "vid", "day")
+    assert detect_trend(series) == {"volume_ratio": 3.0, "positive_share_change": -1.0}
+    assert detect_trend(series.iloc[:1]) is None
+
+
+def test_time_series_rebuilds_missing_buckets(store):
+    store.merge("YouTube", "vid", [comment("2024-01-01T10:00:00Z", "a")])
+    store._conn.execute("DELETE FROM series")
+    assert list(store.time_series("YouTube", "vid", "week")["Total"]) == [1]
+
+
+def test_store_without_crawl_state_is_upgraded(tmp_path):
+    path = str(tmp_path / "old.sqlite3")
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE runs (source TEXT NOT NULL, item_id TEXT NOT NULL, updated_at REAL NOT NULL, "
+                     "last_seen TEXT, PRIMARY KEY (source, item_id))")
+        conn.execute("INSERT INTO runs VALUES ('YouTube', 'vid', 0, '2024-01-01T10:00:00Z')")
+    state = ResultStore(path).crawl_state("YouTube", "vid")
+    assert state == {"complete": False, "last_seen": "2024-01-01T10:00:00Z"}
+
+
+# Newest first, like the YouTube API returns them
+COMMENTS = [{"published_at": f"2024-01-0{day}T10:00:00Z", "text": f"comment {day}"} for day in range(9, 0, -1)]
+
+
+def fake_run_pipeline(fail_after=None):
+    def run_pipeline(records, text_field, sink, **kwargs):
+        for i, record in enumerate(records):
+            if fail_after is not None and i == fail_after:
+                raise PipelineCancelled("cancelled")
+            for each in sink:
+                each.write([dict(record, Sentiment_Label="Positive")])
+    return run_pipeline
+
+
+def youtube_fetch(fetched):
+    """fetch() like yotutbe_main's, stopping at the newest stored comment when given the store."""
+    def fetch(store, on_error=None):
+        newer_than = store.last_seen("YouTube", "vid") if store is not None else None
+        fetched.append(newer_than)
+        return (c for c in COMMENTS if newer_than is None or c["published_at"] >= newer_than)
+    return fetch
+
+
+def test_refresh_after_cancelled_crawl_reads_older_items(store, monkeypatch):
+    monkeypatch.setattr(main, "get_result_store", lambda: store)
+    fetched = []
+    monkeypatch.setattr(main, "run_pipeline", fake_run_pipeline(fail_after=3))
+    with pytest.raises(PipelineCancelled):
+        main.analyze_stream("YouTube", "vid", youtube_fetch(fetched), "text")
+    assert store.counts("YouTube", "vid") == {"Positive": 3}
+    assert not store.crawl_state("YouTube", "vid")["complete"]
+
+    monkeypatch.setattr(main, "run_pipeline", fake_run_pipeline())
+    counts = main.analyze_stream("YouTube", "vid", youtube_fetch(fetched), "text")
+    assert fetched == [None, None]
+    assert counts["Count"].sum() == len(COMMENTS)
+    assert store.crawl_state("YouTube", "vid") == {"complete": True, "last_seen": "2024-01-09T10:00:00Z"}
+
+    # Once complete, a refresh only reads what is newer than the stored comments
+    main.analyze_stream("YouTube", "vid", youtube_fetch(fetched), "text", refresh=True)
+    assert fetched[-1] == "2024-01-09T10:00:00Z"
+    assert store.counts("YouTube", "vid") == {"Positive": len(COMMENTS)}
+
+
+def test_crawl_with_skipped_pages_is_not_complete(store, monkeypatch):
+    monkeypatch.setattr(main, "get_result_store", lambda: store)
+    monkeypatch.setattr(main, "run_pipeline", fake_run_pipeline())
+    seen = []
+
+    def fetch(store, on_error=None):
+        seen.append(store)
+        on_error(RuntimeError("page 2 failed"))
+        return iter(COMMENTS[:3])
+
+    main.analyze_stream("YouTube", "vid", fetch, "text")
+    assert not store.is_fresh("YouTube", "vid")
+    main.analyze_stream("YouTube", "vid", fetch, "text")
+    assert seen == [None, None]
+    assert store.counts("YouTube", "vid") == {"Positive": 3}
@@ -0,0 +1,92 @@
+import pytest
+
+import sampling
+from sampling import proportion_interval, shuffled, sample_sentiment, SampledTally, SAMPLE_ALL, SAMPLE_RANDOM, SAMPLE_RECENT
+
+
+def test_no_rows_means_no_information():
+    assert proportion_interval(0, 0) == (0.0, 1.0)
+
+
+def test_interval_contains_share_and_narrows_with_n():
+    low, high = proportion_interval(30, 100)
+    assert low < 0.3 < high
+    # Wilson interval for 30/100 at 95%
+    assert (low, high) == pytest.approx((0.2189, 0.3958), abs=1e-4)
+    wide = high - low
+    low, high = proportion_interval(300, 1000)
+    assert high - low < wide
+
+
+@pytest.mark.parametrize("count", [0, 50])
+def test_extreme_shares_stay_within_bounds(count):
+    low, high = proportion_interval(count, 50)
+    assert 0.0 <= low <= count / 50 <= high <= 1.0
+    assert high - low > 0
+
+
+def test_finite_population_correction_narrows_the_interval():
+    low, high = proportion_interval(30, 100)
+    fpc_low, fpc_high = proportion_interval(30, 100, population=150)
+    assert low < fpc_low < 0.3 < fpc_high < high
+    # A huge population makes almost no difference
+    assert proportion_interval(30, 100, population=10 ** 9) == pytest.approx((low, high), abs=1e-6)
+
+
+@pytest.mark.parametrize("population", [100, 80])
+def test_whole_population_is_exact(population):
+    assert proportion_interval(30, 100, population=population) == (0.3, 0.3)
+
+
+def test_tally_reports_shares_with_intervals():
+    tally = SampledTally(["Negative", "Positive"])
+    assert tally.margin() == 1.0
+    tally.update(["Positive"] * 60 + ["Negative"] * 40)
+    estimate = tally.estimate()
+    assert estimate["Positive"]["share"] == 0.6
+    assert estimate["Positive"]["low"] < 0.6 < estimate["Positive"]["high"]
+
+
+def test_failed_predictions_are_left_out_of_rows_and_shares():
+    tally = SampledTally(["Negative", "Positive"])
+    tally.update(["Positive"] * 60 + ["Negative"] * 40 + [None] * 20)
+    assert tally.rows == sum(item["count"] for item in tally.estimate().values()) == 100
+    assert tally.unlabeled == 20
+
+
+def test_shuffled_keeps_every_record():
+    records = list(range(100))
+    assert sorted(shuffled(records, seed=1)) == records
+    assert sorted(shuffled(iter(records), buffer_size=10, seed=1)) == records
+    assert list(shuffled(records, seed=1)) != records
+
+
+@pytest.fixture
+def fake_pipeline(monkeypatch):
+    """run_pipeline reading batches of 100 records, all labeled Positive, until stopped."""
+    def run(records, text_field, on_update=None, tally=None, stop=None, **options):
+        batch = []
+        for record in records:
+            batch.append(record)
+            if len(batch) == 100:
+                tally.update(["Positive"] * len(batch))
+                on_update(tally)
+                batch = []
+                if stop.is_set():
+                    break
+        if batch:
+            tally.update(["Positive"] * len(batch))
+        return tally
+
+    monkeypatch.setattr(sampling, "run_pipeline", run)
+
+
+@pytest.mark.parametrize("records, population, sample", [
+    (lambda: [{"text": "t"}] * 5000, None, SAMPLE_RANDOM),
+    (lambda: iter([{"text": "t"}] * 5000), 5000, SAMPLE_RECENT),
+    (lambda: iter([{"text": "t"}] * 300), 300, SAMPLE_ALL),
+])
+def test_sample_tells_what_the_rows_cover(fake_pipeline, records, population, sample):
+    tally = sample_sentiment(records(), "text", margin=0.05, min_rows=400, population=population, labels=["Positive"])
+    assert tally.sample == sample
+    assert tally.to_frame().attrs["sample"] == sample
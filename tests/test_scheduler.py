@@ -0,0 +1,79 @@
+import os
+import threading
+
+import pytest
+
+import metrics
+import scheduler
+from pipeline import PipelineCancelled
+from scheduler import JobScheduler, CANCELLED, DONE
+from utils.job_context import JobContext
+
+
+@pytest.fixture
+def runner(monkeypatch):
+    """A runner that writes to the workspace until released or cancelled."""
+    state = {"started": threading.Event(), "release": threading.Event(), "workspace_seen": []}
+
+    def run(job, on_update=None, progress=None, cancel=None, **options):
+        state["started"].set()
+        metrics.inc("test_runner_total")
+        while not state["release"].wait(0.01):
+            if cancel.is_set():
+                # The workspace must still be there while the worker stops
+                state["workspace_seen"].append(os.path.isdir(job.workspace))
+                raise PipelineCancelled("cancelled")
+        return "YouTube", "counts"
+
+    monkeypatch.setitem(scheduler.RUNNERS, "YouTube", run)
+    return state
+
+
+@pytest.fixture
+def jobs(tmp_path):
+    jobs = JobScheduler(max_jobs=1)
+    yield jobs
+    jobs.shutdown()
+
+
+def test_running_job_is_forgotten_once_it_stops(tmp_path, runner, jobs):
+    context = JobContext("https://youtu.be/abcdefghijk", base_dir=str(tmp_path))
+    job_id = jobs.submit("YouTube", context=context)
+    assert runner["started"].wait(5)
+    jobs.cancel(job_id)
+    assert jobs.forget_when_finished(job_id)
+    jobs.shutdown(cancel=False)
+    assert runner["workspace_seen"] == [True]
+    assert jobs.get(job_id) is None
+    assert not os.path.exists(context.workspace)
+    assert not [key for key in metrics.registry.export()["counters"] if ("job_id", job_id) in key[1]]
+
+
+def test_finished_job_is_forgotten_at_once(tmp_path, runner, jobs):
+    context = JobContext("https://youtu.be/abcdefghijk", base_dir=str(tmp_path))
+    runner["release"].set()
+    job_id = jobs.submit("YouTube", context=context)
+    jobs.shutdown(cancel=False)
+    assert jobs.get(job_id).status == DONE
+    assert jobs.forget_when_finished(job_id)
+    assert jobs.get(job_id) is None
+    assert not os.path.exists(context.workspace)
+
+
+def test_pending_job_is_forgotten_without_running(tmp_path, runner, jobs):
+    first = jobs.submit("YouTube", context=JobContext("https://youtu.be/aaaaaaaaaaa", base_dir=str(tmp_path)))
+    assert runner["started"].wait(5)
+    context = JobContext("https://youtu.be/bbbbbbbbbbb", base_dir=str(tmp_path))
+    job_id = jobs.submit("YouTube", context=context)
+    job = jobs.get(job_id)
+    jobs.cancel(job_id)
+    assert jobs.forget_when_finished(job_id)
+    runner["release"].set()
+    jobs.shutdown(cancel=False)
+    assert job.status == CANCELLED
+    assert jobs.get(job_id) is None and jobs.get(first) is not None
+    assert not os.path.exists(context.workspace)
+
+
+def test_unknown_job(jobs):
+    assert not jobs.forget_when_finished("missing")
@@ -0,0 +1,56 @@
+from spell_correction import SymSpellIndex, SpellCorrector, WordCache, trusted_words, load_index
+
+
+def make_corrector(cache=None):
+    counts = {"love": 500, "lov": 3, "really": 300, "realy": 7, "im": 1900, "phone": 200}
+    spelling = {"love": 500, "really": 300, "phone": 200}
+    index = SymSpellIndex(counts, trusted=trusted_words(counts, spelling, min_known_count=20))
+    return SpellCorrector(index, cache=cache)
+
+
+def test_rare_dataset_words_are_corrected():
+    assert make_corrector().correct("i lov this realy") == "i love this really"
+
+
+def test_frequent_slang_is_left_alone():
+    assert make_corrector().correct("im happy") == "im happy"
+
+
+def test_index_is_rebuilt_for_another_min_known_count(tmp_path):
+    dataset = tmp_path / "dataset.csv"
+    dataset.write_text("text\n" + "im fine\n" * 25 + "gud day\n" * 5)
+    index_path = str(tmp_path / "index.pkl")
+    index = load_index(str(dataset), index_path=index_path, min_known_count=20)
+    assert "im" in index and "gud" not in index
+    assert load_index(str(dataset), index_path=index_path, min_known_count=20).trusted == index.trusted
+    assert "gud" in load_index(str(dataset), index_path=index_path, min_known_count=5)
+
+
+def test_capitalization_is_kept():
+    assert make_corrector().correct("Lov") == "Love"
+
+
+def test_corrections_are_cached(tmp_path):
+    cache = WordCache(path=str(tmp_path / "cache.json"))
+    corrector = make_corrector(cache=cache)
+    corrector.correct("lov lov")
+    assert (cache.misses, cache.hits) == (1, 1)
+    cache.save()
+    assert WordCache(path=str(tmp_path / "cache.json")).get("lov") == "love"
+
+
+def test_parent_cache_does_not_keep_new_entries(tmp_path):
+    cache = WordCache(path=str(tmp_path / "cache.json"), max_size=10)
+    for i in range(1000):
+        cache.put(f"word{i}", f"corrected{i}")
+    cache.save()
+    assert len(cache) == 10
+    assert cache.take_new() == {}
+
+
+def test_worker_cache_hands_over_new_entries(tmp_path, monkeypatch):
+    monkeypatch.setattr(WordCache, "track_new", True)
+    cache = WordCache(path=str(tmp_path / "cache.json"))
+    cache.put("lov", "love")
+    assert cache.take_new() == {"lov": "love"}
+    assert cache.take_new() == {}
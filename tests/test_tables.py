@@ -0,0 +1,97 @@
+import os
+
+import pytest
+import pyarrow.parquet as pq
+
+from tables import TableWriter, read_table, write_table, table_exists, partial_dir, REVIEW_COLUMNS, COMMENT_COLUMNS
+
+FORMATS = ["parquet", "csv"]
+
+
+def reviews(start, stop, category="five_star"):
+    return [{"category": category, "review": f"review {i}", "ignored": i} for i in range(start, stop)]
+
+
+@pytest.mark.parametrize("fmt", FORMATS)
+def test_append_keeps_existing_rows(tmp_path, fmt):
+    path = str(tmp_path / f"reviews.{fmt}")
+    with TableWriter(path, REVIEW_COLUMNS) as writer:
+        writer.write(reviews(0, 3))
+    with TableWriter(path, REVIEW_COLUMNS, append=True) as writer:
+        writer.write(reviews(3, 5, "one_star"))
+    df = read_table(path)
+    assert df["review"].tolist() == [f"review {i}" for i in range(5)]
+    assert list(df.columns) == REVIEW_COLUMNS
+    assert str(df["category"].dtype) == "category"
+
+
+@pytest.mark.parametrize("fmt", FORMATS)
+def test_without_append_the_table_is_replaced(tmp_path, fmt):
+    path = str(tmp_path / f"reviews.{fmt}")
+    for start in (0, 10):
+        with TableWriter(path, REVIEW_COLUMNS) as writer:
+            writer.write(reviews(start, start + 2))
+    assert read_table(path)["review"].tolist() == ["review 10", "review 11"]
+
+
+def test_flushed_rows_survive_a_writer_that_is_never_closed(tmp_path):
+    path = str(tmp_path / "reviews.parquet")
+    with TableWriter(path, REVIEW_COLUMNS) as writer:
+        writer.write(reviews(0, 2))
+
+    killed = TableWriter(path, REVIEW_COLUMNS, append=True)
+    killed.write(reviews(2, 4))
+    killed.flush()
+    killed.write(reviews(4, 6))  # Buffered only, lost with the process
+    del killed
+    assert table_exists(path) and os.path.isdir(partial_dir(path))
+    # The complete table is untouched until the parts are merged
+    assert len(read_table(path)) == 2
+
+    with TableWriter(path, REVIEW_COLUMNS, append=True) as writer:
+        writer.write(reviews(6, 7))
+    assert read_table(path)["review"].tolist() == [f"review {i}" for i in (0, 1, 2, 3, 6)]
+    assert not os.path.exists(partial_dir(path))
+
+
+def test_parts_alone_are_resumed(tmp_path):
+    path = str(tmp_path / "comments.parquet")
+    killed = TableWriter(path, COMMENT_COLUMNS)
+    killed.write([{"published_at": "2024-01-01T00:00:00Z", "text": "first"}])
+    killed.flush()
+    del killed
+    assert not os.path.exists(path) and table_exists(path)
+    with TableWriter(path, COMMENT_COLUMNS, append=True) as writer:
+        writer.write([{"published_at": "2024-01-02T00:00:00Z", "text": "second"}])
+    df = read_table(path)
+    assert df["text"].tolist() == ["first", "second"]
+    assert str(df["published_at"].dtype) == "datetime64[us, UTC]"
+
+
+def test_rows_are_merged_into_row_groups(tmp_path):
+    path = str(tmp_path / "reviews.parquet")
+    with TableWriter(path, REVIEW_COLUMNS, row_group_size=4) as writer:
+        for i in range(10):
+            writer.write(reviews(i, i + 1))
+            writer.flush()
+    assert pq.ParquetFile(path).metadata.num_row_groups == 3
+    assert len(read_table(path)) == 10
+
+
+@pytest.mark.parametrize("fmt", FORMATS)
+def test_read_table_projects_columns(tmp_path, fmt):
+    path = str(tmp_path / f"normalized.{fmt}")
+    write_table(read_table_input(), path)
+    df = read_table(path, columns=["text"])
+    assert list(df.columns) == ["text"]
+    assert str(read_table(path)["Sentiment"].dtype) == "int8"
+
+
+def read_table_input():
+    import pandas as pd
+    return pd.DataFrame({
+        "published_at": ["2024-01-01T00:00:00Z", "2024-01-02T00:00:00Z"],
+        "text": ["good", "bad"],
+        "Sentiment": [2, 0],
+        "Sentiment_Label": ["Positive", "Negative"],
+    })
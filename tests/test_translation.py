@@ -0,0 +1,71 @@
+import pytest
+
+from translation import TranslationCache, CachedTranslator, DictionaryBackend, GoogleTranslateBackend
+
+
+class FakeGoogleTranslator:
+    """Upper-cases text like a translation; rejects long texts like deep_translator's length check."""
+
+    def __init__(self, max_length=20):
+        self.max_length = max_length
+        self.calls = 0
+
+    def translate(self, text):
+        self.calls += 1
+        if len(text) > self.max_length:
+            raise ValueError("NotValidLength")
+        return text.upper()
+
+
+class FakeGoogleBackend(GoogleTranslateBackend):
+    def __init__(self, translator, **kwargs):
+        super().__init__(**kwargs)
+        self.translator = translator
+
+    def _translator(self, source):
+        return self.translator
+
+
+@pytest.fixture
+def cache():
+    cache = TranslationCache(":memory:")
+    yield cache
+    cache.close()
+
+
+def test_cache_counts_hits_and_misses(cache):
+    translator = CachedTranslator(DictionaryBackend({"hola": "hello", "adios": "bye"}), cache)
+    assert translator.translate_many(["hola", "adios", "hola"], "es") == ["hello", "bye", "hello"]
+    assert (cache.hits, cache.misses) == (0, 2)
+    assert translator.translate_many(["hola", "gracias"], "es") == ["hello", "gracias"]
+    assert (cache.hits, cache.misses) == (1, 3)
+
+
+def test_cache_is_keyed_by_source_language(cache):
+    cache.put_many("es", {"no": "no"})
+    assert cache.get_many("es", ["no"]) == {"no": "no"}
+    assert cache.get_many("hi", ["no"]) == {}
+
+
+def test_backend_is_not_called_for_cached_texts(cache):
+    backend = DictionaryBackend({"hola": "hello"})
+    translator = CachedTranslator(backend, cache)
+    translator.translate_many(["hola"], "es")
+    translator.translate_many(["hola"], "es")
+    assert backend.calls == 1
+
+
+def test_one_failing_text_only_loses_that_text(cache):
+    # The batch exceeds the fake limit as a whole, and so does "a very long text indeed"
+    backend = FakeGoogleBackend(FakeGoogleTranslator(max_length=20))
+    translator = CachedTranslator(backend, cache)
+    texts = ["uno", "a very long text indeed", "dos"]
+    assert translator.translate_many(texts, "es") == ["UNO", "a very long text indeed", "DOS"]
+    # The failed text was not cached as its own translation
+    assert cache.get_many("es", texts) == {"uno": "UNO", "dos": "DOS"}
+
+
+def test_batched_request_is_split_back_per_text():
+    fake = FakeGoogleTranslator(max_length=100)
+    assert FakeGoogleBackend(fake).translate_batch(["uno", "dos", "tres"], "es") == ["UNO", "DOS", "TRES"]
+    assert fake.calls == 1
@@ -0,0 +1,143 @@
+import os
+import socket
+import logging
+
+import httplib2
+import pytest
+import googleapiclient.discovery
+
+import webscrapping.youtube_scrapping as youtube_scrapping
+import tables
+from tables import read_table
+
+
+def thread(i):
+    return {"snippet": {"topLevelComment": {"snippet": {
+        "publishedAt": f"2024-01-01T00:00:{i:02d}Z", "textOriginal": f"comment {i}",
+    }}}}
+
+
+class FakeRequest:
+    def __init__(self, response):
+        self.response = response
+
+    def execute(self):
+        if isinstance(self.response, BaseException):
+            raise self.response
+        return self.response
+
+
+class FakeYoutube:
+    """commentThreads().list() serves pages of 3 threads; the page after `fail_at` raises `error`."""
+
+    def __init__(self, pages, fail_at=None, error=None):
+        self.pages = pages
+        self.fail_at = fail_at
+        self.error = error
+
+    def commentThreads(self):
+        return self
+
+    def list(self, pageToken=None, **kwargs):
+        page = int(pageToken or 0)
+        if page == self.fail_at:
+            return FakeRequest(self.error)
+        response = {"items": [thread(page * 3 + i) for i in range(3)]}
+        if page + 1 < self.pages:
+            response["nextPageToken"] = str(page + 1)
+        return FakeRequest(response)
+
+
+@pytest.fixture(params=["parquet", "csv"])
+def scrape(tmp_path, monkeypatch, request):
+    """youtube_scarpping into tmp_path with a fake API; returns (run, table path, checkpoint path)."""
+    table_path = str(tmp_path / f"comment_abcdefghijk.{request.param}")
+    monkeypatch.setattr(youtube_scrapping, "setup_youtube", lambda video_id, job: (str(tmp_path), table_path))
+    monkeypatch.setattr(youtube_scrapping, "get_api_key", lambda: "key")
+
+    def run(youtube):
+        monkeypatch.setattr(googleapiclient.discovery, "build", lambda *args, **kwargs: youtube)
+        return youtube_scrapping.youtube_scarpping("https://www.youtube.com/watch?v=abcdefghijk")
+
+    return run, table_path, youtube_scrapping.checkpoint_path("abcdefghijk", str(tmp_path))
+
+
+def test_checkpoint_is_never_ahead_of_the_rows_on_disk(scrape, monkeypatch):
+    run, table_path, _ = scrape
+    rows_at_checkpoint = []
+    save_checkpoint = youtube_scrapping.save_checkpoint
+
+    def checking_save(path, next_page_token, fetched):
+        # A killed Parquet writer is resumed from its flushed parts, which only a new writer merges
+        if table_path.endswith(".parquet"):
+            parts = tables.partial_dir(table_path)
+            rows = sum(len(read_table(os.path.join(parts, name))) for name in os.listdir(parts))
+        else:
+            rows = len(read_table(table_path))
+        rows_at_checkpoint.append((fetched, rows))
+        save_checkpoint(path, next_page_token, fetched)
+
+    monkeypatch.setattr(youtube_scrapping, "save_checkpoint", checking_save)
+    run(FakeYoutube(pages=3))
+    assert rows_at_checkpoint == [(3, 3), (6, 6)]
+
+
+def test_killed_scrape_resumes_from_the_checkpoint(scrape):
+    run, table_path, checkpoint = scrape
+    # KeyboardInterrupt is not caught by the scraper, like a kill between pages
+    with pytest.raises(KeyboardInterrupt):
+        run(FakeYoutube(pages=4, fail_at=2, error=KeyboardInterrupt()))
+    assert youtube_scrapping.load_checkpoint(checkpoint)["next_page_token"] == "2"
+
+    run(FakeYoutube(pages=4))
+    texts = read_table(table_path)["text"].tolist()
+    assert texts == [f"comment {i}" for i in range(12)]
+    assert not os.path.exists(checkpoint)
+
+
+def test_hard_killed_scrape_resumes_without_losing_comments(scrape, monkeypatch):
+    run, table_path, checkpoint = scrape
+
+    class KilledWriter(tables.TableWriter):
+        def close(self):
+            pass  # The process dies before the table is closed
+
+    monkeypatch.setattr(youtube_scrapping, "TableWriter", KilledWriter)
+    with pytest.raises(KeyboardInterrupt):
+        run(FakeYoutube(pages=4, fail_at=2, error=KeyboardInterrupt()))
+    monkeypatch.setattr(youtube_scrapping, "TableWriter", tables.TableWriter)
+
+    run(FakeYoutube(pages=4))
+    assert read_table(table_path)["text"].tolist() == [f"comment {i}" for i in range(12)]
+
+
+class FlakyRequest:
+    """Raises each of errors in turn, then returns response."""
+
+    def __init__(self, errors, response):
+        self.errors = list(errors)
+        self.response = response
+
+    def execute(self):
+        if self.errors:
+            raise self.errors.pop(0)
+        return self.response
+
+
+@pytest.mark.parametrize("error", [
+    httplib2.error.ServerNotFoundError("Unable to find the server at youtube.googleapis.com"),
+    socket.timeout("timed out"),
+    ConnectionResetError("reset"),
+])
+def test_transport_errors_are_retried(monkeypatch, caplog, error):
+    monkeypatch.setattr(youtube_scrapping.time, "sleep", lambda seconds: None)
+    with caplog.at_level(logging.WARNING, logger="app_logger"):
+        assert youtube_scrapping.execute_with_retry(FlakyRequest([error], {"items": []})) == {"items": []}
+    assert type(error).__name__ in caplog.text
+
+
+def test_transport_errors_are_raised_after_the_last_retry(monkeypatch):
+    monkeypatch.setattr(youtube_scrapping.time, "sleep", lambda seconds: None)
+    errors = [socket.timeout("timed out")] * (youtube_scrapping.MAX_RETRIES + 1)
+    with pytest.raises(socket.timeout):
+        youtube_scrapping.execute_with_retry(FlakyRequest(errors, {"items": []}))
@@ -0,0 +1,220 @@
+import os
+import hashlib
+import logging
+import sqlite3
+import threading
+import metrics
+
+logger = logging.getLogger("app_logger")
+
+CACHE_DIR = "./cache"
+TRANSLATION_CACHE_FILE = os.path.join(CACHE_DIR, "translations.sqlite3")
+
+# Google's web endpoint rejects requests above 5000 characters
+MAX_BATCH_CHARS = 4500
+BATCH_SEPARATOR = "\n"
+
+
+def text_key(text):
+    """Content hash used to address cached translations."""
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class TranslationCache:
+    """
+    SQLite-backed translation cache keyed by (source language, text hash).
+
+    The database file is shared by every job, so a phrase translated once is
+    never sent to the translator again.
+    """
+
+    def __init__(self, path=TRANSLATION_CACHE_FILE):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS translations ("
+                " source TEXT NOT NULL,"
+                " text_hash TEXT NOT NULL,"
+                " translated TEXT NOT NULL,"
+                " PRIMARY KEY (source, text_hash))"
+            )
+            self._conn.commit()
+
+    def get_many(self, source, texts):
+        """Return {text: translation} for every text already in the cache."""
+        keys = {text_key(text): text for text in texts}
+        found = {}
+        with self._lock:
+            items = list(keys)
+            # Stay below SQLite's bound parameter limit
+            for start in range(0, len(items), 500):
+                chunk = items[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT text_hash, translated FROM translations "
+                    f"WHERE source = ? AND text_hash IN ({placeholders})",
+                    [source, *chunk],
+                ).fetchall()
+                for key, translated in rows:
+                    found[keys[key]] = translated
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, source, translations):
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO translations (source, text_hash, translated) VALUES (?, ?, ?)",
+                [(source, text_key(text), translated) for text, translated in translations.items()],
+            )
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class GoogleTranslateBackend:
+    """
+    deep_translator backend that packs many texts into one request.
+
+    Texts are joined with newlines up to MAX_BATCH_CHARS and split again on
+    the way back. If the translator merges or drops lines, or the batched
+    request fails, that group is retried one text at a time. A text that
+    still fails (e.g. one over the 5000 character limit) comes back as None,
+    so only that text stays untranslated and it is not cached.
+    """
+
+    def __init__(self, target="en", max_batch_chars=MAX_BATCH_CHARS):
+        self.target = target
+        self.max_batch_chars = max_batch_chars
+
+    def _translator(self, source):
+        from deep_translator import GoogleTranslator
+        return GoogleTranslator(source=source, target=self.target)
+
+    def _groups(self, texts):
+        group, size = [], 0
+        for text in texts:
+            if group and size + len(text) + 1 > self.max_batch_chars:
+                yield group
+                group, size = [], 0
+            group.append(text)
+            size += len(text) + 1
+        if group:
+            yield group
+
+    @staticmethod
+    def _translate_one(translator, text, source):
+        try:
+            return translator.translate(text) or text
+        except Exception as e:
+            logger.error(f"Error translating a '{source}' text of {len(text)} characters: {e}")
+            return None
+
+    def translate_batch(self, texts, source):
+        translator = self._translator(source)
+        results = []
+        for group in self._groups(texts):
+            # Newlines inside a text would break the split, so those go on their own
+            if len(group) > 1 and not any(BATCH_SEPARATOR in text for text in group):
+                try:
+                    translated = translator.translate(BATCH_SEPARATOR.join(group)) or ""
+                except Exception as e:
+                    logger.warning(f"Batched translation of {len(group)} texts failed, translating individually: {e}")
+                else:
+                    lines = translated.split(BATCH_SEPARATOR)
+                    if len(lines) == len(group):
+                        results.extend(line.strip() for line in lines)
+                        continue
+                    logger.warning(
+                        f"Batched translation returned {len(lines)} lines for {len(group)} texts, "
+                        f"translating individually"
+                    )
+            results.extend(self._translate_one(translator, text, source) for text in group)
+        return results
+
+
+class DictionaryBackend:
+    """
+    Offline stand-in backend for benchmarks and tests.
+
+    Known texts are looked up in a dict and anything else is returned unchanged.
+    """
+
+    def __init__(self, translations=None):
+        self.translations = translations or {}
+        self.calls = 0
+
+    def translate_batch(self, texts, source):
+        self.calls += 1
+        return [self.translations.get(text, text) for text in texts]
+
+
+class CachedTranslator:
+    """
+    Translates texts to English through a cache and a pluggable backend.
+
+    Args:
+        backend: Any object with translate_batch(texts, source) -> list.
+        cache (TranslationCache): Shared cache, or None to disable caching.
+    """
+
+    def __init__(self, backend=None, cache=None):
+        self.backend = backend or GoogleTranslateBackend()
+        self.cache = cache
+
+    def translate_many(self, texts, source):
+        """Translate texts from one source language, returning results in input order."""
+        unique = list(dict.fromkeys(texts))
+        translated = self.cache.get_many(source, unique) if self.cache is not None else {}
+        misses = [text for text in unique if text not in translated]
+        metrics.inc("cache_hits_total", len(unique) - len(misses), cache="translation")
+        metrics.inc("cache_misses_total", len(misses), cache="translation")
+        if misses:
+            results = self.backend.translate_batch(misses, source)
+            fresh = {text: result for text, result in zip(misses, results) if result}
+            translated.update(fresh)
+            if self.cache is not None and fresh:
+                self.cache.put_many(source, fresh)
+            logger.info(
+                f"Translated {len(misses)} new '{source}' texts, "
+                f"{len(unique) - len(misses)} served from cache"
+            )
+        return [translated.get(text, text) for text in texts]
+
+    def translate(self, text, source):
+        return self.translate_many([text], source)[0]
+
+
+_translator = None
+_translator_lock = threading.Lock()
+
+
+def get_translator():
+    """Return the shared CachedTranslator, creating it with the Google backend on first use."""
+    global _translator
+    with _translator_lock:
+        if _translator is None:
+            _translator = CachedTranslator(GoogleTranslateBackend(), TranslationCache())
+        return _translator
+
+
+def set_translation_backend(backend, cache_path=TRANSLATION_CACHE_FILE):
+    """
+    Swap the translator backend, e.g. DictionaryBackend() for offline runs.
+
+    Pass cache_path=None to run without the persistent cache.
+    """
+    global _translator
+    with _translator_lock:
+        cache = TranslationCache(cache_path) if cache_path else None
+        _translator = CachedTranslator(backend, cache)
+        return _translator
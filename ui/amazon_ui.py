@@ -1,17 +1,19 @@
 import streamlit as st
-from main import amazon_main
+from .job_status import poll_job
 import altair as alt
 
 
 class AmazonUI:
-    def __init__(self, url):
+    def __init__(self, url, job=None):
         """
         Initialize the AmazonUI class with the given URL.
         
         Args:
             url (str): The Amazon product URL.
+            job (JobContext): The job whose workspace holds this analysis.
         """
         self.url = url
+        self.job = job
 
     def display_amazon_details(self, details):
         """
@@ -39,30 +41,30 @@ class AmazonUI:
             st.error("No product details available.")
 
 
+    def sentiment_chart(self, sentiment_data):
+        """
+        Build the bar chart of sentiment counts.
+        """
+        return (
+            alt.Chart(sentiment_data)
+            .mark_bar()
+            .encode(
+                x=alt.X('Sentiment_Label:N', title='Sentiment', axis=alt.Axis(labelAngle=0)),
+                y=alt.Y('Count:Q', title='Number of Reviews/Comments'),
+                color='Sentiment_Label:N',
+                tooltip=['Sentiment_Label', 'Count'],
+            )
+            .properties(width=600, height=400)
+        )
+
     def display_sentiment_analysis(self):
         """
-        Display the sentiment analysis results as a bar chart or show a processing message while scraping.
+        Display the sentiment analysis results as a bar chart or show the job's progress while scraping.
+        The analysis runs in the background scheduler; the page polls it and redraws the chart as results arrive.
         """
-        # Display the processing message and spinner while sentiment data is being fetched
-        with st.spinner('Processing reviews... Please wait.'):
-            url_type, sentiment_data = amazon_main()  # Assuming this function fetches the sentiment data
-            
+        sentiment_data = poll_job(self.job.job_id, self.sentiment_chart)
+
         # Once data is available, display the chart
         if sentiment_data is not None:
             st.write("---")
-            chart = (
-                alt.Chart(sentiment_data)
-                .mark_bar()
-                .encode(
-                    x=alt.X('Sentiment_Label:N', title='Sentiment', axis=alt.Axis(labelAngle=0)),
-                    y=alt.Y('Count:Q', title='Number of Reviews/Comments'),
-                    color='Sentiment_Label:N',
-                    tooltip=['Sentiment_Label', 'Count'],
-                )
-                .properties(width=600, height=400)
-            )
-
-            st.altair_chart(chart, use_container_width=True)
-        else:
-            st.error("No sentiment data available.")
-
+            st.altair_chart(self.sentiment_chart(sentiment_data), use_container_width=True)
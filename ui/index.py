@@ -4,6 +4,71 @@ from url_details import fetch_amazon_product_details, fetch_youtube_video_detail
 from .amazon_ui import AmazonUI
 from .youtube_ui import YoutubeUI
 from main import remove_files, match_url
+from scheduler import get_scheduler
+from utils.job_context import JobContext
+from sampling import TARGET_MARGIN
+import metrics
+
+
+def current_job(url):
+    """
+    The JobContext of this browser session for url.
+
+    Each session keeps its own job, so two users analyzing different URLs
+    never share files. Entering a new URL starts a new job and drops the
+    previous one (see clear_job).
+    """
+    job = st.session_state.get("job")
+    if job is None or job.url != url:
+        clear_job()
+        job = JobContext(url)
+        st.session_state["job"] = job
+    return job
+
+
+def clear_job():
+    """
+    Cancel the session's analysis, if any. The scheduler drops the job and
+    its files once the worker has stopped; a job never submitted is deleted
+    straight away.
+    """
+    job = st.session_state.pop("job", None)
+    st.session_state.pop("analysis", None)
+    if job is not None:
+        scheduler = get_scheduler()
+        scheduler.cancel(job.job_id)
+        if not scheduler.forget_when_finished(job.job_id):
+            remove_files(job)
+
+
+def start_analysis(source, job, details, **options):
+    """
+    Queue the analysis in the background scheduler and remember it for the following reruns.
+    Options (e.g. sample_margin) are passed to amazon_main/yotutbe_main.
+    """
+    get_scheduler().submit(source, context=job, **options)
+    st.session_state["analysis"] = {"source": source, "details": details}
+
+
+def active_analysis(source, url):
+    """The (job, details) of this session's analysis of url, or (None, None)."""
+    job = st.session_state.get("job")
+    analysis = st.session_state.get("analysis")
+    if job is None or analysis is None or job.url != url or analysis["source"] != source:
+        return None, None
+    return job, analysis["details"]
+
+
+def sampling_options(population=None):
+    """A 'Quick estimate' checkbox; when ticked, the options of a sampled analysis."""
+    quick = st.checkbox(
+        f"Quick estimate (stop once the split is known to ±{TARGET_MARGIN:.0%})",
+        help="Stops early instead of analyzing every item. Items are fetched newest first, "
+             "so the estimate covers the most recent ones.",
+    )
+    if not quick:
+        return {}
+    return {"sample_margin": TARGET_MARGIN, "population": population}
 
 
 def home():
@@ -23,50 +88,65 @@ def home():
         st.subheader("Enter Your URL")
         input_url = st.text_input(label="Enter your Amazon URL", value="", label_visibility="collapsed")
 
-        with open("./textfiles/url.txt", "w") as f:
-            f.write(input_url)
         if input_url:
+            options = sampling_options()
             if st.button('Process'):
                 if match_url(input_url) == "Amazon":
-                    details = fetch_amazon_product_details(input_url)
-                    amazon_ui = AmazonUI(input_url)
-                    amazon_ui.display_amazon_details(details)
-                    st.write("---")
-                    amazon_ui.display_sentiment_analysis()
+                    job = current_job(input_url)
+                    # Traced under the job so the details fetch shows up in its trace
+                    with metrics.job_scope(job.job_id):
+                        details = fetch_amazon_product_details(input_url, job)
+                    start_analysis("Amazon", job, details, **options)
                 else:
                     st.write("**INVALID URL** : Please enter the amazon url")
 
             # Clear Button
         if st.button("Clear"):
-            remove_files()
+            clear_job()
             input_url = ""
             st.success("Cleared all temporary files and reset the input area.")
 
         st.write("---")
 
+        # Progress and results of the background analysis, polled on every rerun
+        job, details = active_analysis("Amazon", input_url)
+        if job is not None:
+            amazon_ui = AmazonUI(input_url, job)
+            amazon_ui.display_amazon_details(details)
+            st.write("---")
+            amazon_ui.display_sentiment_analysis()
+
     # YouTube Section
     elif selected == 'YouTube':
         st.title("YouTube Video Comment Analysis")
         st.subheader("Enter Your URL")
         input_url = st.text_input(label="Enter your YouTube URL", value="", label_visibility="collapsed")
-        with open("./textfiles/url.txt", "w") as f:
-            f.write(input_url)
         if input_url:
+            options = sampling_options()
             if st.button('Process'):
                 if match_url(input_url) == "YouTube":
-                    details = fetch_youtube_video_details(input_url)
-                    youtube_ui = YoutubeUI(input_url)
-                    youtube_ui.display_youtube_details(details)
-                    youtube_ui.display_sentiment_analysis()
+                    job = current_job(input_url)
+                    with metrics.job_scope(job.job_id):
+                        details = fetch_youtube_video_details(input_url)
+                    if options and str(details.get("total_comments", "")).isdigit():
+                        options["population"] = int(details["total_comments"])
+                    start_analysis("YouTube", job, details, **options)
                 else:
                     st.write("**INVALID URL** : Please enter the Youtube url")
         # Clear Button
         if st.button("Clear"):
-            remove_files()
+            clear_job()
             input_url = ""
             st.success("Cleared all temporary files and reset the input area.")
 
         st.write("---")
+
+        # Progress and results of the background analysis, polled on every rerun
+        job, details = active_analysis("YouTube", input_url)
+        if job is not None:
+            youtube_ui = YoutubeUI(input_url, job)
+            youtube_ui.display_youtube_details(details)
+            youtube_ui.display_sentiment_analysis()
         
     # About Section
     elif selected == "About":
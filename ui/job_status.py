@@ -0,0 +1,112 @@
+import time
+import pandas as pd
+import streamlit as st
+import metrics
+from scheduler import get_scheduler, PENDING, RUNNING, DONE, CANCELLED
+from sampling import SAMPLE_RECENT
+
+# Seconds between two polls of a running job
+POLL_INTERVAL = 1.0
+
+STAGE_LABELS = [
+    ("pages", "Pages fetched"),
+    ("fetched", "Rows fetched"),
+    ("clean", "Rows cleaned"),
+    ("translate", "Rows translated"),
+    ("correct", "Rows corrected"),
+    ("predict", "Rows predicted"),
+]
+
+
+def show_estimate(tally):
+    """Running sentiment shares with their confidence intervals, for a sampled analysis."""
+    estimate = tally.estimate()
+    if not tally.rows:
+        return
+    columns = st.columns(len(estimate) + 1)
+    for column, (label, item) in zip(columns, estimate.items()):
+        column.metric(label, f"{item['share']:.1%}", f"{item['low']:.1%} - {item['high']:.1%}", delta_color="off")
+    columns[-1].metric("Margin of error", f"±{tally.margin():.1%}", f"{tally.rows:,} rows sampled", delta_color="off")
+    if tally.sample == SAMPLE_RECENT:
+        show_recent_caption()
+
+
+def show_recent_caption():
+    """Warn that a sample read from a newest-first source only covers its recent items."""
+    st.caption("Estimate of the most recent items: the source lists them newest first, older ones were not read.")
+
+
+def show_trace(job_id):
+    """Per-stage timings, request counts and cache hits of a job, from its metrics."""
+    summary = metrics.job_summary(job_id)
+    if not summary["stages"] and not summary["requests"]:
+        return
+    with st.expander("Trace"):
+        if summary["stages"]:
+            st.caption("Stages")
+            st.dataframe(pd.DataFrame.from_dict(summary["stages"], orient="index"), use_container_width=True)
+        if summary["requests"]:
+            st.caption("Requests")
+            st.dataframe(pd.DataFrame.from_dict(summary["requests"], orient="index"), use_container_width=True)
+        if summary["caches"]:
+            st.caption("Caches")
+            st.dataframe(pd.DataFrame.from_dict(summary["caches"], orient="index"), use_container_width=True)
+        if summary["dedup"].get("rows"):
+            dedup = summary["dedup"]
+            st.caption(
+                f"Deduplication: {dedup['unique']:,} unique texts out of {dedup['rows']:,} rows "
+                f"({dedup['reduction_ratio']:.1%} fewer to process)"
+            )
+        if summary["language_detection"]:
+            st.caption("Language detection")
+            st.dataframe(pd.Series(summary["language_detection"], name="rows"), use_container_width=True)
+
+
+def poll_job(job_id, chart):
+    """
+    Show the progress of a background analysis job and return its result.
+
+    While the job runs, the per-stage counters and a live chart built by
+    chart(counts_frame) are drawn, a Cancel button is offered and the page
+    reruns every POLL_INTERVAL seconds. The scheduler keeps the job going
+    between reruns, so the session is never blocked by the crawl.
+
+    Returns:
+        pandas.DataFrame: The final sentiment counts, or None until the job is done.
+    """
+    scheduler = get_scheduler()
+    status = scheduler.status(job_id)
+    if status is None:
+        st.error("This analysis is no longer available. Please process the URL again.")
+        return None
+
+    if status["status"] in (PENDING, RUNNING):
+        if st.button("Cancel", key=f"cancel_{job_id}"):
+            scheduler.cancel(job_id)
+            status = scheduler.status(job_id)
+
+    if status["status"] == PENDING:
+        st.info("Waiting for a free worker...")
+    elif status["status"] == RUNNING:
+        progress = status["progress"]
+        columns = st.columns(len(STAGE_LABELS))
+        for column, (stage, label) in zip(columns, STAGE_LABELS):
+            column.metric(label, progress.get(stage, 0))
+        if status["counts"]:
+            tally = scheduler.get(job_id).tally
+            if hasattr(tally, "estimate"):
+                show_estimate(tally)
+            st.altair_chart(chart(tally.to_frame()), use_container_width=True)
+    show_trace(job_id)
+
+    if status["status"] in (PENDING, RUNNING):
+        time.sleep(POLL_INTERVAL)
+        st.rerun()
+    if status["status"] == CANCELLED:
+        st.warning("Analysis cancelled.")
+    elif status["status"] != DONE:
+        st.error(f"Analysis failed: {status['error']}")
+    result = scheduler.result(job_id)
+    if result is not None and result.attrs.get("sample") == SAMPLE_RECENT:
+        show_recent_caption()
+    return result
@@ -1,17 +1,20 @@
 import streamlit as st
-from main import yotutbe_main
+from .job_status import poll_job
+from result_store import get_result_store, detect_trend, GRANULARITIES
 import altair as alt
 
 
 class YoutubeUI:
-    def __init__(self, url):
+    def __init__(self, url, job=None):
         """
         Initialize the AmazonUI class with the given URL.
         
         Args:
             url (str): The Amazon product URL.
+            job (JobContext): The job whose workspace holds this analysis.
         """
         self.url = url
+        self.job = job
 
     def display_youtube_details(self,video_details):
         """
@@ -45,30 +48,68 @@ class YoutubeUI:
 
 
 
+    def sentiment_chart(self, sentiment_data):
+        """
+        Build the bar chart of sentiment counts.
+        """
+        return (
+            alt.Chart(sentiment_data)
+            .mark_bar()
+            .encode(
+                x=alt.X('Sentiment_Label:N', title='Sentiment', axis=alt.Axis(labelAngle=0)),
+                y=alt.Y('Count:Q', title='Number of Reviews/Comments'),
+                color='Sentiment_Label:N',
+                tooltip=['Sentiment_Label', 'Count'],
+            )
+            .properties(width=600, height=400)
+        )
+
+    def time_series_chart(self, series):
+        """
+        Build the stacked area chart of sentiment counts per time bucket.
+        """
+        labels = [column for column in series.columns if column not in ("Bucket", "Total")]
+        data = series.melt(id_vars="Bucket", value_vars=labels, var_name="Sentiment_Label", value_name="Count")
+        return (
+            alt.Chart(data)
+            .mark_area()
+            .encode(
+                x=alt.X('Bucket:T', title='Published'),
+                y=alt.Y('Count:Q', title='Number of Comments', stack=True),
+                color='Sentiment_Label:N',
+                tooltip=['Bucket:T', 'Sentiment_Label', 'Count'],
+            )
+            .properties(width=600, height=300)
+        )
+
+    def display_time_series(self):
+        """
+        Display comment sentiment over time from the result store's time buckets,
+        with how the latest bucket compares to the ones before it.
+        """
+        if self.job is None or not self.job.item_id:
+            return
+        granularity = st.radio("Sentiment over time", GRANULARITIES, index=1, horizontal=True)
+        series = get_result_store().time_series("YouTube", self.job.item_id, granularity)
+        if series.empty:
+            return
+        st.altair_chart(self.time_series_chart(series), use_container_width=True)
+        trend = detect_trend(series)
+        if trend and trend["volume_ratio"] is not None:
+            st.caption(
+                f"Latest {granularity}: {trend['volume_ratio']}x the usual comment volume, "
+                f"positive share {trend['positive_share_change']:+.1%}"
+            )
+
     def display_sentiment_analysis(self):
         """
-        Display the sentiment analysis results as a bar chart or show a processing message while scraping.
+        Display the sentiment analysis results as a bar chart or show the job's progress while scraping.
+        The analysis runs in the background scheduler; the page polls it and redraws the chart as results arrive.
         """
-        # Display the processing message and spinner while sentiment data is being fetched
-        with st.spinner('Processing reviews... Please wait.'):
-            url_type, sentiment_data = yotutbe_main()  # Assuming this function fetches the sentiment data
-            
+        sentiment_data = poll_job(self.job.job_id, self.sentiment_chart)
+
         # Once data is available, display the chart
         if sentiment_data is not None:
             st.write("---")
-            chart = (
-                alt.Chart(sentiment_data)
-                .mark_bar()
-                .encode(
-                    x=alt.X('Sentiment_Label:N', title='Sentiment', axis=alt.Axis(labelAngle=0)),
-                    y=alt.Y('Count:Q', title='Number of Reviews/Comments'),
-                    color='Sentiment_Label:N',
-                    tooltip=['Sentiment_Label', 'Count'],
-                )
-                .properties(width=600, height=400)
-            )
-
-            st.altair_chart(chart, use_container_width=True)
-        else:
-            st.error("No sentiment data available.")
-
+            st.altair_chart(self.sentiment_chart(sentiment_data), use_container_width=True)
+            self.display_time_series()
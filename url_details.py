@@ -1,10 +1,11 @@
+import time
 import requests
 import random
-import json
 from bs4 import BeautifulSoup
 import os
 from utils.utils import product_details, video_details
-from googleapiclient.discovery import build
+from resources import get_cookies, get_api_key
+import metrics
 
 
 
@@ -15,14 +16,6 @@ USER_AGENTS = [
     "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:109.0) Gecko/20100101 Firefox/109.0"
 ]
 
-with open("./json/cookies.json", "r") as file:
-    cookie_dic = json.load(file)
-cookies = {cookie["name"]: cookie["value"] for cookie in cookie_dic}
-
-with open("./json/credentials.json", "r") as f:
-    data = json.load(f)
-    API_KEY = data['api_key']
-    
 def session_response(url):
     headers = {
         "User-Agent": random.choice(USER_AGENTS),
@@ -30,7 +23,9 @@ def session_response(url):
         "Accept-Encoding": "gzip, deflate, br",
         "Connection": "keep-alive",
     }
-    response = requests.get(url, headers=headers, cookies=cookies, timeout=10)
+    started = time.perf_counter()
+    response = requests.get(url, headers=headers, cookies=get_cookies(), timeout=10)
+    metrics.record_request("amazon", str(response.status_code), time.perf_counter() - started, len(response.content))
     if response.status_code == 200:
         print("Successfully fetched the page.")
         return response.text
@@ -39,7 +34,9 @@ def session_response(url):
         response.raise_for_status()
 
 
-def fetch_amazon_product_details(url):
+@metrics.traced("amazon_details")
+def fetch_amazon_product_details(url, job=None):
+    """Fetch title, rating, price and image; the image goes to the job's workspace when one is given."""
     response = session_response(url)
 
     soup = BeautifulSoup(response, "html.parser")
@@ -56,7 +53,10 @@ def fetch_amazon_product_details(url):
 
         # Download the image
         img_data = requests.get(img_url).content
-        img_path = os.path.join("./images", f"{pid}_image.jpg")
+        if job is not None:
+            img_path = job.path("images", f"{pid}_image.jpg")
+        else:
+            img_path = os.path.join("./images", f"{pid}_image.jpg")
 
         # Save the image locally
         with open(img_path, "wb") as f:
@@ -69,13 +69,16 @@ def fetch_amazon_product_details(url):
         "img" : img_path
         }
 
+@metrics.traced("youtube_details")
 def fetch_youtube_video_details(url):
     """Fetch YouTube video details along with channel icon using YouTube Data API v3."""
     try:
-        youtube = build("youtube", "v3", developerKey=API_KEY)
+        from googleapiclient.discovery import build
+        from webscrapping.youtube_scrapping import execute_with_retry
+        youtube = build("youtube", "v3", developerKey=get_api_key())
         video_id = video_details(url)
         # Fetch video details
-        video_response = youtube.videos().list(part="snippet,statistics", id=video_id).execute()
+        video_response = execute_with_retry(youtube.videos().list(part="snippet,statistics", id=video_id))
         if not video_response["items"]:
             return {"error": f"No video found for ID: {video_id}"}
 
@@ -85,7 +88,7 @@ def fetch_youtube_video_details(url):
         channel_id = snippet.get("channelId", "")
 
         # Fetch channel details for the icon
-        channel_response = youtube.channels().list(part="snippet", id=channel_id).execute()
+        channel_response = execute_with_retry(youtube.channels().list(part="snippet", id=channel_id))
         if not channel_response["items"]:
             return {"error": f"No channel found for ID: {channel_id}"}
         
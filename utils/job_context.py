@@ -0,0 +1,53 @@
+import os
+import uuid
+import shutil
+import logging
+
+logger = logging.getLogger("app_logger")
+
+JOBS_DIR = "./jobs"
+
+
+class JobContext:
+    """
+    Everything one analysis needs to run next to others without sharing files.
+
+    Each job gets a unique ID and its own workspace directory holding the
+    scraped data, intermediate tables and downloaded images, so concurrent
+    users never read or overwrite each other's url.txt/id.txt/reviews tables.
+
+    Args:
+        url (str): The Amazon or YouTube URL being analyzed.
+        job_id (str): Reuse an existing ID, defaults to a new random one.
+        base_dir (str): Directory under which workspaces are created.
+    """
+
+    def __init__(self, url, job_id=None, base_dir=JOBS_DIR):
+        self.url = url
+        self.job_id = job_id or uuid.uuid4().hex[:12]
+        self.workspace = os.path.join(base_dir, self.job_id)
+        self.item_id = None  # Product or video ID, set once the URL is parsed
+        os.makedirs(self.workspace, exist_ok=True)
+
+    def path(self, *parts):
+        """Path inside the workspace, creating its parent directory."""
+        full_path = os.path.join(self.workspace, *parts)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        return full_path
+
+    def scrape_folder(self, item_id):
+        folder = os.path.join(self.workspace, "webscrapping", item_id)
+        os.makedirs(folder, exist_ok=True)
+        return folder
+
+    def cleanup(self):
+        """Delete the job's workspace and everything in it."""
+        if os.path.exists(self.workspace):
+            try:
+                shutil.rmtree(self.workspace)
+                logger.info(f"Job {self.job_id}: workspace {self.workspace} has been deleted.")
+            except Exception as e:
+                logger.error(f"Job {self.job_id}: error deleting workspace {self.workspace}: {e}")
+
+    def __repr__(self):
+        return f"JobContext(job_id={self.job_id!r}, url={self.url!r})"
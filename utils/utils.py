@@ -1,6 +1,7 @@
 import re
 import os
-import csv
+
+from tables import table_file
 
 def read_url(file_path):
     """
@@ -27,21 +28,25 @@ def product_details(url):
     print(f"Extracted Product ID: {product_id}, Product Title: {product_title}")
     return product_id, product_title
 
-# Ensure the folder and CSV file exist
-def setup_amazon(product_id):
-    folder = f"./webscrapping/{product_id}"
-    csv_file = os.path.join(folder, f"reviews_{product_id}.csv")
-    os.makedirs(folder, exist_ok=True)
-    with open("./textfiles/id.txt", "w") as f:
-        f.write(product_id)
-    if not os.path.exists(csv_file):
-        print(f"Creating new CSV file: {csv_file}")
-        with open(csv_file, "w", newline='', encoding="utf-8") as file:
-            writer = csv.writer(file)
-            writer.writerow(["category", "review"])  # Write header
+# Ensure the folder exists and name the reviews table
+def setup_amazon(product_id, job=None):
+    """
+    With a JobContext the files go to the job's workspace and the ID is kept
+    on the job instead of the shared ./textfiles/id.txt. The table itself
+    is created by the scraper's TableWriter.
+    """
+    if job is not None:
+        folder = job.scrape_folder(product_id)
+        job.item_id = product_id
     else:
-        print(f"CSV file already exists: {csv_file}")
-    return folder, csv_file
+        folder = f"./webscrapping/{product_id}"
+        with open("./textfiles/id.txt", "w") as f:
+            f.write(product_id)
+    table_path = os.path.join(folder, table_file(f"reviews_{product_id}"))
+    os.makedirs(folder, exist_ok=True)
+    if os.path.exists(table_path):
+        print(f"Reviews file already exists: {table_path}")
+    return folder, table_path
 
 def video_details(url):
     video_id_pattern = r"(?:v=|\/)([0-9A-Za-z_-]{11})(?:&|\/|$)"
@@ -57,19 +62,21 @@ def video_details(url):
     print(f"Extracted Video ID: {video_id}")
     return video_id
 
-def setup_youtube(video_id):
-    folder = f"./webscrapping/{video_id}"
-    csv_file = os.path.join(folder, f"comment_{video_id}.csv")
-    os.makedirs(folder, exist_ok=True)
-    with open("./textfiles/id.txt", "w") as f:
-        f.write(video_id)
-    if not os.path.exists(csv_file):
-        print(f"Creating new CSV file: {csv_file}")
-        with open(csv_file, "w", newline='', encoding="utf-8") as file:
-            writer = csv.writer(file)
-            writer.writerow(["published", "text"])
+def setup_youtube(video_id, job=None):
+    """
+    Same as setup_amazon, for a YouTube video.
+    """
+    if job is not None:
+        folder = job.scrape_folder(video_id)
+        job.item_id = video_id
     else:
-        print(f"CSV file already exists: {csv_file}")
-    return folder, csv_file
+        folder = f"./webscrapping/{video_id}"
+        with open("./textfiles/id.txt", "w") as f:
+            f.write(video_id)
+    table_path = os.path.join(folder, table_file(f"comment_{video_id}"))
+    os.makedirs(folder, exist_ok=True)
+    if os.path.exists(table_path):
+        print(f"Comments file already exists: {table_path}")
+    return folder, table_path
 if __name__ == "__main__":
     ...
\ No newline at end of file
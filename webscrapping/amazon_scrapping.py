@@ -1,35 +1,21 @@
 import os
-import csv
 import time
 import random
 import requests
-import json
-from bs4 import BeautifulSoup
 import re
 import logging
-from logging.handlers import RotatingFileHandler
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from utils.utils import product_details, setup_amazon, read_url
+from webscrapping.http_client import RateLimitedSession
+from webscrapping.html_extraction import parse_review_page
+from webscrapping.html_archive import HtmlArchive, archive_path, iter_archive
+from resources import get_cookies
+from tables import TableWriter, REVIEW_COLUMNS
+import metrics
+from logging_config import setup_logging
 
-# Create logs directory if it doesn't exist
-log_dir = "./logs"
-os.makedirs(log_dir, exist_ok=True)
-
-# Define the log file path
-log_file = os.path.join(log_dir, "app_log.log")
-
-# Create a rotating file handler (log rotation after 5MB)
-handler = RotatingFileHandler(
-    log_file, maxBytes=5 * 1024 * 1024, backupCount=3
-)
-
-# Set log format (including timestamp, log level, and message)
-formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
-handler.setFormatter(formatter)
-
-# Set up logging with the handler
-logger = logging.getLogger("app_logger")
-logger.setLevel(logging.INFO)  # Log level can be adjusted (e.g., DEBUG, INFO)
-logger.addHandler(handler)
+# One shared queue handler and log file for every module (see logging_config.py)
+logger = setup_logging()
 
 # Constants
 USER_AGENTS = [
@@ -45,11 +31,9 @@ STAR_MAP = {
     4: "four_star",
     5: "five_star"
 }
-
-# Load cookies from file
-with open("./json/cookies.json", "r") as file:
-    cookie_dic = json.load(file)
-cookies = {cookie["name"]: cookie["value"] for cookie in cookie_dic}
+MAX_PAGES = 10
+# Crawl workers shared by all star buckets
+MAX_WORKERS = 4
 
 # Save HTML content
 def save_html(html_content, folder, filename):
@@ -60,26 +44,42 @@ def save_html(html_content, folder, filename):
     logger.info(f"Saved HTML content to {file_path}")
 
 # Load HTML files
-def load_html(folder):
-    html_files = []
-    for root, _, files in os.walk(folder):
-        for file in files:
-            if file.endswith(".html"):
-                with open(os.path.join(root, file), "r", encoding="utf-8") as f:
-                    html_files.append(f.read())
-    logger.info(f"Loaded {len(html_files)} HTML files from {folder}")
-    return html_files
+def load_html(folder, star_type=None):
+    """
+    Lazily yields saved HTML pages from folder, one at a time.
 
-# Fetch and process HTML response
-def session_response(url):
-    headers = {
+    Reads the product's compressed archive when folder holds one (optionally
+    only the pages of star_type), otherwise every .html file under folder.
+    """
+    count = 0
+    if os.path.exists(archive_path(folder)):
+        for _, _, html_content in iter_archive(archive_path(folder), star_type):
+            count += 1
+            yield html_content
+    else:
+        for root, _, files in os.walk(folder):
+            for file in files:
+                if file.endswith(".html"):
+                    with open(os.path.join(root, file), "r", encoding="utf-8") as f:
+                        count += 1
+                        yield f.read()
+    logger.info(f"Loaded {count} HTML pages from {folder}")
+
+def build_headers():
+    return {
         "User-Agent": random.choice(USER_AGENTS),
         "Accept-Language": "en-US,en;q=0.9",
         "Accept-Encoding": "gzip, deflate, br",
         "Connection": "keep-alive",
     }
+
+# Fetch and process HTML response
+def session_response(url):
+    headers = build_headers()
     logger.info(f"Fetching URL: {url}")
-    response = requests.get(url, headers=headers, cookies=cookies, timeout=10)
+    started = time.perf_counter()
+    response = requests.get(url, headers=headers, cookies=get_cookies(), timeout=10)
+    metrics.record_request("amazon", str(response.status_code), time.perf_counter() - started, len(response.content))
     if response.status_code == 200:
         logger.info("Successfully fetched the page.")
         return response.text
@@ -87,12 +87,28 @@ def session_response(url):
         logger.error(f"Failed to fetch page. Status code: {response.status_code}")
         response.raise_for_status()
 
-def writing_csv(reviews, category, csv_file):
-    with open(csv_file, "a", newline='', encoding="utf-8") as file:
-        writer = csv.writer(file)
-        for review in reviews:
-            writer.writerow([category, review])
-    logger.info(f"Saved {len(reviews)} reviews under category {category} to CSV.")
+def create_session(**politeness):
+    """
+    Create a pooled, rate-limited session for crawling Amazon.
+
+    Keyword arguments (rate, burst, max_retries, pool_size, timeout) are
+    passed to RateLimitedSession to tune the politeness limits.
+    """
+    return RateLimitedSession(headers_factory=build_headers, cookies=get_cookies(), target="amazon", **politeness)
+
+def review_page_url(product_title, product_id, star_type, page_no):
+    return (
+        f"https://www.amazon.in/{product_title}/product-reviews/{product_id}/"
+        f"?ie=UTF8&filterByStar={star_type}&pageNumber={page_no}&reviewerType=all_reviews&pageSize=10&sortBy=recent"
+    )
+
+def total_pages_for(total_reviews):
+    total_pages = total_reviews // 10 + (1 if total_reviews % 10 != 0 else 0)
+    return min(total_pages, MAX_PAGES)  # Optional: Limit to MAX_PAGES pages
+
+def write_reviews(writer, reviews, category):
+    writer.write({"category": category, "review": review} for review in reviews)
+    logger.info(f"Saved {len(reviews)} reviews under category {category}.")
 
 def extracting_total_reviews(soup):
     """
@@ -120,90 +136,266 @@ def extracting_total_reviews(soup):
         return -1
 
 
-def fetch_and_save_pages(product_title, product_id, star_type, HTML_FOLDER):
+def fetch_and_save_pages(product_title, product_id, star_type, HTML_FOLDER, session=None, handle_page=None):
     """
     Fetches and saves pages of reviews for a specific star rating.
+
+    Each page is parsed once and passed to handle_page(star_type, page_no,
+    html, reviews); without a handler the raw HTML is saved under
+    HTML_FOLDER/star_type. When a RateLimitedSession is given it paces the
+    requests, otherwise a random 1-3 s sleep is used between pages.
     """
-    folder = os.path.join(HTML_FOLDER, star_type)
-    os.makedirs(folder, exist_ok=True)
+    if handle_page is None:
+        folder = os.path.join(HTML_FOLDER, star_type)
+        handle_page = lambda star_type, page_no, html, reviews: save_html(html, folder, f"page_{page_no}.html")
+    fetch = session.get if session is not None else session_response
 
     # Fetch the first page to determine total reviews
-    first_page_url = (
-        f"https://www.amazon.in/{product_title}/product-reviews/{product_id}/"
-        f"?ie=UTF8&filterByStar={star_type}&pageNumber=1&reviewerType=all_reviews&pageSize=10&sortBy=recent"
-    )
+    first_page_url = review_page_url(product_title, product_id, star_type, 1)
     try:
-        response_text = session_response(first_page_url)
-        save_html(response_text, folder, "page_1.html")
-        logging.info(f"Saved first page HTML for {star_type} reviews.")
-
-        soup = BeautifulSoup(response_text, 'html.parser')
-        total_reviews = extracting_total_reviews(soup)
+        with metrics.stage("amazon_fetch", rows_in=1) as span:
+            response_text = fetch(first_page_url)
+            total_reviews, reviews = parse_review_page(response_text)
+            span.rows_out = len(reviews)
+        handle_page(star_type, 1, response_text, reviews)
+        logging.info(f"Saved first page for {star_type} reviews.")
         logging.info(f"Total reviews for {star_type}: {total_reviews}")
         
         if total_reviews == -1:
             logging.warning(f"Failed to determine total reviews for {star_type}. Skipping...")
             return
 
-        total_pages = total_reviews // 10 + (1 if total_reviews % 10 != 0 else 0)
-        total_pages = min(total_pages, 10)  # Optional: Limit to 10 pages
+        total_pages = total_pages_for(total_reviews)
         logging.info(f"Total pages for {star_type}: {total_pages}")
 
         for page_no in range(2, total_pages + 1):
             logging.info(f"Fetching page {page_no} for {star_type} reviews...")
-            url = (
-                f"https://www.amazon.in/{product_title}/product-reviews/{product_id}/"
-                f"?ie=UTF8&filterByStar={star_type}&pageNumber={page_no}&reviewerType=all_reviews&pageSize=10&sortBy=recent"
-            )
-            response_text = session_response(url)
-            save_html(response_text, folder, f"page_{page_no}.html")
-            logging.info(f"Saved page {page_no} HTML for {star_type} reviews.")
-            time.sleep(random.uniform(1, 3))
+            url = review_page_url(product_title, product_id, star_type, page_no)
+            with metrics.stage("amazon_fetch", rows_in=1) as span:
+                response_text = fetch(url)
+                reviews = parse_review_page(response_text)[1]
+                span.rows_out = len(reviews)
+            handle_page(star_type, page_no, response_text, reviews)
+            logging.info(f"Saved page {page_no} for {star_type} reviews.")
+            if session is None:
+                time.sleep(random.uniform(1, 3))
     except Exception as e:
         logging.error(f"Error while fetching pages for {star_type}: {e}")
 
+def fetch_and_parse(session, url):
+    with metrics.stage("amazon_fetch", rows_in=1) as span:
+        response_text = session.get(url)
+        total_reviews, reviews = parse_review_page(response_text)
+        span.rows_out = len(reviews)
+    return response_text, total_reviews, reviews
+
+def iter_review_pages(product_title, product_id, session, max_workers=MAX_WORKERS, on_error=None):
+    """
+    Yields (star_type, page_no, html, reviews) for every review page as soon as it is fetched.
+
+    Each page is parsed once, in the worker thread that fetched it.
+
+    The first page of each star bucket is fetched in parallel to learn the
+    page counts, then all remaining pages go to the same bounded worker pool.
+    The session's per-host rate limiter keeps the crawl polite. Closing the
+    generator early drops the pages not yet fetched. A page that cannot be
+    fetched is logged and skipped, and on_error(exception) is called so the
+    caller knows the crawl is incomplete.
+    """
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    fetch = metrics.bind(fetch_and_parse)
+    try:
+        first_pages = {}
+        for star_type in STAR_MAP.values():
+            url = review_page_url(product_title, product_id, star_type, 1)
+            first_pages[executor.submit(fetch, session, url)] = star_type
+
+        pages = {}
+        for future in as_completed(first_pages):
+            star_type = first_pages[future]
+            try:
+                response_text, total_reviews, reviews = future.result()
+            except Exception as e:
+                logging.error(f"Error while fetching pages for {star_type}: {e}")
+                if on_error is not None:
+                    on_error(e)
+                continue
+            yield star_type, 1, response_text, reviews
+
+            logging.info(f"Total reviews for {star_type}: {total_reviews}")
+            if total_reviews == -1:
+                logging.warning(f"Failed to determine total reviews for {star_type}. Skipping...")
+                continue
+            for page_no in range(2, total_pages_for(total_reviews) + 1):
+                url = review_page_url(product_title, product_id, star_type, page_no)
+                pages[executor.submit(fetch, session, url)] = (star_type, page_no)
+
+        for future in as_completed(pages):
+            star_type, page_no = pages[future]
+            try:
+                response_text, _, reviews = future.result()
+            except Exception as e:
+                logging.error(f"Error while fetching page {page_no} for {star_type}: {e}")
+                if on_error is not None:
+                    on_error(e)
+                continue
+            yield star_type, page_no, response_text, reviews
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+def iter_new_reviews(product_title, product_id, session, is_known, max_workers=MAX_WORKERS, on_page=None,
+                     on_error=None):
+    """
+    Yields (star_type, review) for reviews not seen before.
+
+    Pages are sorted by most recent, so each star bucket is walked page by
+    page and stops at the first page containing a review is_known(star_type,
+    review) recognises. on_page() is called after every page fetched, and
+    on_error(exception) for a star bucket whose walk failed.
+    """
+    def walk(star_type):
+        new_reviews = []
+        total_pages = 1
+        page_no = 1
+        while page_no <= total_pages:
+            with metrics.stage("amazon_fetch", rows_in=1) as span:
+                response_text = session.get(review_page_url(product_title, product_id, star_type, page_no))
+                total_reviews, reviews = parse_review_page(response_text)
+                span.rows_out = len(reviews)
+            if on_page is not None:
+                on_page()
+            if page_no == 1:
+                total_pages = total_pages_for(total_reviews) if total_reviews != -1 else 1
+            fresh = [review for review in reviews if not is_known(star_type, review)]
+            new_reviews.extend(fresh)
+            if len(fresh) < len(reviews) or not reviews:
+                break
+            page_no += 1
+        logging.info(f"Found {len(new_reviews)} new reviews for {star_type}")
+        return new_reviews
+
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        buckets = {executor.submit(metrics.bind(walk), star_type): star_type for star_type in STAR_MAP.values()}
+        for future in as_completed(buckets):
+            star_type = buckets[future]
+            try:
+                reviews = future.result()
+            except Exception as e:
+                logging.error(f"Error while fetching new reviews for {star_type}: {e}")
+                if on_error is not None:
+                    on_error(e)
+                continue
+            for review in reviews:
+                yield star_type, review
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
 def extract_reviews_from_html(html_content):
     """
     Extracts reviews from HTML content.
     """
-    try:
-        soup = BeautifulSoup(html_content, "html.parser")
-        review_spans = soup.find_all("span", {"data-hook": "review-body"})
-        reviews = [span.get_text(strip=True) for span in review_spans]
-        logging.info(f"Extracted {len(reviews)} reviews from the HTML content.")
-        return reviews
-    except Exception as e:
-        logging.error(f"Error while extracting reviews from HTML: {e}")
-        return []
+    total_reviews, reviews = parse_review_page(html_content)
+    logging.info(f"Extracted {len(reviews)} reviews from the HTML content.")
+    return reviews
     
 # Main scraping process
-def amazon_scrapping(product_url):
+def amazon_scrapping(product_url, concurrent=True, max_workers=MAX_WORKERS, archive_html=False, job=None, **politeness):
     """
-    Scrapes reviews from the given Amazon product URL. If the folder and CSV file for the product already exist, 
-    it loads the saved data instead of fetching it again.
+    Scrapes reviews from the given Amazon product URL and appends them to the product's reviews table
+    (Parquet, or CSV without pyarrow; see tables.py).
+
+    Reviews are extracted as each page is fetched. With archive_html=True the
+    raw pages are also kept in one gzip archive per product
+    (webscrapping/<product_id>/pages.jsonl.gz) for later re-extraction.
+
+    With concurrent=True the star buckets are crawled in parallel through a
+    shared rate-limited session; politeness keyword arguments (rate, burst,
+    max_retries, pool_size, timeout) are passed to create_session. With a
+    JobContext all files are written to the job's workspace.
     """
     product_id, product_title = product_details(product_url)
-    folder, csv_file = setup_amazon(product_id)
-        # Step 1: Save required HTML files
-    for star_rating, star_type in STAR_MAP.items():
-            logging.info(f"Fetching reviews for {star_type}...")
-            fetch_and_save_pages(product_title, product_id, star_type, folder)
-
-    # Step 2: Load saved HTML files and extract reviews
-    for star_rating, star_type in STAR_MAP.items():
-        logging.info(f"Extracting reviews for {star_type}...")
-        folder_path = os.path.join(folder, star_type)
-        html_files = load_html(folder_path)
-        if not html_files:
-            logging.warning(f"No HTML files found in folder {folder_path}. Skipping extraction for {star_type}.")
-            continue
-        for html in html_files:
-            reviews = extract_reviews_from_html(html)
-            if reviews:
-                writing_csv(reviews, star_type, csv_file)
+    folder, table_path = setup_amazon(product_id, job)
+    archive = HtmlArchive(archive_path(folder)) if archive_html else None
+    writer = TableWriter(table_path, REVIEW_COLUMNS, append=True)
+
+    def handle_page(star_type, page_no, html_content, reviews):
+        if reviews:
+            write_reviews(writer, reviews, star_type)
+        else:
+            logging.warning(f"No reviews extracted from page {page_no} for {star_type}.")
+        if archive is not None:
+            archive.add(star_type, page_no, html_content)
+
+    try:
+        if concurrent:
+            session = create_session(**politeness)
+            try:
+                for page in iter_review_pages(product_title, product_id, session, max_workers):
+                    handle_page(*page)
+            finally:
+                session.close()
+        else:
+            for star_rating, star_type in STAR_MAP.items():
+                    logging.info(f"Fetching reviews for {star_type}...")
+                    fetch_and_save_pages(product_title, product_id, star_type, folder, handle_page=handle_page)
+    finally:
+        writer.close()
+        if archive is not None:
+            archive.close()
+    return product_id, table_path, folder
+
+def reextract_reviews(folder, table_path):
+    """
+    Extracts reviews again from the pages saved for a product, one page at a time,
+    appending them to the reviews table at table_path.
+    """
+    with TableWriter(table_path, REVIEW_COLUMNS, append=True) as writer:
+        for star_rating, star_type in STAR_MAP.items():
+            logging.info(f"Extracting reviews for {star_type}...")
+            if os.path.exists(archive_path(folder)):
+                html_files = load_html(folder, star_type)
             else:
-                logging.warning(f"No reviews extracted from HTML file in {folder_path}.")
-    return product_id, csv_file, folder
+                html_files = load_html(os.path.join(folder, star_type))
+            for html in html_files:
+                reviews = extract_reviews_from_html(html)
+                if reviews:
+                    write_reviews(writer, reviews, star_type)
+                else:
+                    logging.warning(f"No reviews extracted from an HTML page for {star_type}.")
+
+def stream_reviews(product_url, max_workers=MAX_WORKERS, is_known=None, on_page=None, session=None, on_error=None,
+                   **politeness):
+    """
+    Yields {"category", "review"} records straight from the crawl, without
+    saving HTML pages or writing the reviews table.
+
+    When is_known(star_type, review) is given only reviews newer than the
+    ones it recognises are fetched (see iter_new_reviews). on_page() is
+    called after every review page fetched, on_error(exception) for every
+    page skipped because it could not be fetched. A session from create_session()
+    can be shared by several crawls so they draw on one connection pool and
+    one per-host rate limit; it is left open for its owner to close.
+    """
+    product_id, product_title = product_details(product_url)
+    own_session = session is None
+    if own_session:
+        session = create_session(**politeness)
+    try:
+        if is_known is not None:
+            for star_type, review in iter_new_reviews(product_title, product_id, session, is_known, max_workers,
+                                                      on_page, on_error):
+                yield {"category": star_type, "review": review}
+            return
+        for star_type, page_no, _, reviews in iter_review_pages(product_title, product_id, session, max_workers,
+                                                                on_error):
+            if on_page is not None:
+                on_page()
+            for review in reviews:
+                yield {"category": star_type, "review": review}
+    finally:
+        if own_session:
+            session.close()
 
 # Run the scraper
 if __name__ == "__main__":
@@ -0,0 +1,68 @@
+import os
+import gzip
+import json
+import logging
+import threading
+
+logger = logging.getLogger("app_logger")
+
+ARCHIVE_NAME = "pages.jsonl.gz"
+
+
+def archive_path(folder):
+    return os.path.join(folder, ARCHIVE_NAME)
+
+
+class HtmlArchive:
+    """
+    Gzip-compressed archive of raw review pages, one file per product.
+
+    Each page is stored as a JSON line {"star_type", "page_no", "html"}, so
+    pages can be appended from crawler threads and read back one at a time.
+    Opening an existing archive appends a new gzip member to it.
+    """
+
+    def __init__(self, path, compresslevel=6):
+        self.path = path
+        self.pages = 0
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = gzip.open(path, "at", encoding="utf-8", compresslevel=compresslevel)
+        self._lock = threading.Lock()
+
+    def add(self, star_type, page_no, html_content):
+        line = json.dumps({"star_type": star_type, "page_no": page_no, "html": html_content})
+        with self._lock:
+            self._file.write(line + "\n")
+            self.pages += 1
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+        logger.info(f"Archived {self.pages} pages to {self.path}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def iter_archive(path, star_type=None):
+    """
+    Lazily yields (star_type, page_no, html) from an archive.
+
+    Only one page is held in memory at a time. A truncated archive (e.g. from
+    an interrupted crawl) yields every complete page before the damage.
+    """
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as file:
+            for line in file:
+                try:
+                    page = json.loads(line)
+                except ValueError:
+                    logger.warning(f"Skipping incomplete page record in {path}")
+                    continue
+                if star_type is None or page["star_type"] == star_type:
+                    yield page["star_type"], page["page_no"], page["html"]
+    except (EOFError, OSError) as e:
+        logger.warning(f"Archive {path} ends early: {e}")
@@ -0,0 +1,82 @@
+import re
+import logging
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:
+    from lxml import html as lxml_html
+except ImportError:  # lxml is optional, BeautifulSoup is the fallback
+    lxml_html = None
+
+logger = logging.getLogger("app_logger")
+
+REVIEW_COUNT_HOOK = "cr-filter-info-review-rating-count"
+REVIEW_BODY_HOOK = "review-body"
+REVIEW_COUNT_PATTERN = re.compile(r"(\d[\d,]*)\s+total ratings,.*?(\d[\d,]*)\s+with reviews")
+
+# Only the nodes we read are built when parsing with BeautifulSoup
+DATA_HOOK_STRAINER = SoupStrainer(attrs={"data-hook": [REVIEW_COUNT_HOOK, REVIEW_BODY_HOOK]})
+
+COUNT_XPATH = f'//div[@data-hook="{REVIEW_COUNT_HOOK}"]'
+BODY_XPATH = f'//span[@data-hook="{REVIEW_BODY_HOOK}"]'
+
+
+def parse_review_count(raw_text):
+    """Number of reviews with text from the rating count banner, or -1."""
+    match = REVIEW_COUNT_PATTERN.search(raw_text)
+    if match:
+        return int(match.group(2).replace(",", ""))
+    return -1
+
+
+def _lxml_text(element):
+    # Same result as BeautifulSoup's get_text(strip=True)
+    return "".join(piece.strip() for piece in element.itertext() if piece.strip())
+
+
+def _parse_lxml(html_content):
+    tree = lxml_html.fromstring(html_content)
+    count_nodes = tree.xpath(COUNT_XPATH)
+    total_reviews = parse_review_count(_lxml_text(count_nodes[0])) if count_nodes else -1
+    reviews = [_lxml_text(span) for span in tree.xpath(BODY_XPATH)]
+    return total_reviews, reviews
+
+
+def _parse_soup(html_content, parser):
+    soup = BeautifulSoup(html_content, parser, parse_only=DATA_HOOK_STRAINER)
+    count_div = soup.find("div", {"data-hook": REVIEW_COUNT_HOOK})
+    total_reviews = parse_review_count(count_div.get_text(strip=True)) if count_div else -1
+    reviews = [span.get_text(strip=True) for span in soup.find_all("span", {"data-hook": REVIEW_BODY_HOOK})]
+    return total_reviews, reviews
+
+
+def default_backend():
+    return "lxml" if lxml_html is not None else "html.parser"
+
+
+def parse_review_page(html_content, backend=None):
+    """
+    Parse a review page once and return (total_reviews, reviews).
+
+    Args:
+        html_content (str): The page HTML.
+        backend (str): 'lxml' (XPath on the lxml tree, the default when lxml is
+            installed), 'lxml-soup' (BeautifulSoup on the lxml parser) or
+            'html.parser' (pure-Python BeautifulSoup).
+
+    Returns:
+        tuple: (number of reviews with text or -1 if the banner is missing,
+        list of review bodies)
+    """
+    backend = backend or default_backend()
+    try:
+        if not html_content or not html_content.strip():
+            return -1, []
+        if backend == "lxml":
+            return _parse_lxml(html_content)
+        if backend == "lxml-soup":
+            return _parse_soup(html_content, "lxml")
+        return _parse_soup(html_content, "html.parser")
+    except Exception as e:
+        logger.error(f"Error while parsing review page with {backend}: {e}")
+        return -1, []
@@ -0,0 +1,139 @@
+import time
+import random
+import logging
+import threading
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics
+
+logger = logging.getLogger("app_logger")
+
+# Politeness defaults; override per session
+REQUESTS_PER_SECOND = 0.5
+BURST = 2
+MAX_RETRIES = 4
+BACKOFF_BASE = 2.0
+BACKOFF_MAX = 60.0
+POOL_SIZE = 10
+TIMEOUT = 10
+RETRY_STATUS = {429, 503}
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket.
+
+    Tokens refill at `rate` per second up to `capacity`; acquire() blocks
+    until a token is available.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def backoff_delay(attempt, base=BACKOFF_BASE, maximum=BACKOFF_MAX):
+    """Exponential backoff with full jitter for the given retry attempt (0-based)."""
+    return random.uniform(0, min(maximum, base * (2 ** attempt)))
+
+
+class RateLimitedSession:
+    """
+    Pooled HTTP session shared by crawler threads.
+
+    Every request waits for a token from its host's bucket, and responses
+    with status 429/503 are retried with jittered exponential backoff,
+    honouring Retry-After when the server sends one.
+
+    Args:
+        headers_factory (callable): Returns the headers for each request.
+        cookies (dict): Cookies sent with every request.
+        rate (float): Requests per second allowed per host.
+        burst (int): Requests allowed back to back before throttling.
+        max_retries (int): Retries after a 429/503 or connection error.
+        pool_size (int): Connections kept open per host.
+        target (str): Name the requests are counted under in the metrics.
+    """
+
+    def __init__(self, headers_factory=None, cookies=None, rate=REQUESTS_PER_SECOND, burst=BURST,
+                 max_retries=MAX_RETRIES, pool_size=POOL_SIZE, timeout=TIMEOUT, target="http"):
+        self.headers_factory = headers_factory or dict
+        self.target = target
+        self.rate = rate
+        self.burst = burst
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        if cookies:
+            self.session.cookies.update(cookies)
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, url):
+        host = urlparse(url).netloc
+        with self._lock:
+            if host not in self._buckets:
+                self._buckets[host] = TokenBucket(self.rate, self.burst)
+            return self._buckets[host]
+
+    def get(self, url):
+        """GET url and return the response text, retrying throttled responses."""
+        bucket = self._bucket(url)
+        for attempt in range(self.max_retries + 1):
+            bucket.acquire()
+            if attempt:
+                metrics.inc("http_retries_total", target=self.target)
+            started = time.perf_counter()
+            try:
+                response = self.session.get(url, headers=self.headers_factory(), timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                metrics.record_request(self.target, "error", time.perf_counter() - started)
+                if attempt == self.max_retries:
+                    raise
+                delay = backoff_delay(attempt)
+                logger.warning(f"Request to {url} failed ({e}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+                continue
+
+            metrics.record_request(
+                self.target, str(response.status_code), time.perf_counter() - started, len(response.content)
+            )
+            if response.status_code == 200:
+                logger.info(f"Fetched {url}")
+                return response.text
+            if response.status_code in RETRY_STATUS and attempt < self.max_retries:
+                retry_after = response.headers.get("Retry-After", "")
+                # A server asking for hours would stall the job, never wait longer than BACKOFF_MAX
+                delay = min(float(retry_after), BACKOFF_MAX) if retry_after.isdigit() else backoff_delay(attempt)
+                logger.warning(
+                    f"Got {response.status_code} for {url}, retry {attempt + 1}/{self.max_retries} in {delay:.1f}s"
+                )
+                time.sleep(delay)
+                continue
+            logger.error(f"Failed to fetch page. Status code: {response.status_code}")
+            response.raise_for_status()
+            raise requests.HTTPError(f"Unexpected status {response.status_code} for {url}", response=response)
+
+    def close(self):
+        self.session.close()
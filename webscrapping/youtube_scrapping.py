@@ -1,71 +1,222 @@
-from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
+from httplib2.error import ServerNotFoundError
+import os
 import json
-import csv
+import time
+import socket
+import logging
 from utils.utils import setup_youtube, video_details
+from webscrapping.http_client import backoff_delay
+from resources import get_api_key
+from tables import TableWriter, COMMENT_COLUMNS, table_exists
+import metrics
 
-# Load API key from credentials.json
-with open("./json/credentials.json", "r") as file:
-    key = json.load(file)
-API_KEY = key["api_key"]
+logger = logging.getLogger("app_logger")
 
-def get_all_comments(video_id, api_key):
-    # Build YouTube API client
-    youtube = build('youtube', 'v3', developerKey=api_key)
+CHECKPOINT_FILE = "checkpoint.json"
+MAX_RETRIES = 3
+RETRY_STATUS = {429, 500, 502, 503, 504}
+# Network failures of the API client's httplib2 transport, retried like server errors
+TRANSPORT_ERRORS = (ConnectionError, TimeoutError, socket.timeout, ServerNotFoundError)
+
+
+def checkpoint_path(video_id, folder=None):
+    return os.path.join(folder or f"./webscrapping/{video_id}", CHECKPOINT_FILE)
+
+def load_checkpoint(path):
+    """Return the saved {"next_page_token", "fetched"} state, or None."""
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except Exception as e:
+        logger.error(f"Error reading checkpoint {path}: {e}")
+        return None
 
-    # Initialize variables
-    all_comments = []
+def save_checkpoint(path, next_page_token, fetched):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"next_page_token": next_page_token, "fetched": fetched}, f)
+    os.replace(tmp_path, path)
+
+def clear_checkpoint(path):
+    if path and os.path.exists(path):
+        os.remove(path)
+
+def execute_with_retry(request):
+    """Execute an API request, retrying quota/server errors with jittered backoff."""
+    for attempt in range(MAX_RETRIES + 1):
+        if attempt:
+            metrics.inc("http_retries_total", target="youtube_api")
+        started = time.perf_counter()
+        try:
+            response = request.execute()
+            metrics.record_request("youtube_api", "200", time.perf_counter() - started)
+            return response
+        except HttpError as e:
+            metrics.record_request("youtube_api", str(e.resp.status), time.perf_counter() - started)
+            if e.resp.status not in RETRY_STATUS or attempt == MAX_RETRIES:
+                raise
+            delay, reason = backoff_delay(attempt), f"HTTP {e.resp.status}"
+        except TRANSPORT_ERRORS as e:
+            metrics.record_request("youtube_api", "error", time.perf_counter() - started)
+            if attempt == MAX_RETRIES:
+                raise
+            delay, reason = backoff_delay(attempt), f"{type(e).__name__}: {e}"
+        logger.warning(f"YouTube API request failed ({reason}), retry {attempt + 1}/{MAX_RETRIES} in {delay:.1f}s")
+        time.sleep(delay)
+
+def iter_replies(youtube, parent_id):
+    """Yields every reply under a top-level comment."""
     next_page_token = None
+    while True:
+        response = execute_with_retry(youtube.comments().list(
+            part="snippet",
+            parentId=parent_id,
+            pageToken=next_page_token,
+            maxResults=100,
+            textFormat="plainText",
+        ))
+        for item in response.get("items", []):
+            yield item["snippet"]
+        next_page_token = response.get("nextPageToken")
+        if not next_page_token:
+            break
+
+def iter_comments(video_id, api_key, max_comments=None, time_budget=None, include_replies=False, checkpoint=None,
+                  newer_than=None, on_page=None, on_checkpoint=None):
+    """
+    Yields {"published_at", "text"} for every comment, one API page at a time.
+
+    Args:
+        video_id (str): The YouTube video ID.
+        api_key (str): YouTube Data API key.
+        max_comments (int): Stop after this many comments.
+        time_budget (float): Stop after this many seconds.
+        include_replies (bool): Also yield replies to each top-level comment.
+        checkpoint (str): File where nextPageToken is saved after every page.
+            If it already exists the fetch resumes from the saved page, and it
+            is removed once the last page has been read. A fetch stopped by a
+            limit or an error resumes at the start of the page it was on.
+        newer_than (str): Stop at the first top-level comment published before
+            this ISO timestamp. Threads come newest first, so this fetches only
+            what was posted since a previous run.
+        on_page (callable): Called after every page of comment threads fetched.
+        on_checkpoint (callable): Called right before the checkpoint is saved,
+            once every comment of the page has been consumed; a writer flushes
+            here so the saved position is never ahead of the rows on disk.
+    """
+    # Build YouTube API client (the discovery module is slow to import, so only when fetching)
+    from googleapiclient.discovery import build
+    youtube = build('youtube', 'v3', developerKey=api_key)
+    state = load_checkpoint(checkpoint) or {}
+    next_page_token = state.get("next_page_token")
+    fetched = state.get("fetched", 0)
+    if next_page_token:
+        logger.info(f"Resuming comments for {video_id} after {fetched} comments")
+    started = time.monotonic()
+    count = 0
 
-    # Fetch top-level comments and their replies
     while True:
-        try:
-            # Fetch comment threads
-            comment_thread_request = youtube.commentThreads().list(
-                part="snippet",
+        # Fetch comment threads
+        with metrics.stage("youtube_fetch", rows_in=1) as span:
+            comment_thread_response = execute_with_retry(youtube.commentThreads().list(
+                part="snippet,replies" if include_replies else "snippet",
                 videoId=video_id,
                 pageToken=next_page_token,
                 maxResults=100,
-            )
-            comment_thread_response = comment_thread_request.execute()
+            ))
+            span.rows_out = len(comment_thread_response.get("items", []))
+        if on_page is not None:
+            on_page()
 
-            # Extract comments
-            for item in comment_thread_response.get("items", []):
-                top_comment = item["snippet"]["topLevelComment"]["snippet"]
-                all_comments.append({
-                    "published_at": top_comment["publishedAt"],
-                    "text": top_comment["textOriginal"]
-                })
+        # Extract comments
+        for item in comment_thread_response.get("items", []):
+            top_comment = item["snippet"]["topLevelComment"]["snippet"]
+            if newer_than is not None and top_comment["publishedAt"] < newer_than:
+                logger.info(f"Reached comments older than {newer_than} for {video_id}")
+                clear_checkpoint(checkpoint)
+                return
+            comments = [top_comment]
+            if include_replies and item["snippet"].get("totalReplyCount", 0):
+                inline = [reply["snippet"] for reply in item.get("replies", {}).get("comments", [])]
+                if len(inline) < item["snippet"]["totalReplyCount"]:
+                    # Only a handful of replies come inline; page through the rest
+                    inline = iter_replies(youtube, item["snippet"]["topLevelComment"]["id"])
+                comments.extend(inline)
 
-            # Check for more pages of comments
-            next_page_token = comment_thread_response.get("nextPageToken")
-            if not next_page_token:
-                break  # Exit loop if no more pages
+            for comment in comments:
+                yield {
+                    "published_at": comment["publishedAt"],
+                    "text": comment["textOriginal"]
+                }
+                count += 1
+                if max_comments is not None and count >= max_comments:
+                    logger.info(f"Reached max_comments={max_comments} for {video_id}")
+                    return
 
-        except Exception as e:
-            print(f"An error occurred: {e}")
-            break
+        fetched += len(comment_thread_response.get("items", []))
+        # Check for more pages of comments
+        next_page_token = comment_thread_response.get("nextPageToken")
+        if not next_page_token:
+            clear_checkpoint(checkpoint)
+            break  # Exit loop if no more pages
+        if checkpoint:
+            if on_checkpoint is not None:
+                on_checkpoint()
+            save_checkpoint(checkpoint, next_page_token, fetched)
+        if time_budget is not None and time.monotonic() - started >= time_budget:
+            logger.info(f"Time budget of {time_budget}s used up for {video_id} after {count} comments")
+            return
 
-    return all_comments
+def get_all_comments(video_id, api_key, **limits):
+    return list(iter_comments(video_id, api_key, **limits))
 
-def youtube_scarpping(video_url):
+def youtube_scarpping(video_url, max_comments=None, time_budget=None, include_replies=False, job=None):
     """
-    Scrapes comments from a YouTube video and saves them to a CSV file.
+    Scrapes comments from a YouTube video and saves them to a comments table
+    (Parquet, or CSV without pyarrow; see tables.py).
+
+    Comments are written as they arrive, the table is flushed and the page
+    position checkpointed after every page, so an interrupted scrape picks
+    up where it stopped and appends to the same table (see
+    tables.TableWriter for how a Parquet table resumes). A checkpoint
+    without any table starts over.
 
     Args:
         video_url (str): The YouTube video URL.
+        max_comments (int): Optional cap on the number of comments fetched.
+        time_budget (float): Optional limit in seconds for the fetch.
+        include_replies (bool): Also fetch reply threads.
+        job (JobContext): Write into the job's workspace instead of ./webscrapping.
 
     Returns:
-        str: The filename of the saved CSV file.
+        tuple: (video ID, path of the comments table, folder)
     """
     VIDEO_ID = video_details(video_url)  # Extract video ID
-    FOLDER, FILENAME = setup_youtube(VIDEO_ID)  # Folder and filename setup
-    comments = get_all_comments(VIDEO_ID, API_KEY)  # Fetch comments
+    FOLDER, FILENAME = setup_youtube(VIDEO_ID, job)  # Folder and filename setup
+    checkpoint = checkpoint_path(VIDEO_ID, FOLDER)
+    resuming = load_checkpoint(checkpoint) is not None
+    if resuming and not table_exists(FILENAME):
+        clear_checkpoint(checkpoint)
+        resuming = False
 
-    # Write comments to CSV
-    with open(FILENAME, "w", encoding="utf-8", newline="") as f:
-        writer = csv.DictWriter(f, fieldnames=["published_at", "text"])
-        writer.writeheader()
-        writer.writerows(comments)
+    # Write comments to the table as they arrive
+    count = 0
+    with TableWriter(FILENAME, COMMENT_COLUMNS, append=resuming) as writer:
+        try:
+            comments = iter_comments(
+                VIDEO_ID, get_api_key(), max_comments, time_budget, include_replies, checkpoint,
+                on_checkpoint=writer.flush,
+            )
+            for comment in comments:
+                writer.write([comment])
+                count += 1
+        except Exception as e:
+            logger.error(f"Comment fetch for {VIDEO_ID} stopped after {count} comments: {e}")
+            print(f"An error occurred: {e}")
 
-    print(f"Saved {len(comments)} comments to {FILENAME}.")
+    print(f"Saved {count} comments to {FILENAME}.")
     return VIDEO_ID,FILENAME,FOLDER